@@ -0,0 +1,34 @@
+# gunicorn -c gunicorn.conf.py
+# SERVER_MODE=wsgi (기본): 동기 워커(gthread)로 tutorial.wsgi 실행
+# SERVER_MODE=asgi: uvicorn 워커로 tutorial.asgi 실행, 업무/팀 리스트 조회는 async 뷰 (settings.ASYNC_READ_VIEWS)
+import glob
+import multiprocessing
+import os
+
+server_mode = os.environ.get('SERVER_MODE', 'wsgi')
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', multiprocessing.cpu_count() * 2 + 1))
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 30))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
+# 워커가 메모리를 계속 늘리지 않도록 일정 요청 수마다 다시 띄운다
+max_requests = int(os.environ.get('GUNICORN_MAX_REQUESTS', 5000))
+max_requests_jitter = int(os.environ.get('GUNICORN_MAX_REQUESTS_JITTER', 500))
+accesslog = os.environ.get('GUNICORN_ACCESSLOG', '-')
+
+if server_mode == 'asgi':
+    wsgi_app = 'tutorial.asgi:application'
+    worker_class = 'uvicorn.workers.UvicornWorker'
+else:
+    wsgi_app = 'tutorial.wsgi:application'
+    worker_class = 'gthread'
+    threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+
+def on_starting(server):
+    # 이전 실행에서 남은 워커별 지표 파일과 집계 파일(wink.metrics)을 지운다
+    metrics_dir = os.environ.get('METRICS_DIR', '')
+    if metrics_dir:
+        for path in glob.glob(os.path.join(metrics_dir, 'wink-*.json')):
+            os.unlink(path)
@@ -77,6 +77,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # 요청별 뷰 이름/시간/DB 쿼리 수·시간 측정, Server-Timing 헤더 (wink.instrumentation)
+    'wink.instrumentation.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -107,18 +109,40 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'tutorial.wsgi.application'
 
+# 서버 실행 방식 (gunicorn.conf.py 와 같은 값). asgi 이면 uvicorn 워커로 tutorial.asgi 를 띄운다
+SERVER_MODE = config('SERVER_MODE', default='wsgi')
+# 업무/팀 리스트 조회를 async 뷰(wink.async_views)로 처리한다. 기본은 asgi 실행일 때만
+ASYNC_READ_VIEWS = config('ASYNC_READ_VIEWS', default=SERVER_MODE == 'asgi', cast=bool)
+
 
 # Database
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
 
+# DB_POOL=True 이면 프로세스 내 연결 풀(wink.db.postgresql_pool)에서 연결을 빌려 쓰고 요청이 끝나면 돌려준다
+# 아니면 DB_CONN_MAX_AGE 초 동안 연결을 유지해 요청마다 새로 접속하지 않는다 (0 이면 요청마다 접속)
+# asgi 에서는 요청마다 ORM 을 실행하는 스레드가 달라 지속 연결이 재사용되지 않으므로 풀을 기본으로 쓴다
+DB_POOL = config('DB_POOL', default=SERVER_MODE == 'asgi', cast=bool)
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql_psycopg2',
+        'ENGINE': 'wink.db.postgresql_pool' if DB_POOL else 'django.db.backends.postgresql_psycopg2',
         'NAME': config('DB_NAME'),
         'USER': config('DB_USER'),
         'PASSWORD': config('DB_PASSWORD'),
         'HOST': config('DB_HOST'),
         'PORT': config('DB_PORT', default='5432'),
+        'CONN_MAX_AGE': 0 if DB_POOL else config('DB_CONN_MAX_AGE', default=60, cast=int),
+        # 유지 중인 연결을 요청 시작 시 재사용하기 전에 살아 있는지 확인
+        'CONN_HEALTH_CHECKS': config('DB_CONN_HEALTH_CHECKS', default=True, cast=bool),
+        # SSD 기준 플래너 비용. 기본값(4)이면 팀 업무 리스트가 인덱스 대신 순차 스캔으로 풀린다
+        'OPTIONS': {'options': f"-c random_page_cost={config('DB_RANDOM_PAGE_COST', default='1.1')}"},
+        'POOL': {
+            'MAX_SIZE': config('DB_POOL_MAX_SIZE', default=10, cast=int),
+            'TIMEOUT': config('DB_POOL_TIMEOUT', default=5, cast=int),
+            'MAX_LIFETIME': config('DB_POOL_MAX_LIFETIME', default=3600, cast=int),
+            # 이 시간(초)보다 오래 쉬던 연결은 꺼낼 때 SELECT 1 로 확인한다 (CONN_HEALTH_CHECKS 는 CONN_MAX_AGE=0 이라 풀에는 적용되지 않는다)
+            'HEALTH_CHECK_IDLE': config('DB_POOL_HEALTH_CHECK_IDLE', default=30, cast=int),
+        },
     }
     # 'default': {
     #     'ENGINE': 'django.db.backends.sqlite3',
@@ -127,6 +151,109 @@ DATABASES = {
 }
 
 
+# Cache
+# 기본은 프로세스 로컬(locmem), REDIS_URL 이 있으면 여러 워커가 공유하는 Redis 캐시를 사용
+# https://docs.djangoproject.com/en/4.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'tutorial',
+    }
+}
+
+REDIS_URL = config('REDIS_URL', default='')
+if REDIS_URL:
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': REDIS_URL,
+    }
+
+# 팀 디렉터리 캐시 (wink.team_directory)
+# locmem 은 워커마다 따로라 팀 변경 시 무효화가 다른 워커에 전달되지 않으므로, Redis 가 없으면 짧게 둔다
+TEAM_DIRECTORY_LOCAL_TTL = config('TEAM_DIRECTORY_LOCAL_TTL', default=5, cast=int)
+TEAM_DIRECTORY_CACHE_TIMEOUT = config('TEAM_DIRECTORY_CACHE_TIMEOUT', default=300 if REDIS_URL else 5, cast=int)
+TEAM_DIRECTORY_WARM_ON_STARTUP = config('TEAM_DIRECTORY_WARM_ON_STARTUP', default=True, cast=bool)
+
+# 팀별 업무 리스트 응답 캐시 (wink.feed_cache), 0이면 사용하지 않음
+# 쓰기 요청의 무효화(세대 증가)가 모든 워커에 보여야 하므로 공유 캐시(REDIS_URL)가 있을 때만 기본으로 켠다
+# (워커별 locmem 이면 다른 워커가 새 ETag 와 함께 이전 본문을 내려줄 수 있다)
+TASK_FEED_CACHE_TIMEOUT = config('TASK_FEED_CACHE_TIMEOUT', default=60 if REDIS_URL else 0, cast=int)
+TASK_FEED_CACHE_LOCK_TIMEOUT = 10
+TASK_FEED_CACHE_WAIT = 2
+
+# 업무 일괄 등록(wink.importer) 시 한 번에 검증/저장하는 건수
+TASK_IMPORT_CHUNK_SIZE = config('TASK_IMPORT_CHUNK_SIZE', default=500, cast=int)
+
+# 업무 내보내기(wink.exporter) 시 서버 측 커서에서 한 번에 읽는 건수
+TASK_EXPORT_CHUNK_SIZE = config('TASK_EXPORT_CHUNK_SIZE', default=1000, cast=int)
+
+# 토큰 인증(wink.authentication) 시 사용자 활성/팀 상태를 캐시하는 시간(초)
+AUTH_USER_STATE_TTL = config('AUTH_USER_STATE_TTL', default=30, cast=int)
+# 사용자 객체 캐시(wink.authentication.CachedJWTAuthentication) 시간(초)과 적중/미스 보고 함수 경로
+AUTH_USER_CACHE_TIMEOUT = config('AUTH_USER_CACHE_TIMEOUT', default=300, cast=int)
+AUTH_CACHE_METRICS_HOOK = config('AUTH_CACHE_METRICS_HOOK', default='')
+
+# 요청 측정 (wink.instrumentation.RequestMetricsMiddleware)
+# SAMPLE_RATE 비율의 요청만 쿼리를 측정해 히스토그램/로그에 남긴다. SLOW_MS 또는 SLOW_QUERIES 를 넘으면 WARNING 로그
+REQUEST_METRICS_ENABLED = config('REQUEST_METRICS_ENABLED', default=True, cast=bool)
+REQUEST_METRICS_SAMPLE_RATE = config('REQUEST_METRICS_SAMPLE_RATE', default=1.0, cast=float)
+REQUEST_METRICS_SLOW_MS = config('REQUEST_METRICS_SLOW_MS', default=1000, cast=int)
+REQUEST_METRICS_SLOW_QUERIES = config('REQUEST_METRICS_SLOW_QUERIES', default=50, cast=int)
+REQUEST_METRICS_SERVER_TIMING = config('REQUEST_METRICS_SERVER_TIMING', default=True, cast=bool)
+
+# /metrics (wink.metrics). gunicorn 워커가 여러 개면 METRICS_DIR 에 워커별 지표 파일을 METRICS_FLUSH_INTERVAL 초마다 쓰고
+# 조회 시 합친다. 비어 있으면 응답한 프로세스의 지표만 내보낸다. METRICS_TOKEN 을 설정하면 Bearer 토큰이 필요
+METRICS_DIR = config('METRICS_DIR', default='')
+METRICS_FLUSH_INTERVAL = config('METRICS_FLUSH_INTERVAL', default=5, cast=int)
+METRICS_TOKEN = config('METRICS_TOKEN', default='')
+
+# 요청 로그(wink.requests)는 JSON 한 줄씩 출력. INFO 이면 측정한 모든 요청, WARNING 이면 느린 요청만
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'wink.requests': {
+            'handlers': ['console'],
+            'level': config('REQUEST_LOG_LEVEL', default='WARNING'),
+            'propagate': False,
+        },
+    },
+}
+
+
+# 비밀번호 해시 (wink.hashers). PASSWORD_HASHER 로 고른 해셔로 새로 해시하고, 나머지는 기존 해시 검증용
+# 저장된 해시의 알고리즘/파라미터가 다르면 로그인 시 다시 해시한다. argon2 는 argon2-cffi 설치 필요
+PASSWORD_HASHER = config('PASSWORD_HASHER', default='scrypt')
+PASSWORD_HASHER_PARAMS = {
+    'scrypt': {
+        'work_factor': config('SCRYPT_WORK_FACTOR', default=2 ** 14, cast=int),
+        'block_size': config('SCRYPT_BLOCK_SIZE', default=8, cast=int),
+        'parallelism': config('SCRYPT_PARALLELISM', default=1, cast=int),
+    },
+    'argon2': {
+        'time_cost': config('ARGON2_TIME_COST', default=2, cast=int),
+        'memory_cost': config('ARGON2_MEMORY_COST', default=102400, cast=int),
+        'parallelism': config('ARGON2_PARALLELISM', default=8, cast=int),
+    },
+}
+_PASSWORD_HASHER_CLASSES = {
+    'scrypt': 'wink.hashers.TunedScryptPasswordHasher',
+    'argon2': 'wink.hashers.TunedArgon2PasswordHasher',
+    'pbkdf2': 'django.contrib.auth.hashers.PBKDF2PasswordHasher',
+}
+PASSWORD_HASHERS = [_PASSWORD_HASHER_CLASSES[PASSWORD_HASHER]] + [
+    path for name, path in _PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER
+]
+# 해시 계산 스레드 수, 대기열 크기, 대기열 자리를 기다리는 시간(초). 0 이면 요청 스레드에서 바로 계산
+PASSWORD_HASH_WORKERS = config('PASSWORD_HASH_WORKERS', default=2, cast=int)
+PASSWORD_HASH_QUEUE_SIZE = config('PASSWORD_HASH_QUEUE_SIZE', default=16, cast=int)
+PASSWORD_HASH_QUEUE_TIMEOUT = config('PASSWORD_HASH_QUEUE_TIMEOUT', default=5, cast=int)
+
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -170,13 +297,28 @@ STATIC_URL = 'static/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+API_JSON_BACKEND = config('API_JSON_BACKEND', default='orjson')
+
 REST_FRAMEWORK = {
+    # 기본은 토큰 클레임으로 사용자를 만드는 인증 (사용자 조회 없음)
+    # 사용자 객체를 캐시에서 꺼내려면 wink.authentication.CachedJWTAuthentication,
+    # 매 요청 사용자를 조회하려면 rest_framework_simplejwt.authentication.JWTAuthentication
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        config('API_AUTHENTICATION_CLASS', default='wink.authentication.StatelessJWTAuthentication'),
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated'
     ],
+    # API_JSON_BACKEND=orjson 이면 orjson 으로 응답 렌더링/요청 파싱 (orjson 이 없으면 stdlib json 으로 동작)
+    'DEFAULT_RENDERER_CLASSES': [
+        'wink.renderers.ORJSONRenderer' if API_JSON_BACKEND == 'orjson' else 'rest_framework.renderers.JSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'wink.parsers.ORJSONParser' if API_JSON_BACKEND == 'orjson' else 'rest_framework.parsers.JSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 10
 }
@@ -6,6 +6,7 @@ from rest_framework import routers
 from rest_framework import permissions
 from drf_yasg.views import get_schema_view
 from drf_yasg import openapi
+from wink.views import MetricsView
 
 router = routers.DefaultRouter()
 
@@ -25,6 +26,7 @@ schema_view = get_schema_view(
 urlpatterns = [
     path('admin/', admin.site.urls),
     path('v1/api/', include('wink.urls')),
+    path('metrics', MetricsView.as_view(), name='metrics'),
     path('', include(router.urls)),
     path('api-auth/', include('rest_framework.urls', namespace='rest_framework'))
 ]
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tutorial.settings')
 
 application = get_wsgi_application()
+
+# 팀 디렉터리 캐시를 첫 요청 전에 채운다
+from wink.team_directory import warm_on_startup  # noqa: E402
+
+warm_on_startup()
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class WinkConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'wink'
+
+    def ready(self):
+        from wink import instrumentation, signals  # noqa: F401
@@ -0,0 +1,133 @@
+import asyncio
+from functools import wraps
+
+from asgiref.sync import markcoroutinefunction, sync_to_async
+from rest_framework import status
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from wink import feed_cache
+from wink.conditional import acondition, atask_feed_validators, ateam_list_validators
+from wink.instrumentation import span
+from wink.models import SubTask, TaskTeamVisibility
+from wink.serializers import TaskSerializer
+from wink.team_directory import team_directory
+from wink.views import TasksView, TeamsView
+
+
+def in_thread(method):
+    # 동기 핸들러(쓰기 요청)를 async 뷰에서 그대로 쓴다. swagger 설정 등 데코레이터 속성도 함께 복사된다
+    @wraps(method)
+    async def handler(self, request, *args, **kwargs):
+        return await sync_to_async(method)(self, request, *args, **kwargs)
+    return handler
+
+
+def same_schema(method):
+    # 동기 뷰와 같은 swagger 문서를 쓴다
+    def decorator(handler):
+        handler._swagger_auto_schema = method._swagger_auto_schema
+        return handler
+    return decorator
+
+
+async def aprefetch_subtasks(tasks):
+    # Django 4.2 의 aiterator() 는 prefetch_related 를 지원하지 않으므로 하위 업무는 한 번에 조회해 붙인다
+    by_task = {task.id: [] for task in tasks}
+    if by_task:
+        subtasks = SubTask.objects.select_related('team').filter(task_id__in=by_task).order_by('id')
+        async for subtask in subtasks.aiterator():
+            by_task[subtask.task_id].append(subtask)
+    for task in tasks:
+        task._prefetched_objects_cache = {'subtasks': by_task[task.id]}
+    return tasks
+
+
+class AsyncAPIView(APIView):
+    # 핸들러가 코루틴인 APIView. ASGI 에서는 DB/캐시를 기다리는 동안 요청이 워커 스레드를 붙잡지 않는다
+    # 인증/권한/스로틀(initial)은 동기 코드이므로 스레드에서 실행한다
+
+    @classmethod
+    def as_view(cls, **initkwargs):
+        view = super().as_view(**initkwargs)
+        # DRF 3.14 의 csrf_exempt 래퍼가 코루틴 표시를 지우므로 다시 표시한다
+        if cls.view_is_async:
+            markcoroutinefunction(view)
+        return view
+
+    async def dispatch(self, request, *args, **kwargs):
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(self, request.method.lower(), self.http_method_not_allowed)
+            else:
+                handler = self.http_method_not_allowed
+
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
+
+
+class AsyncTasksView(AsyncAPIView, TasksView):
+
+    @same_schema(TasksView.get)
+    async def get(self, request):
+        return await acondition(request, atask_feed_validators, lambda: self.aget_tasks(request))
+
+    async def aget_tasks(self, request):
+        team_id = request.user.team_id
+        paginator = self.pagination_class()
+        paginated = paginator.is_requested(request)
+
+        if not feed_cache.is_enabled() or request.accepted_renderer.format != 'json':
+            return Response(await self.aget_feed_data(request, team_id, paginator, paginated), status=status.HTTP_200_OK)
+
+        async def build():
+            return request.accepted_renderer.render(
+                await self.aget_feed_data(request, team_id, paginator, paginated),
+                request.accepted_media_type,
+                self.get_renderer_context(),
+            )
+
+        variant = feed_cache.request_variant(request, paginated)
+        body = await feed_cache.aget_or_build(team_id, variant, build)
+        return feed_cache.CachedResponse(body, status=status.HTTP_200_OK)
+
+    async def aget_feed_data(self, request, team_id, paginator, paginated):
+        feed = TaskTeamVisibility.objects.feed(team_id).prefetch_related(None)
+
+        if paginated:
+            page = await paginator.apaginate_queryset(feed, request, view=self)
+            tasks = await aprefetch_subtasks([visibility.task for visibility in page])
+            with span('serialize'):
+                return paginator.get_paginated_response(TaskSerializer(tasks, many=True).data).data
+
+        feed = feed.order_by('-created_at', '-task_id')
+        tasks = await aprefetch_subtasks([visibility.task async for visibility in feed.aiterator()])
+        with span('serialize'):
+            return TaskSerializer(tasks, many=True).data
+
+    post = in_thread(TasksView.post)
+
+
+class AsyncTeamsView(AsyncAPIView, TeamsView):
+
+    @same_schema(TeamsView.get)
+    async def get(self, request):
+        async def build():
+            return Response(await team_directory.aall(), status=status.HTTP_200_OK)
+        return await acondition(request, ateam_list_validators, build)
+
+    post = in_thread(TeamsView.post)
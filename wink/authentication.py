@@ -0,0 +1,174 @@
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.functional import cached_property
+from django.utils.module_loading import import_string
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from wink.models import User
+from wink.team_directory import team_directory
+
+# 토큰 검증 시 확인하는 사용자 상태 (is_active, team_id) 캐시
+USER_STATE_KEY = 'wink:auth:user_state:{user_id}'
+# 사용자 객체 캐시. 사용자별 버전을 키에 넣어 두고, 사용자/팀이 바뀌면 버전을 올려 무효화한다
+USER_VERSION_KEY = 'wink:auth:user_version:{user_id}'
+USER_KEY = 'wink:auth:user:{user_id}:{version}'
+
+counters = {'hits': 0, 'misses': 0}
+
+
+class WinkRefreshToken(RefreshToken):
+    # 요청마다 사용자/팀을 조회하지 않도록 팀 id와 활성/관리자 여부를 클레임으로 넣는다 (액세스 토큰에도 복사됨)
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token['team_id'] = user.team_id
+        token['is_active'] = user.is_active
+        token['is_admin'] = user.is_admin
+        return token
+
+
+class ClaimsUser(TokenUser):
+    # 토큰 클레임만으로 만든 가벼운 사용자 객체. 뷰에서는 id/team_id 만 사용한다
+
+    @cached_property
+    def team_id(self):
+        return self.token.get('team_id')
+
+    @cached_property
+    def is_active(self):
+        return self.token.get('is_active', True)
+
+    @cached_property
+    def is_admin(self):
+        return self.token.get('is_admin', False)
+
+    @cached_property
+    def team(self):
+        # 팀 디렉터리 캐시에서 꺼내므로 보통 쿼리가 없다
+        if self.team_id is None:
+            return None
+        return team_directory.get_many([self.team_id]).get(self.team_id)
+
+
+def get_user_state(user_id):
+    # (is_active, team_id). 없는 사용자는 비활성으로 본다
+    key = USER_STATE_KEY.format(user_id=user_id)
+    state = cache.get(key)
+    if state is None:
+        state = User.objects.filter(pk=user_id).values_list('is_active', 'team_id').first() or (False, None)
+        cache.set(key, state, getattr(settings, 'AUTH_USER_STATE_TTL', 30))
+    return state
+
+
+def _new_version():
+    # 버전 키가 캐시에서 밀려나도 예전 버전 번호와 겹치지 않도록 시각 기반으로 시작한다
+    return time.time_ns() // 1000
+
+
+def get_user_version(user_id):
+    key = USER_VERSION_KEY.format(user_id=user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, _new_version(), None)
+        version = cache.get(key)
+    return version
+
+
+def _bump_user_versions(user_ids):
+    for user_id in user_ids:
+        key = USER_VERSION_KEY.format(user_id=user_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _new_version(), None)
+
+
+def _invalidate_users(user_ids):
+    _bump_user_versions(user_ids)
+    cache.delete_many([USER_STATE_KEY.format(user_id=user_id) for user_id in user_ids])
+
+
+def invalidate_users(user_ids):
+    # 사용자 객체/상태 캐시를 비운다. 커밋 전에 다른 요청이 이전 값으로 채울 수 있으므로 커밋 후에도 한 번 더
+    user_ids = set(user_ids)
+    if not user_ids:
+        return
+    _invalidate_users(user_ids)
+    transaction.on_commit(lambda: _invalidate_users(user_ids))
+
+
+@lru_cache(maxsize=None)
+def _load_metrics_hook(path):
+    return import_string(path)
+
+
+def _report(event, user_id):
+    # AUTH_CACHE_METRICS_HOOK: event('hit' / 'miss')와 user_id 를 받는 함수의 경로
+    counters['hits' if event == 'hit' else 'misses'] += 1
+    hook_path = getattr(settings, 'AUTH_CACHE_METRICS_HOOK', '')
+    if hook_path:
+        _load_metrics_hook(hook_path)(event, user_id)
+
+
+def resolve_user(user_id):
+    # 사용자와 팀을 함께 캐시한다 (request.user.team 에 쿼리가 없도록). 비밀번호 해시는 캐시에 넣지 않는다
+    key = USER_KEY.format(user_id=user_id, version=get_user_version(user_id))
+    user = cache.get(key)
+    if user is not None:
+        _report('hit', user_id)
+        return user
+
+    _report('miss', user_id)
+    user = User.objects.select_related('team').defer('password').filter(pk=user_id).first()
+    if user is not None:
+        cache.set(key, user, getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 300))
+    return user
+
+
+def stats():
+    result = dict(counters)
+    lookups = result['hits'] + result['misses']
+    result['hit_ratio'] = result['hits'] / lookups if lookups else 0.0
+    return result
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    # 사용자 조회를 (사용자 id, 버전) 키의 캐시로 대신한다. 사용자/팀 저장 시그널에서 버전을 올린다
+    def get_user(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken('토큰에 사용자 정보가 없습니다.')
+
+        user = resolve_user(user_id)
+        if user is None:
+            raise AuthenticationFailed('사용자가 존재하지 않습니다.', code='user_not_found')
+        if not user.is_active:
+            raise AuthenticationFailed('비활성화된 사용자입니다.', code='user_inactive')
+        return user
+
+
+class StatelessJWTAuthentication(CachedJWTAuthentication):
+    # 사용자 행을 조회하지 않고 클레임으로 request.user 를 만든다
+    # 비활성화/팀 변경은 짧은 TTL 의 사용자 상태 캐시로 확인하고, 사용자 저장/삭제 시그널에서 캐시를 비운다
+    def get_user(self, validated_token):
+        if 'team_id' not in validated_token:
+            # 클레임이 없는 예전 토큰은 캐시를 거쳐 사용자를 조회한다
+            return super().get_user(validated_token)
+
+        user = ClaimsUser(validated_token)
+        is_active, team_id = get_user_state(user.id)
+        if not is_active:
+            raise AuthenticationFailed('비활성화되었거나 존재하지 않는 사용자입니다.', code='user_inactive')
+        if team_id != user.team_id:
+            raise AuthenticationFailed('소속 팀이 변경되었습니다. 다시 로그인하세요.', code='team_changed')
+        return user
@@ -0,0 +1,109 @@
+from django.db import transaction
+from django.db.models import Case, F, Q, When
+from django.db.models.functions import Now
+
+from wink import feed_cache
+from wink.models import SubTask, Task, TaskTeamVisibility, subtask_count_expressions
+
+
+def lock_tasks(task_ids):
+    # 상위 업무 행을 id 순서로 잠근다. 같은 업무의 하위 업무 완료 처리가 동시에 들어와도
+    # 뒤의 트랜잭션은 앞의 커밋 이후 상태를 보고 완료 여부를 계산한다 (id 순서로 잠가 교착 방지)
+    return list(Task.objects.select_for_update().filter(pk__in=task_ids).order_by('pk').values_list('pk', flat=True))
+
+
+def completion_values(is_complete):
+    # 하위 업무 완료 상태 UPDATE 값. 이미 같은 상태인 행은 완료일자/수정 시각을 그대로 둔다
+    # (상태 조건으로 행을 거르지 않으므로 UPDATE 건수가 팀 조건에 일치한 행 수가 된다)
+    unchanged = Q(is_complete=is_complete)
+    return {
+        'is_complete': is_complete,
+        'completed_date': Case(When(unchanged, then=F('completed_date')), default=Now()) if is_complete else None,
+        'modified_at': Case(When(unchanged, then=F('modified_at')), default=Now()),
+    }
+
+
+def set_subtask_completion(subtask, is_complete, team_id):
+    # 하위 업무 완료 상태 변경 + 상위 업무 완료 여부 재계산을 한 트랜잭션, 고정된 수의 문장으로 처리
+    # 권한 확인 후 잠금 전에 하위 업무의 팀이 바뀌었을 수 있으므로 UPDATE 에도 팀 조건을 건다
+    # 반환: 변경한 하위 업무 수 (0 이면 하위 업무가 삭제되었거나 다른 팀으로 바뀐 것)
+    if team_id is None:
+        return 0
+    with transaction.atomic():
+        lock_tasks([subtask.task_id])
+        matched = SubTask.objects.filter(pk=subtask.pk, team_id=team_id).update(**completion_values(is_complete))
+        if not matched:
+            return 0
+        # 상태가 이미 같았던 경우도 있으므로 증감 대신 상위 업무의 카운터를 실제 건수로 다시 계산
+        Task.objects.filter(pk=subtask.task_id).refresh_completion(**subtask_count_expressions())
+        feed_cache.invalidate_teams(
+            TaskTeamVisibility.objects.filter(task_id=subtask.task_id).values_list('team_id', flat=True)
+        )
+    return matched
+
+
+def set_subtasks_completion(team_id, items):
+    # 여러 하위 업무의 완료 상태를 한 트랜잭션에서 변경한다
+    # 권한 확인 SELECT 한 번, 상태별 UPDATE 한 번씩, 상위 업무 완료 여부/카운터 재계산 UPDATE 한 번
+    # items: [{'id', 'is_complete'}], 반환: 요청 순서대로 [{'id', 'is_complete', 'status'}]
+    with transaction.atomic():
+        subtasks = SubTask.objects.filter(id__in=[item['id'] for item in items])
+        rows = {
+            subtask_id: (subtask_team_id, task_id)
+            for subtask_id, subtask_team_id, task_id in subtasks.values_list('id', 'team_id', 'task_id')
+        }
+
+        results = []
+        ids_by_state = {True: [], False: []}
+        task_ids = set()
+        for item in items:
+            row = rows.get(item['id'])
+            if row is None:
+                item_status = 'not_found'
+            elif team_id is None or row[0] != team_id:
+                item_status = 'forbidden'
+            else:
+                item_status = 'updated'
+                ids_by_state[item['is_complete']].append(item['id'])
+                task_ids.add(row[1])
+            results.append({'id': item['id'], 'is_complete': item['is_complete'], 'status': item_status})
+
+        if not task_ids:
+            return results
+
+        lock_tasks(task_ids)
+        skipped_ids = set()
+        for is_complete, subtask_ids in ids_by_state.items():
+            if not subtask_ids:
+                continue
+            # 잠금 전에 팀이 바뀐 하위 업무는 건드리지 않도록 팀 조건을 UPDATE에도 건다
+            matched = SubTask.objects.filter(id__in=subtask_ids, team_id=team_id).update(**completion_values(is_complete))
+            if matched < len(subtask_ids):
+                # 일치하지 않은 행이 있을 때만 어떤 행이 빠졌는지 다시 조회한다 (상위 업무를 잠근 뒤라 API 로는 팀이 바뀌지 않는다)
+                owned = SubTask.objects.filter(id__in=subtask_ids, team_id=team_id).values_list('id', flat=True)
+                skipped_ids |= set(subtask_ids) - set(owned)
+
+        if skipped_ids:
+            # 삭제되었으면 not_found, 다른 팀으로 바뀌었으면 forbidden
+            existing = set(SubTask.objects.filter(id__in=skipped_ids).values_list('id', flat=True))
+            for result in results:
+                if result['id'] in skipped_ids:
+                    result['status'] = 'forbidden' if result['id'] in existing else 'not_found'
+        # 업무마다 증감을 따로 계산하지 않고 영향받은 업무의 카운터를 실제 건수로 다시 계산
+        Task.objects.filter(pk__in=task_ids).refresh_completion(**subtask_count_expressions())
+        feed_cache.invalidate_teams(
+            TaskTeamVisibility.objects.filter(task_id__in=task_ids).values_list('team_id', flat=True).distinct()
+        )
+    return results
+
+
+def delete_open_subtask(subtask):
+    # 미완료 하위 업무 삭제 + 카운터 감소 + 상위 업무 완료 여부 재계산 (호출하는 쪽의 트랜잭션 안에서)
+    # 마지막 미완료 하위 업무를 지우면 상위 업무는 완료가 된다
+    lock_tasks([subtask.task_id])
+    deleted = SubTask.objects.filter(pk=subtask.pk, is_complete=False).delete()[0]
+    if deleted:
+        Task.objects.filter(pk=subtask.task_id).refresh_completion(
+            subtask_total=F('subtask_total') - deleted, subtask_open=F('subtask_open') - deleted,
+        )
+    return deleted
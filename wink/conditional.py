@@ -0,0 +1,163 @@
+import hashlib
+from calendar import timegm
+
+from django.core.cache import cache
+from django.db.models import Count, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from wink import feed_cache
+from wink.models import SubTask, Task, TaskTeamVisibility
+from wink.pagination import TaskFeedPagination
+from wink.team_directory import team_directory
+
+# 같은 검증값(ETag)을 처음 본 시각을 보관하는 기간
+FIRST_SEEN_TIMEOUT = 60 * 60 * 24
+
+TASK_FEED_AGGREGATES = {
+    'task_count': Count('id'),
+    'task_modified': Max('task_modified_at'),
+    'subtask_count': Sum('task_subtask_count'),
+    'subtask_modified': Max('subtask_modified_at'),
+}
+TASK_FEED_PAGE_FIELDS = ('task_id', 'task_modified_at', 'task_subtask_count', 'subtask_modified_at')
+
+
+def _digest(*parts):
+    return hashlib.md5(repr(parts).encode('utf-8'), usedforsecurity=False).hexdigest()
+
+
+def _first_seen(etag):
+    # 삭제는 max(modified_at)을 바꾸지 않으므로, 검증값이 처음 관측된 시각을 Last-Modified 하한으로 쓴다
+    return cache.get_or_set(f'wink:etag:first_seen:{etag}', timezone.now, FIRST_SEEN_TIMEOUT)
+
+
+async def _afirst_seen(etag):
+    return await cache.aget_or_set(f'wink:etag:first_seen:{etag}', timezone.now, FIRST_SEEN_TIMEOUT)
+
+
+def _memoize(request, name, compute):
+    # condition 데코레이터가 etag/last_modified 함수를 각각 호출하므로 요청 단위로 한 번만 계산
+    cache_attr = f'_wink_{name}_validators'
+    validators = getattr(request, cache_attr, None)
+    if validators is None:
+        validators = compute(request)
+        setattr(request, cache_attr, validators)
+    return validators
+
+
+def _task_feed_rows(team_id):
+    # 가시성 행마다 업무/하위 업무를 인덱스로 찾는 상관 서브쿼리로 둔다
+    # JOIN 으로 두면 업무가 많을 때 wink_task 전체를 순차 스캔하는 해시 조인 계획이 나온다
+    # 하위 업무 수는 비정규화 카운터(subtask_total)가 아니라 실제 건수로 센다 (카운터를 거치지 않은 삭제도 ETag 에 반영)
+    task = Task.objects.filter(pk=OuterRef('task_id'))
+    subtasks = SubTask.objects.filter(task_id=OuterRef('task_id')).order_by().values('task_id')
+    return TaskTeamVisibility.objects.filter(team_id=team_id).annotate(
+        task_modified_at=Subquery(task.values('modified_at')),
+        task_subtask_count=Coalesce(Subquery(subtasks.annotate(count=Count('pk')).values('count')), 0),
+        subtask_modified_at=Subquery(subtasks.annotate(modified=Max('modified_at')).values('modified')),
+    )
+
+
+def _task_feed_page_rows(request, team_id):
+    # 페이지 모드에서는 요청한 페이지의 행(다음 페이지 확인용 한 건 포함)만 읽어 검증값을 만든다
+    # 페이지 조회와 같은 keyset 조건이므로 깊은 페이지도 첫 페이지와 비용이 같다
+    return TaskFeedPagination().page_queryset(_task_feed_rows(team_id).values_list(*TASK_FEED_PAGE_FIELDS), request)
+
+
+def _task_feed_stats(team_id):
+    # 본문을 직렬화하지 않고, 팀에게 보이는 업무/하위 업무의 건수와 max(modified_at) 만으로 계산
+    return _task_feed_rows(team_id).aggregate(**TASK_FEED_AGGREGATES)
+
+
+def _task_feed_etag(request, team_id, *parts):
+    return _digest('tasks', team_id, request.get_full_path(), request.accepted_media_type, *parts)
+
+
+def _stats_validator(request, team_id, stats):
+    etag = _task_feed_etag(
+        request, team_id, stats['task_count'], stats['task_modified'], stats['subtask_count'], stats['subtask_modified'],
+    )
+    return etag, [stats['task_modified'], stats['subtask_modified']]
+
+
+def _page_validator(request, team_id, rows):
+    # rows: (업무 id, 업무 수정 시각, 하위 업무 수, 하위 업무 최종 수정 시각). 페이지 구성이 바뀌면 id 목록이 달라진다
+    return _task_feed_etag(request, team_id, rows), [value for row in rows for value in (row[1], row[3])]
+
+
+def _task_feed_validators(request):
+    # 응답 캐시를 쓰면 팀별 세대 번호가 업무 리스트의 버전이다. 응답 캐시를 무효화하는 모든 쓰기에서 함께 올라가므로
+    # 쿼리 없이 검증값을 만든다. 세대가 처음 관측된 시각을 Last-Modified 로 쓴다
+    team_id = request.user.team_id
+    if feed_cache.is_enabled():
+        etag = _task_feed_etag(request, team_id, 'generation', feed_cache.get_generation(team_id))
+        return etag, _first_seen(etag)
+
+    if TaskFeedPagination().is_requested(request):
+        etag, modified = _page_validator(request, team_id, list(_task_feed_page_rows(request, team_id)))
+    else:
+        etag, modified = _stats_validator(request, team_id, _task_feed_stats(team_id))
+    return etag, max(value for value in modified + [_first_seen(etag)] if value)
+
+
+def _team_list_validators(request):
+    snapshot = team_directory.snapshot()
+    etag = _digest('teams', request.accepted_media_type, sorted(snapshot['teams'].items()))
+    return etag, snapshot['loaded_at']
+
+
+async def atask_feed_validators(request):
+    team_id = request.user.team_id
+    if feed_cache.is_enabled():
+        etag = _task_feed_etag(request, team_id, 'generation', await feed_cache.aget_generation(team_id))
+        return etag, await _afirst_seen(etag)
+
+    if TaskFeedPagination().is_requested(request):
+        rows = [row async for row in _task_feed_page_rows(request, team_id)]
+        etag, modified = _page_validator(request, team_id, rows)
+    else:
+        stats = await _task_feed_rows(team_id).aaggregate(**TASK_FEED_AGGREGATES)
+        etag, modified = _stats_validator(request, team_id, stats)
+    first_seen = await _afirst_seen(etag)
+    return etag, max(value for value in modified + [first_seen] if value)
+
+
+async def ateam_list_validators(request):
+    snapshot = await team_directory.asnapshot()
+    etag = _digest('teams', request.accepted_media_type, sorted(snapshot['teams'].items()))
+    return etag, snapshot['loaded_at']
+
+
+async def acondition(request, validators, build):
+    # async 뷰용 condition 데코레이터. 검증값이 같으면 본문을 만들지 않고 304/412 를 돌려준다
+    etag, last_modified = await validators(request)
+    etag = quote_etag(etag)
+    last_modified = timegm(last_modified.utctimetuple())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = await build()
+
+    if request.method in ('GET', 'HEAD'):
+        if not response.has_header('Last-Modified'):
+            response.headers['Last-Modified'] = http_date(last_modified)
+        response.headers.setdefault('ETag', etag)
+    return response
+
+
+def task_feed_etag(request, *args, **kwargs):
+    return _memoize(request, 'task_feed', _task_feed_validators)[0]
+
+
+def task_feed_last_modified(request, *args, **kwargs):
+    return _memoize(request, 'task_feed', _task_feed_validators)[1]
+
+
+def team_list_etag(request, *args, **kwargs):
+    return _memoize(request, 'team_list', _team_list_validators)[0]
+
+
+def team_list_last_modified(request, *args, **kwargs):
+    return _memoize(request, 'team_list', _team_list_validators)[1]
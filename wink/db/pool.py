@@ -0,0 +1,129 @@
+import threading
+import time
+from collections import deque
+
+from django.db import OperationalError
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN
+
+
+class PoolTimeout(OperationalError):
+    # POOL['TIMEOUT'] 안에 빈 연결을 얻지 못함
+    pass
+
+
+class ConnectionPool:
+    # 프로세스 내 DB 연결 풀. 최대 max_size 개까지 만들고, 모두 사용 중이면 timeout 초까지 기다린다
+    # 오래된 연결(max_lifetime 초 초과)과 끊어진 연결은 돌려받을 때/꺼낼 때 버린다
+    # health_check_idle 초 넘게 쉬던 연결은 꺼낼 때 SELECT 1 로 살아 있는지 확인한다
+    # (서버 재시작/유휴 연결 종료로 끊긴 연결은 실제로 쿼리를 보내기 전까지 상태가 바뀌지 않는다)
+    def __init__(self, max_size=10, timeout=5, max_lifetime=3600, health_check_idle=30):
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_lifetime = max_lifetime
+        self.health_check_idle = health_check_idle
+        self._idle = deque()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._created_at = {}
+        self._released_at = {}
+        self.counters = {'created': 0, 'reused': 0, 'discarded': 0, 'waits': 0, 'timeouts': 0, 'in_use': 0, 'health_checks': 0}
+
+    def acquire(self, connect):
+        # 빈 연결을 돌려준다. 없으면 connect() 로 새로 만든다
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.counters['waits'] += 1
+            if not self._slots.acquire(timeout=self.timeout):
+                with self._lock:
+                    self.counters['timeouts'] += 1
+                raise PoolTimeout(f'DB 연결 풀({self.max_size}개)에서 {self.timeout}초 안에 연결을 얻지 못했습니다.')
+
+        try:
+            connection = self._pop_idle()
+            if connection is None:
+                connection = connect()
+                with self._lock:
+                    self._created_at[id(connection)] = time.monotonic()
+                    self.counters['created'] += 1
+                    self.counters['in_use'] += 1
+            else:
+                with self._lock:
+                    self.counters['reused'] += 1
+                    self.counters['in_use'] += 1
+        except BaseException:
+            self._slots.release()
+            raise
+        return connection
+
+    def release(self, connection):
+        # Django 가 연결을 닫을 때 호출. 쓸 수 있는 연결은 트랜잭션을 정리해 풀에 돌려준다
+        with self._lock:
+            self.counters['in_use'] -= 1
+        try:
+            if self._usable(connection):
+                if connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                    connection.rollback()
+                with self._lock:
+                    self._released_at[id(connection)] = time.monotonic()
+                    self._idle.append(connection)
+                return
+            self._discard(connection)
+        except Exception:
+            self._discard(connection)
+        finally:
+            self._slots.release()
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for connection in idle:
+            self._discard(connection)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            stats['idle'] = len(self._idle)
+        stats['max_size'] = self.max_size
+        return stats
+
+    def _pop_idle(self):
+        while True:
+            with self._lock:
+                if not self._idle:
+                    return None
+                connection = self._idle.pop()
+                idle_for = time.monotonic() - self._released_at.pop(id(connection), 0)
+            if self._usable(connection) and (idle_for <= self.health_check_idle or self._alive(connection)):
+                return connection
+            self._discard(connection)
+
+    def _alive(self, connection):
+        with self._lock:
+            self.counters['health_checks'] += 1
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+            if connection.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                connection.rollback()
+        except Exception:
+            return False
+        return True
+
+    def _usable(self, connection):
+        if connection.closed:
+            return False
+        created_at = self._created_at.get(id(connection))
+        if created_at is not None and time.monotonic() - created_at > self.max_lifetime:
+            return False
+        # 서버와의 연결이 끊기면 TRANSACTION_STATUS_UNKNOWN
+        return connection.get_transaction_status() != TRANSACTION_STATUS_UNKNOWN
+
+    def _discard(self, connection):
+        with self._lock:
+            self._created_at.pop(id(connection), None)
+            self._released_at.pop(id(connection), None)
+            self.counters['discarded'] += 1
+        try:
+            connection.close()
+        except Exception:
+            pass
@@ -0,0 +1,69 @@
+import threading
+
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgreSQLDatabaseWrapper
+from django.db.backends.postgresql.creation import DatabaseCreation as PostgreSQLDatabaseCreation
+from django.db.backends.postgresql.psycopg_any import IsolationLevel
+
+from wink.db.pool import ConnectionPool
+
+# (DB 별칭, 접속 대상) 별 연결 풀 (프로세스 안의 모든 스레드가 공유)
+# 테스트 DB 생성처럼 같은 별칭으로 다른 DB에 접속하는 경우가 있어 접속 대상도 키에 넣는다
+pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(alias, settings_dict):
+    key = (alias, settings_dict['NAME'], settings_dict['USER'], settings_dict['HOST'], settings_dict['PORT'])
+    with _pools_lock:
+        pool = pools.get(key)
+        if pool is None:
+            options = settings_dict.get('POOL', {})
+            pool = pools[key] = ConnectionPool(
+                max_size=options.get('MAX_SIZE', 10),
+                timeout=options.get('TIMEOUT', 5),
+                max_lifetime=options.get('MAX_LIFETIME', 3600),
+                health_check_idle=options.get('HEALTH_CHECK_IDLE', 30),
+            )
+    return pool
+
+
+def close_pools(database_name=None):
+    # 풀에 남아 있는 유휴 연결을 닫는다 (테스트 DB 삭제 전 등)
+    with _pools_lock:
+        targets = [pool for key, pool in pools.items() if database_name in (None, key[1])]
+    for pool in targets:
+        pool.close_all()
+
+
+def pool_stats():
+    return {f'{key[0]}:{key[1]}': pool.stats() for key, pool in pools.items()}
+
+
+class DatabaseCreation(PostgreSQLDatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # 유휴 연결이 남아 있으면 DROP DATABASE 가 실패한다
+        close_pools(test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(PostgreSQLDatabaseWrapper):
+    # PostgreSQL 백엔드와 같고, 연결을 열고 닫는 대신 풀에서 빌리고 돌려준다
+    # 요청이 끝나 Django 가 연결을 닫으면(CONN_MAX_AGE=0) 연결이 풀로 돌아간다
+    creation_class = DatabaseCreation
+    @property
+    def pool(self):
+        return get_pool(self.alias, self.settings_dict)
+
+    def get_new_connection(self, conn_params):
+        connection = self.pool.acquire(lambda: super(DatabaseWrapper, self).get_new_connection(conn_params))
+        # 재사용한 연결이면 부모의 get_new_connection 이 하던 격리 수준 설정을 대신한다
+        self.isolation_level = IsolationLevel(
+            self.settings_dict['OPTIONS'].get('isolation_level', IsolationLevel.READ_COMMITTED)
+        )
+        return connection
+
+    def _close(self):
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                self.pool.release(self.connection)
@@ -0,0 +1,95 @@
+import csv
+import io
+import json
+import zlib
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from wink.models import TaskTeamVisibility
+from wink.serializers import TaskSerializer
+
+EXPORT_FORMATS = {
+    'ndjson': ('application/x-ndjson', 'ndjson'),
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+}
+# CSV 는 업무 한 건이 한 행이고, 하위 업무 목록은 JSON 문자열 컬럼 하나로 내보낸다
+CSV_FIELDS = [
+    'id', 'team', 'create_user', 'title', 'content', 'is_complete', 'completed_date',
+    'created_at', 'modified_at', 'subtask_total', 'subtask_open', 'subtasks',
+]
+
+
+def iter_team_tasks(team_id, chunk_size=None):
+    # 서버 측 커서로 chunk_size 건씩 읽고, 하위 업무도 chunk 마다 한 번에 prefetch 한다
+    chunk_size = chunk_size or getattr(settings, 'TASK_EXPORT_CHUNK_SIZE', 1000)
+    feed = TaskTeamVisibility.objects.feed(team_id).order_by('-created_at', '-task_id')
+    for visibility in feed.iterator(chunk_size=chunk_size):
+        yield visibility.task
+
+
+def _ndjson_lines(tasks):
+    for task in tasks:
+        yield json.dumps(TaskSerializer(task).data, ensure_ascii=False) + '\n'
+
+
+def _csv_lines(tasks):
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=CSV_FIELDS, extrasaction='ignore')
+    writer.writeheader()
+    for task in tasks:
+        data = TaskSerializer(task).data
+        data['subtasks'] = json.dumps(data['subtasks'], ensure_ascii=False)
+        writer.writerow(data)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+def _batched(lines, batch_size):
+    # 행마다 write 하지 않도록 batch_size 행씩 묶어 bytes 로 내보낸다
+    batch = []
+    for line in lines:
+        if line:
+            batch.append(line)
+        if len(batch) >= batch_size:
+            yield ''.join(batch).encode('utf-8')
+            batch = []
+    if batch:
+        yield ''.join(batch).encode('utf-8')
+
+
+def _gzipped(chunks):
+    compressor = zlib.compressobj(wbits=31)
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+def export_team_tasks(team_id, output='ndjson', compress=False, chunk_size=None):
+    # 팀에게 보이는 업무를 bytes chunk 로 내보내는 generator (StreamingHttpResponse / 파일 쓰기용)
+    chunk_size = chunk_size or getattr(settings, 'TASK_EXPORT_CHUNK_SIZE', 1000)
+    lines = _csv_lines if output == 'csv' else _ndjson_lines
+    chunks = _batched(lines(iter_team_tasks(team_id, chunk_size)), chunk_size)
+    return _gzipped(chunks) if compress else chunks
+
+
+async def aiter_chunks(chunks):
+    # asgi 용: StreamingHttpResponse 는 sync iterator 를 asgi 에서 sync_to_async(list) 로 모두 읽은 뒤에 보내므로
+    # chunk 하나씩 sync_to_async 로 진행시켜 바로 내려보낸다 (같은 요청의 호출은 같은 스레드/연결에서 실행된다)
+    chunks = iter(chunks)
+    done = object()
+    try:
+        while True:
+            chunk = await sync_to_async(next)(chunks, done)
+            if chunk is done:
+                return
+            yield chunk
+    finally:
+        # 클라이언트가 끊어도 서버 측 커서를 닫는다
+        close = getattr(chunks, 'close', None)
+        if close is not None:
+            await sync_to_async(close)()
@@ -0,0 +1,173 @@
+import asyncio
+import hashlib
+import json
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from rest_framework.response import Response
+
+# 팀별 업무 리스트 응답(JSON 바이트) 캐시
+# 키에 팀별 세대(generation) 번호를 넣어 두고, 팀에게 보이는 업무가 바뀌면 세대를 올려 한 번에 무효화한다
+GENERATION_KEY = 'wink:feed:generation:{team_id}'
+RESPONSE_KEY = 'wink:feed:response:{team_id}:{generation}:{variant}'
+
+counters = {'hits': 0, 'misses': 0, 'waits': 0, 'fallbacks': 0}
+
+
+def is_enabled():
+    return getattr(settings, 'TASK_FEED_CACHE_TIMEOUT', 0) > 0
+
+
+def _new_generation():
+    # 세대 키가 캐시에서 밀려나도 예전 세대 번호와 겹치지 않도록 시각 기반으로 시작한다
+    return time.time_ns() // 1000
+
+
+def get_generation(team_id):
+    key = GENERATION_KEY.format(team_id=team_id)
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, _new_generation(), None)
+        generation = cache.get(key)
+    return generation
+
+
+async def aget_generation(team_id):
+    key = GENERATION_KEY.format(team_id=team_id)
+    generation = await cache.aget(key)
+    if generation is None:
+        await cache.aadd(key, _new_generation(), None)
+        generation = await cache.aget(key)
+    return generation
+
+
+def _bump(team_ids):
+    for team_id in team_ids:
+        key = GENERATION_KEY.format(team_id=team_id)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _new_generation(), None)
+
+
+def invalidate_teams(team_ids):
+    # 커밋 전에 다른 요청이 이전 데이터로 새 세대 캐시를 채울 수 있으므로 커밋 후에도 한 번 더 올린다
+    # 캐시를 쓰지 않으면 team_ids(쿼리셋일 수 있다)를 평가하지 않는다
+    if not is_enabled():
+        return
+    team_ids = {team_id for team_id in team_ids if team_id is not None}
+    if not team_ids:
+        return
+    _bump(team_ids)
+    transaction.on_commit(lambda: _bump(team_ids))
+
+
+def request_variant(request, paginated):
+    # 같은 팀이라도 응답 본문이 달라지는 요청 요소
+    # - 페이지 모드: next/previous 가 요청 절대 URL(스킴/호스트/경로/쿼리)로 만들어진다
+    # - 미디어 타입: ; indent=4 같은 파라미터에 따라 렌더링 결과가 다르다
+    return (request.build_absolute_uri() if paginated else None, request.accepted_media_type)
+
+
+def _variant_digest(variant):
+    return hashlib.md5(repr(variant).encode('utf-8'), usedforsecurity=False).hexdigest()
+
+
+def response_key(team_id, variant):
+    return RESPONSE_KEY.format(team_id=team_id, generation=get_generation(team_id), variant=_variant_digest(variant))
+
+
+def get_or_build(team_id, variant, build):
+    # 캐시가 비어 있을 때 동시에 들어온 요청 중 하나만 응답을 만들고(cache.add 잠금), 나머지는 잠시 기다린다
+    key = response_key(team_id, variant)
+    body = cache.get(key)
+    if body is not None:
+        counters['hits'] += 1
+        return body
+
+    counters['misses'] += 1
+    lock_key = f'{key}:lock'
+    if cache.add(lock_key, 1, getattr(settings, 'TASK_FEED_CACHE_LOCK_TIMEOUT', 10)):
+        try:
+            body = build()
+            cache.set(key, body, settings.TASK_FEED_CACHE_TIMEOUT)
+        finally:
+            cache.delete(lock_key)
+        return body
+
+    counters['waits'] += 1
+    deadline = time.monotonic() + getattr(settings, 'TASK_FEED_CACHE_WAIT', 2)
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        body = cache.get(key)
+        if body is not None:
+            return body
+
+    # 응답을 만들던 요청이 너무 오래 걸리면 캐시 없이 직접 만든다
+    counters['fallbacks'] += 1
+    return build()
+
+
+async def aget_or_build(team_id, variant, build):
+    # get_or_build 의 async 버전. build 는 코루틴 함수이고, 기다리는 동안 이벤트 루프를 막지 않는다
+    key = RESPONSE_KEY.format(
+        team_id=team_id, generation=await aget_generation(team_id), variant=_variant_digest(variant),
+    )
+    body = await cache.aget(key)
+    if body is not None:
+        counters['hits'] += 1
+        return body
+
+    counters['misses'] += 1
+    lock_key = f'{key}:lock'
+    if await cache.aadd(lock_key, 1, getattr(settings, 'TASK_FEED_CACHE_LOCK_TIMEOUT', 10)):
+        try:
+            body = await build()
+            await cache.aset(key, body, settings.TASK_FEED_CACHE_TIMEOUT)
+        finally:
+            await cache.adelete(lock_key)
+        return body
+
+    counters['waits'] += 1
+    deadline = time.monotonic() + getattr(settings, 'TASK_FEED_CACHE_WAIT', 2)
+    while time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+        body = await cache.aget(key)
+        if body is not None:
+            return body
+
+    counters['fallbacks'] += 1
+    return await build()
+
+
+def stats():
+    return dict(counters)
+
+
+class CachedResponse(Response):
+    # 캐시에 저장된 렌더링 결과를 그대로 내려보내는 응답. data는 필요할 때(테스트 등)만 다시 파싱한다
+    def __init__(self, body, **kwargs):
+        self._data = None
+        self.body = body
+        super().__init__(**kwargs)
+
+    @property
+    def data(self):
+        if self._data is None and self.body is not None:
+            self._data = json.loads(self.body)
+        return self._data
+
+    @data.setter
+    def data(self, value):
+        self._data = value
+
+    @property
+    def rendered_content(self):
+        renderer = self.accepted_renderer
+        content_type = self.content_type or renderer.media_type
+        if self.content_type is None and renderer.charset:
+            content_type = f'{renderer.media_type}; charset={renderer.charset}'
+        self['Content-Type'] = content_type
+        return self.body
@@ -0,0 +1,122 @@
+import base64
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import Argon2PasswordHasher, ScryptPasswordHasher, check_password, make_password
+
+from wink.models import User
+
+
+def _params(algorithm):
+    return getattr(settings, 'PASSWORD_HASHER_PARAMS', {}).get(algorithm, {})
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    # 비용 파라미터를 settings.PASSWORD_HASHER_PARAMS['scrypt'] 에서 읽는다
+    # 저장된 해시의 파라미터가 설정과 다르면 must_update 가 True 가 되어 로그인 시 다시 해시된다
+
+    @property
+    def work_factor(self):
+        return _params('scrypt').get('work_factor', ScryptPasswordHasher.work_factor)
+
+    @property
+    def block_size(self):
+        return _params('scrypt').get('block_size', ScryptPasswordHasher.block_size)
+
+    @property
+    def parallelism(self):
+        return _params('scrypt').get('parallelism', ScryptPasswordHasher.parallelism)
+
+    def encode(self, password, salt, n=None, r=None, p=None):
+        # 검증 시에는 저장된 해시의 파라미터로 계산하므로 메모리 한도도 그 파라미터로 정한다
+        # (OpenSSL 기본 한도 32MB를 넘는 work_factor 도 쓸 수 있도록 필요한 메모리(128·n·r)보다 넉넉하게 허용)
+        self._check_encode_args(password, salt)
+        n = n or self.work_factor
+        r = r or self.block_size
+        p = p or self.parallelism
+        hash_ = hashlib.scrypt(
+            password.encode(), salt=salt.encode(), n=n, r=r, p=p, maxmem=2 * 128 * n * r * (p + 1), dklen=64,
+        )
+        hash_ = base64.b64encode(hash_).decode('ascii').strip()
+        return '%s$%d$%s$%d$%d$%s' % (self.algorithm, n, salt, r, p, hash_)
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    # 비용 파라미터를 settings.PASSWORD_HASHER_PARAMS['argon2'] 에서 읽는다 (argon2-cffi 필요)
+
+    @property
+    def time_cost(self):
+        return _params('argon2').get('time_cost', Argon2PasswordHasher.time_cost)
+
+    @property
+    def memory_cost(self):
+        return _params('argon2').get('memory_cost', Argon2PasswordHasher.memory_cost)
+
+    @property
+    def parallelism(self):
+        return _params('argon2').get('parallelism', Argon2PasswordHasher.parallelism)
+
+
+class HashingBusy(Exception):
+    # 해시 작업 대기열이 가득 차 PASSWORD_HASH_QUEUE_TIMEOUT 안에 자리를 얻지 못함
+    pass
+
+
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def _get_pool():
+    # 해시 계산(CPU)을 PASSWORD_HASH_WORKERS 개 스레드로 제한해 로그인이 몰려도 다른 요청이 굶지 않게 한다
+    workers = getattr(settings, 'PASSWORD_HASH_WORKERS', 2)
+    queue_size = getattr(settings, 'PASSWORD_HASH_QUEUE_SIZE', 16)
+    with _pools_lock:
+        pool = _pools.get((workers, queue_size))
+        if pool is None:
+            executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='wink-password-hash')
+            pool = _pools[(workers, queue_size)] = (executor, threading.BoundedSemaphore(workers + queue_size))
+    return pool
+
+
+def run_hashing(fn, *args):
+    if getattr(settings, 'PASSWORD_HASH_WORKERS', 2) <= 0:
+        return fn(*args)
+
+    executor, slots = _get_pool()
+    if not slots.acquire(timeout=getattr(settings, 'PASSWORD_HASH_QUEUE_TIMEOUT', 5)):
+        raise HashingBusy()
+    try:
+        return executor.submit(fn, *args).result()
+    finally:
+        slots.release()
+
+
+def _check(raw_password, encoded):
+    # (일치 여부, 다시 해시해야 하는지). 선호 해셔/파라미터가 바뀌었으면 check_password 가 setter 를 호출한다
+    must_update = []
+    is_correct = check_password(raw_password, encoded, setter=lambda raw: must_update.append(True))
+    return is_correct, bool(must_update)
+
+
+def hash_password(raw_password):
+    return run_hashing(make_password, raw_password)
+
+
+def authenticate_user(email, raw_password):
+    # DB 조회/저장은 요청 스레드에서, 해시 계산만 스레드 풀에서 한다
+    user = User.objects.filter(email=email).first()
+    if user is None or not user.has_usable_password():
+        # 없는 사용자도 해시 한 번만큼 시간을 써서 응답 시간으로 가입 여부를 알 수 없게 한다
+        hash_password(raw_password)
+        return None
+
+    is_correct, must_update = run_hashing(_check, raw_password, user.password)
+    if not is_correct or not user.is_active:
+        return None
+
+    if must_update:
+        user.password = hash_password(raw_password)
+        user.save(update_fields=['password'])
+    return user
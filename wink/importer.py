@@ -0,0 +1,92 @@
+import json
+import logging
+from collections import namedtuple
+from itertools import islice
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+from wink.models import SubTask, Task
+from wink.serializers import TaskReqSerializer, TeamResolver, collect_team_ids
+from wink.signals import sync_task_visibility
+
+logger = logging.getLogger(__name__)
+
+# NDJSON 에서 JSON으로 읽지 못한 줄
+InvalidRow = namedtuple('InvalidRow', ['error'])
+
+
+def iter_ndjson(lines):
+    # 한 줄에 업무 하나씩 들어 있는 NDJSON 을 한 줄씩 읽는다 (빈 줄은 건너뛴다)
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            yield json.loads(line)
+        except ValueError as exc:
+            yield InvalidRow(f'JSON 형식이 아닙니다: {exc}')
+
+
+class TaskImporter:
+    # 업무 일괄 등록: chunk_size 건씩 검증하고, 검증을 통과한 업무/하위 업무를 chunk 마다 bulk_create 한다
+    # 잘못된 행은 건너뛰고 행 번호(1부터)와 오류를 모아 반환한다
+    def __init__(self, create_user_id, chunk_size=None):
+        self.create_user_id = create_user_id
+        self.chunk_size = chunk_size or getattr(settings, 'TASK_IMPORT_CHUNK_SIZE', 500)
+        # 팀 조회 결과는 import 전체에서 공유하고, chunk 마다 새로 등장한 팀만 한 번에 조회한다
+        self.team_resolver = TeamResolver()
+        self.created = 0
+        self.errors = []
+
+    def run(self, rows):
+        rows = iter(rows)
+        row_number = 0
+        while True:
+            chunk = list(islice(rows, self.chunk_size))
+            if not chunk:
+                break
+            self.import_chunk(chunk, first_row=row_number + 1)
+            row_number += len(chunk)
+        return {'total': row_number, 'created': self.created, 'failed': len(self.errors), 'errors': self.errors}
+
+    def import_chunk(self, chunk, first_row):
+        valid = []
+        self.team_resolver.add(collect_team_ids(chunk))
+        for row_number, row in enumerate(chunk, start=first_row):
+            if isinstance(row, InvalidRow):
+                self.errors.append({'row': row_number, 'errors': {'non_field_errors': [row.error]}})
+                continue
+            if not isinstance(row, dict):
+                self.errors.append({'row': row_number, 'errors': {'non_field_errors': ['업무는 JSON 객체여야 합니다.']}})
+                continue
+
+            serializer = TaskReqSerializer(data=row, context={'team_resolver': self.team_resolver})
+            if serializer.is_valid():
+                valid.append((row_number, serializer.validated_data))
+            else:
+                self.errors.append({'row': row_number, 'errors': serializer.errors})
+
+        if valid:
+            self.save_chunk(valid)
+
+    def save_chunk(self, valid):
+        # chunk 하나가 한 트랜잭션. 저장에 실패하면 그 chunk 의 행만 실패로 보고하고 다음 chunk 를 계속한다
+        try:
+            with transaction.atomic():
+                tasks, _ = Task.objects.create_with_subtasks(
+                    (
+                        Task(create_user_id=self.create_user_id, team_id=data['team_id'],
+                             title=data['title'], content=data['content']),
+                        [SubTask(team_id=subtask_data['team_id']) for subtask_data in data['subtasks']],
+                    )
+                    for _, data in valid
+                )
+                sync_task_visibility([task.id for task in tasks])
+        except DatabaseError:
+            logger.exception('업무 일괄 등록 chunk 저장 실패')
+            self.errors.extend(
+                {'row': row_number, 'errors': {'non_field_errors': ['업무를 저장하지 못했습니다.']}}
+                for row_number, _ in valid
+            )
+            return
+        self.created += len(tasks)
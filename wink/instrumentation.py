@@ -0,0 +1,262 @@
+import contextvars
+import json
+import logging
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger('wink.requests')
+
+# 히스토그램 구간 상한 (Prometheus 의 le 와 같은 의미, 마지막 구간은 +Inf)
+LATENCY_BUCKETS_MS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+_current = contextvars.ContextVar('wink_request_metrics', default=None)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = next((i for i, bound in enumerate(self.buckets) if value <= bound), len(self.buckets))
+        with self._lock:
+            self.counts[index] += 1
+            self.count += 1
+            self.sum += value
+
+    def snapshot(self):
+        # 누적 건수 {상한: 건수}. 마지막은 '+Inf'
+        with self._lock:
+            counts, total, count = list(self.counts), self.sum, self.count
+        cumulative = {}
+        running = 0
+        for bound, bucket_count in zip(self.buckets + ('+Inf',), counts):
+            running += bucket_count
+            cumulative[bound] = running
+        return {'buckets': cumulative, 'count': count, 'sum': total}
+
+
+# (지표 이름, 뷰 이름) -> Histogram. 샘플링된 요청만 기록한다
+histograms = {}
+_histograms_lock = threading.Lock()
+# (뷰 이름, 메서드, 상태 코드) -> 요청 수. 샘플링과 관계없이 모든 요청을 센다
+request_counts = {}
+
+HISTOGRAM_BUCKETS = {
+    'request_ms': LATENCY_BUCKETS_MS,
+    'db_ms': LATENCY_BUCKETS_MS,
+    'db_queries': QUERY_COUNT_BUCKETS,
+}
+
+
+def observe(metric, view_name, value):
+    key = (metric, view_name)
+    histogram = histograms.get(key)
+    if histogram is None:
+        with _histograms_lock:
+            histogram = histograms.setdefault(key, Histogram(HISTOGRAM_BUCKETS[metric]))
+    histogram.observe(value)
+
+
+def count_request(view_name, method, status_code):
+    key = (view_name, method, status_code)
+    with _histograms_lock:
+        request_counts[key] = request_counts.get(key, 0) + 1
+
+
+def stats():
+    # {뷰 이름: {지표 이름: 히스토그램 스냅샷}}
+    result = {}
+    for (metric, view_name), histogram in list(histograms.items()):
+        result.setdefault(view_name, {})[metric] = histogram.snapshot()
+    return result
+
+
+def reset():
+    with _histograms_lock:
+        histograms.clear()
+        request_counts.clear()
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.db_queries = 0
+        self.db_time = 0.0
+        # 'serialize', 'render' 등 구간별 누적 시간(초)
+        self.spans = {}
+
+    def record_query(self, execute, sql, params, many, context):
+        # 연결마다 등록된 모듈 함수 record_query 가 측정 중인 요청의 쿼리를 여기로 넘긴다
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_queries += 1
+            self.db_time += time.perf_counter() - started
+
+    def add_span(self, name, seconds):
+        self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+
+def current():
+    return _current.get()
+
+
+def record_query(execute, sql, params, many, context):
+    # 모든 연결에 한 번 등록해 두는 execute_wrapper. 측정 중인 요청(컨텍스트 변수)이 있을 때만 쿼리를 잰다
+    # asgi 에서는 ORM 이 sync_to_async 스레드의 연결로 실행되므로, 요청마다 현재 연결에 래퍼를 거는 대신
+    # 스레드로 전달되는 컨텍스트 변수로 요청을 찾는다
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    return metrics.record_query(execute, sql, params, many, context)
+
+
+@receiver(connection_created)
+def install_query_recorder(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, record_query)
+
+
+@contextmanager
+def span(name):
+    # 현재 요청이 측정 대상이면 블록 실행 시간을 name 구간에 더한다. 아니면 아무것도 하지 않는다
+    metrics = _current.get()
+    if metrics is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.add_span(name, time.perf_counter() - started)
+
+
+def _view_name(request):
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unresolved'
+    return match.view_name or match._func_path
+
+
+def _server_timing(total_ms, metrics):
+    entries = [f'total;dur={total_ms:.1f}']
+    if metrics is not None:
+        entries.append(f'db;dur={metrics.db_time * 1000:.1f};desc="{metrics.db_queries} queries"')
+        entries += [f'{name};dur={seconds * 1000:.1f}' for name, seconds in metrics.spans.items()]
+    return ', '.join(entries)
+
+
+class RequestMetricsMiddleware:
+    # 요청마다 뷰 이름, 전체 시간, DB 쿼리 수/시간, 직렬화/렌더링 시간을 측정한다
+    # REQUEST_METRICS_SAMPLE_RATE 비율의 요청만 쿼리를 측정하고 히스토그램/로그에 남긴다
+    # 느린 요청(REQUEST_METRICS_SLOW_MS, REQUEST_METRICS_SLOW_QUERIES 초과)은 샘플링과 관계없이 WARNING 으로 남긴다
+    # wsgi/asgi 모두에서 동작한다. asgi 에서는 요청을 async_to_sync 로 감싸지 않고 그대로 await 한다
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            return self.get_response(request)
+
+        started = time.perf_counter()
+        metrics = self.sample()
+        if metrics is None:
+            response = self.get_response(request)
+        else:
+            with self.measure(metrics):
+                response = self.get_response(request)
+        return self.finish(request, response, started, metrics)
+
+    async def __acall__(self, request):
+        if not getattr(settings, 'REQUEST_METRICS_ENABLED', True):
+            return await self.get_response(request)
+
+        started = time.perf_counter()
+        metrics = self.sample()
+        if metrics is None:
+            response = await self.get_response(request)
+        else:
+            # 컨텍스트 변수는 sync_to_async 로 실행되는 뷰/ORM 코드에도 전달된다
+            with self.measure(metrics):
+                response = await self.get_response(request)
+        return self.finish(request, response, started, metrics)
+
+    def sample(self):
+        if random.random() < getattr(settings, 'REQUEST_METRICS_SAMPLE_RATE', 1.0):
+            return RequestMetrics()
+        return None
+
+    @contextmanager
+    def measure(self, metrics):
+        # 쿼리는 연결마다 등록된 record_query 가 컨텍스트 변수의 metrics 에 기록한다
+        token = _current.set(metrics)
+        try:
+            yield
+        finally:
+            _current.reset(token)
+
+    def finish(self, request, response, started, metrics):
+        total_ms = (time.perf_counter() - started) * 1000
+        if getattr(settings, 'REQUEST_METRICS_SERVER_TIMING', True):
+            response['Server-Timing'] = _server_timing(total_ms, metrics)
+        self.record(request, response, total_ms, metrics)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF Response 는 뷰가 끝난 뒤 렌더링(JSON 인코딩)되므로 그 시간을 따로 잰다
+        metrics = _current.get()
+        if metrics is not None:
+            started = time.perf_counter()
+            response.add_post_render_callback(lambda rendered: metrics.add_span('render', time.perf_counter() - started))
+        return response
+
+    def record(self, request, response, total_ms, metrics):
+        view_name = _view_name(request)
+        count_request(view_name, request.method, response.status_code)
+        slow_queries = getattr(settings, 'REQUEST_METRICS_SLOW_QUERIES', 50)
+        is_slow = total_ms > getattr(settings, 'REQUEST_METRICS_SLOW_MS', 1000) or (
+            metrics is not None and metrics.db_queries > slow_queries
+        )
+        if metrics is None and not is_slow:
+            return
+
+        entry = {
+            'event': 'request',
+            'view': view_name,
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'duration_ms': round(total_ms, 2),
+        }
+        if metrics is not None:
+            observe('request_ms', view_name, total_ms)
+            observe('db_ms', view_name, metrics.db_time * 1000)
+            observe('db_queries', view_name, metrics.db_queries)
+            entry.update({
+                'db_queries': metrics.db_queries,
+                'db_ms': round(metrics.db_time * 1000, 2),
+                **{f'{name}_ms': round(seconds * 1000, 2) for name, seconds in metrics.spans.items()},
+            })
+        entry['slow'] = is_slow
+        logger.log(logging.WARNING if is_slow else logging.INFO, json.dumps(entry, ensure_ascii=False))
@@ -0,0 +1,96 @@
+import json
+import statistics
+import threading
+import time
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.backends.postgresql.base import DatabaseWrapper as PostgreSQLDatabaseWrapper
+from django.core.management.base import BaseCommand, CommandError
+
+from wink.db.postgresql_pool.base import DatabaseWrapper as PooledDatabaseWrapper, close_pools
+
+MODES = ('new', 'persistent', 'pool')
+
+
+class Command(BaseCommand):
+    help = 'DB 연결 방식(요청마다 새 연결 / 지속 연결 / 연결 풀)별 초당 요청 처리량을 측정합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', action='append', choices=MODES, default=None, help='측정할 연결 방식 (기본: 전부)')
+        parser.add_argument('--requests', type=int, default=2000, help='방식별 전체 요청 수')
+        parser.add_argument('--threads', type=int, default=8, help='동시에 요청하는 스레드 수')
+        parser.add_argument('--pool-size', type=int, default=4, help='pool 방식의 최대 연결 수')
+        parser.add_argument('--query', default='SELECT 1', help='요청마다 실행할 SQL')
+        parser.add_argument('--json', action='store_true', help='결과를 JSON 으로 출력')
+
+    def handle(self, *args, **options):
+        results = [self.bench(mode, options) for mode in (options['mode'] or MODES)]
+        if options['json']:
+            self.stdout.write(json.dumps(results, indent=2))
+            return
+        for result in results:
+            self.stdout.write(
+                f"{result['mode']:<11} {result['requests_per_sec']:>9.1f} req/s  "
+                f"p50 {result['p50_ms']:>7.2f} ms  p95 {result['p95_ms']:>7.2f} ms  "
+                f"connections {result['connections']}"
+            )
+
+    def make_wrapper(self, mode, pool_size):
+        # 요청 처리 스레드 하나의 DB 연결. 설정은 default DB 를 그대로 쓰고 연결 방식만 바꾼다
+        settings_dict = dict(connections[DEFAULT_DB_ALIAS].settings_dict)
+        settings_dict['CONN_MAX_AGE'] = 600 if mode == 'persistent' else 0
+        if mode == 'pool':
+            settings_dict['POOL'] = {'MAX_SIZE': pool_size, 'TIMEOUT': 30}
+            return PooledDatabaseWrapper(settings_dict, alias=f'bench_pool_{pool_size}')
+        return PostgreSQLDatabaseWrapper(settings_dict, alias='bench')
+
+    def bench(self, mode, options):
+        per_thread = options['requests'] // options['threads']
+        latencies = []
+        opened = []
+        lock = threading.Lock()
+
+        def worker():
+            wrapper = self.make_wrapper(mode, options['pool_size'])
+            thread_latencies = []
+            connects = 0
+            for _ in range(per_thread):
+                started = time.perf_counter()
+                # Django 요청 시작/종료 시그널에서 하는 close_old_connections() 와 같은 처리
+                wrapper.close_if_unusable_or_obsolete()
+                if wrapper.connection is None:
+                    connects += 1
+                with wrapper.cursor() as cursor:
+                    cursor.execute(options['query'])
+                    cursor.fetchall()
+                wrapper.close_if_unusable_or_obsolete()
+                thread_latencies.append(time.perf_counter() - started)
+            wrapper.close()
+            with lock:
+                latencies.extend(thread_latencies)
+                opened.append(connects)
+
+        threads = [threading.Thread(target=worker) for _ in range(options['threads'])]
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        connections_opened = sum(opened)
+        if mode == 'pool':
+            close_pools(connections[DEFAULT_DB_ALIAS].settings_dict['NAME'])
+        if len(latencies) < 2:
+            raise CommandError(f'{mode}: 요청이 실패해 측정하지 못했습니다.')
+        quantiles = statistics.quantiles(latencies, n=100)
+        return {
+            'mode': mode,
+            'threads': options['threads'],
+            'requests': len(latencies),
+            'requests_per_sec': len(latencies) / elapsed,
+            'p50_ms': quantiles[49] * 1000,
+            'p95_ms': quantiles[94] * 1000,
+            # new: 요청마다 새로 접속, persistent: 스레드마다 한 번, pool: 풀에서 빌린 횟수
+            'connections': connections_opened,
+        }
@@ -0,0 +1,189 @@
+import json
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import override_settings
+
+from wink import seeding
+from wink.authentication import WinkRefreshToken
+from wink.models import Task, Team, User
+
+SCENARIOS = ('task-list', 'task-list-page', 'task-create', 'task-patch', 'subtask-patch', 'subtask-delete', 'login')
+# 미리 만든 업무가 필요한 시나리오
+NEEDS_TASKS = {'task-patch', 'subtask-patch', 'subtask-delete'}
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = '업무 리스트/생성/수정, 하위 업무 수정/삭제, 로그인 API 를 프로세스 안에서 호출해 처리량과 지연 시간, 요청당 쿼리 수를 측정합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--scenario', action='append', choices=SCENARIOS, default=None, help='측정할 API (기본: 전부)')
+        parser.add_argument('--requests', type=int, default=200, help='API 별 요청 수')
+        parser.add_argument('--concurrency', type=int, default=1, help='동시에 요청하는 스레드 수')
+        parser.add_argument('--warmup', type=int, default=10, help='조회 API 측정 전 버리는 요청 수')
+        parser.add_argument('--page-size', type=int, default=20, help='task-list-page 의 page_size')
+        parser.add_argument('--user', default=None, help='요청 사용자 이메일 (기본: seed_bench 로 만든 첫 사용자)')
+        parser.add_argument('--password', default=seeding.PASSWORD, help='login 시나리오에 쓸 비밀번호')
+        parser.add_argument('--no-feed-cache', action='store_true', help='업무 리스트 응답 캐시를 끄고 측정')
+        parser.add_argument('--json', action='store_true', help='결과를 JSON 으로 출력')
+
+    def handle(self, *args, **options):
+        if options['requests'] < 2 or options['concurrency'] < 1:
+            raise CommandError('--requests 는 2 이상, --concurrency 는 1 이상이어야 합니다.')
+
+        self.options = options
+        self.user = self.get_user(options['user'])
+        self.other_team_id = Team.objects.exclude(id=self.user.team_id).values_list('id', flat=True).first()
+        self.headers = {'HTTP_AUTHORIZATION': f'Bearer {WinkRefreshToken.for_user(self.user).access_token}'}
+        self.created_task_ids = []
+
+        scenarios = options['scenario'] or SCENARIOS
+        # 프로세스 안에서 호출하므로 테스트 클라이언트 호스트를 허용한다
+        overrides = {'ALLOWED_HOSTS': ['*']}
+        if options['no_feed_cache']:
+            overrides['TASK_FEED_CACHE_TIMEOUT'] = 0
+        try:
+            with override_settings(**overrides):
+                fixtures = self.create_fixtures(options['requests']) if NEEDS_TASKS & set(scenarios) else []
+                results = [self.bench(name, fixtures) for name in scenarios]
+        finally:
+            # 측정 중 만든 업무는 지워 다음 측정과 데이터 크기를 같게 한다
+            Task.objects.filter(id__in=self.created_task_ids).delete()
+
+        report = {
+            'dataset': {
+                'teams': Team.objects.count(),
+                'users': User.objects.count(),
+                'tasks': Task.objects.count(),
+                'user_tasks_visible': self.user.team.task_visibilities.count() if self.user.team_id else 0,
+            },
+            'concurrency': options['concurrency'],
+            'feed_cache': not options['no_feed_cache'],
+            'results': results,
+        }
+        if options['json']:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+            return
+        for result in results:
+            self.stdout.write(
+                f"{result['scenario']:<15} {result['requests_per_sec']:>8.1f} req/s  "
+                f"p50 {result['p50_ms']:>8.2f} ms  p95 {result['p95_ms']:>8.2f} ms  p99 {result['p99_ms']:>8.2f} ms  "
+                f"queries {result['queries_per_request']:>5.1f}  errors {result['errors']}"
+            )
+
+    def get_user(self, email):
+        users = User.objects.select_related('team')
+        user = users.filter(email=email).first() if email else (
+            users.filter(email__endswith=seeding.USER_EMAIL_SUFFIX).order_by('id').first()
+        )
+        if user is None:
+            raise CommandError('요청 사용자가 없습니다. seed_bench 를 먼저 실행하거나 --user 를 지정하세요.')
+        return user
+
+    def task_body(self, number):
+        subtasks = [{'team_id': self.user.team_id}, {'team_id': self.user.team_id}]
+        if self.other_team_id is not None:
+            subtasks.append({'team_id': self.other_team_id})
+        return {'task': {
+            'team_id': self.user.team_id,
+            'title': f'벤치마크 요청 업무 {number}',
+            'content': '벤치마크 중 생성된 업무입니다.',
+            'subtasks': subtasks,
+        }}
+
+    def create_fixtures(self, count):
+        # (업무 id, 완료를 바꿀 하위 업무 id, 삭제할 하위 업무 id). 측정하지 않는 준비 단계
+        client = Client()
+        fixtures = []
+        for number in range(count):
+            response = client.post('/v1/api/tasks', self.task_body(number), content_type='application/json', **self.headers)
+            if response.status_code != 201:
+                raise CommandError(f'준비용 업무를 만들지 못했습니다: {response.status_code} {response.content[:200]!r}')
+            task = response.json()
+            self.created_task_ids.append(task['id'])
+            fixtures.append((task['id'], task['subtasks'][0]['id'], task['subtasks'][1]['id']))
+        return fixtures
+
+    def request_for(self, name, index, fixtures):
+        # (메서드, 경로, 본문)
+        if name == 'task-list':
+            return 'get', '/v1/api/tasks', None
+        if name == 'task-list-page':
+            return 'get', f"/v1/api/tasks?page_size={self.options['page_size']}", None
+        if name == 'task-create':
+            return 'post', '/v1/api/tasks', self.task_body(index)
+        if name == 'task-patch':
+            task_id = fixtures[index % len(fixtures)][0]
+            return 'patch', f'/v1/api/tasks/{task_id}', {'task': {
+                'team_id': self.user.team_id, 'title': f'수정된 업무 {index}', 'content': '수정된 내용',
+            }}
+        if name == 'subtask-patch':
+            subtask_id = fixtures[index % len(fixtures)][1]
+            return 'patch', f'/v1/api/subtasks/{subtask_id}', {'is_complete': index % 2 == 0}
+        if name == 'subtask-delete':
+            return 'delete', f'/v1/api/subtasks/{fixtures[index][2]}', None
+        return 'post', '/v1/api/login', {'email': self.user.email, 'password': self.options['password']}
+
+    def bench(self, name, fixtures):
+        options = self.options
+        local = threading.local()
+
+        def call(index):
+            client = getattr(local, 'client', None)
+            if client is None:
+                client = local.client = Client()
+            method, path, body = self.request_for(name, index, fixtures)
+            headers = {} if name == 'login' else self.headers
+            counter = QueryCounter()
+            started = time.perf_counter()
+            with connection.execute_wrapper(counter):
+                if body is None:
+                    response = getattr(client, method)(path, **headers)
+                else:
+                    response = getattr(client, method)(path, body, content_type='application/json', **headers)
+            elapsed = time.perf_counter() - started
+            if name == 'task-create' and response.status_code == 201:
+                self.created_task_ids.append(response.json()['id'])
+            return elapsed, counter.count, response.status_code
+
+        if name in ('task-list', 'task-list-page'):
+            for index in range(options['warmup']):
+                call(index)
+
+        started = time.perf_counter()
+        if options['concurrency'] == 1:
+            samples = [call(index) for index in range(options['requests'])]
+        else:
+            with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+                samples = list(executor.map(call, range(options['requests'])))
+        elapsed = time.perf_counter() - started
+
+        latencies = [sample[0] for sample in samples]
+        quantiles = statistics.quantiles(latencies, n=100, method='inclusive')
+        errors = [status_code for _, _, status_code in samples if status_code >= 400]
+        return {
+            'scenario': name,
+            'requests': len(samples),
+            'errors': len(errors),
+            'error_statuses': sorted(set(errors)),
+            'requests_per_sec': len(samples) / elapsed,
+            'p50_ms': quantiles[49] * 1000,
+            'p95_ms': quantiles[94] * 1000,
+            'p99_ms': quantiles[98] * 1000,
+            'queries_per_request': statistics.mean(sample[1] for sample in samples),
+            'max_queries': max(sample[1] for sample in samples),
+        }
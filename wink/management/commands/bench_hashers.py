@@ -0,0 +1,118 @@
+import json
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import PBKDF2PasswordHasher
+from django.core.management.base import BaseCommand, CommandError
+from django.test.utils import override_settings
+
+from wink.hashers import HashingBusy, TunedArgon2PasswordHasher, TunedScryptPasswordHasher, run_hashing
+
+HASHERS = {
+    'scrypt': TunedScryptPasswordHasher,
+    'argon2': TunedArgon2PasswordHasher,
+    'pbkdf2': PBKDF2PasswordHasher,
+}
+
+
+def parse_variant(value):
+    # 'scrypt' 또는 'scrypt:work_factor=32768,block_size=8'
+    name, _, raw_params = value.partition(':')
+    if name not in HASHERS:
+        raise CommandError(f'지원하지 않는 해셔입니다: {name} ({", ".join(HASHERS)})')
+    params = {}
+    for pair in filter(None, raw_params.split(',')):
+        key, _, number = pair.partition('=')
+        try:
+            params[key] = int(number)
+        except ValueError:
+            raise CommandError(f'파라미터 값은 정수여야 합니다: {pair}')
+    return name, params
+
+
+class Command(BaseCommand):
+    help = (
+        '비밀번호 해셔 설정별 초당 로그인(비밀번호 검증) 처리량을 측정합니다. '
+        '로그인 API 와 같이 run_hashing(PASSWORD_HASH_WORKERS 스레드 풀과 대기열)을 거치므로 '
+        '지연 시간에는 풀 대기 시간이 포함되고, 대기열이 가득 차 거절된 요청(busy)도 셉니다.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--variant', action='append', default=None,
+            help="측정할 해셔와 파라미터 (예: scrypt:work_factor=32768). 여러 번 지정 가능, 기본은 현재 설정의 각 해셔",
+        )
+        parser.add_argument('--logins', type=int, default=20, help='설정별 로그인(검증) 횟수')
+        parser.add_argument('--concurrency', type=int, default=8, help='동시에 로그인하는 요청(스레드) 수')
+        parser.add_argument('--workers', type=int, default=getattr(settings, 'PASSWORD_HASH_WORKERS', 2),
+                            help='해시 스레드 풀 크기 (PASSWORD_HASH_WORKERS, 0 이면 요청 스레드에서 직접 계산)')
+        parser.add_argument('--json', action='store_true', help='결과를 JSON 으로 출력')
+
+    def handle(self, *args, **options):
+        if options['logins'] < 2 or options['concurrency'] < 1:
+            raise CommandError('--logins 는 2 이상, --concurrency 는 1 이상이어야 합니다.')
+        variants = [parse_variant(value) for value in (options['variant'] or list(HASHERS))]
+        with override_settings(PASSWORD_HASH_WORKERS=options['workers']):
+            results = [self.bench(name, params, options['logins'], options['concurrency']) for name, params in variants]
+        results = [result for result in results if result]
+
+        if options['json']:
+            self.stdout.write(json.dumps(results, ensure_ascii=False, indent=2))
+            return
+        for result in results:
+            params = ','.join(f'{key}={value}' for key, value in result['params'].items())
+            self.stdout.write(
+                f"{result['hasher']:<8} {params:<48} {result['logins_per_sec']:>9.1f} logins/s  "
+                f"p50 {result['p50_ms']:>8.1f} ms  p95 {result['p95_ms']:>8.1f} ms  busy {result['busy']}"
+            )
+
+    def bench(self, name, params, logins, concurrency):
+        hasher_params = {**getattr(settings, 'PASSWORD_HASHER_PARAMS', {})}
+        hasher_params[name] = {**hasher_params.get(name, {}), **params}
+        with override_settings(PASSWORD_HASHER_PARAMS=hasher_params):
+            hasher = HASHERS[name]()
+            if name == 'pbkdf2' and 'iterations' in params:
+                hasher.iterations = params['iterations']
+            try:
+                encoded = hasher.encode('bench-password', hasher.salt())
+            except ValueError as exc:
+                # argon2-cffi 가 없는 경우 등
+                self.stderr.write(f'{name}: 건너뜀 ({exc})')
+                return None
+
+            def login(_):
+                # 로그인 API 의 비밀번호 검증과 같은 경로: 요청 스레드가 해시 스레드 풀에 맡기고 기다린다
+                started = time.perf_counter()
+                try:
+                    is_correct = run_hashing(hasher.verify, 'bench-password', encoded)
+                except HashingBusy:
+                    is_correct = None
+                return is_correct, time.perf_counter() - started
+
+            started = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                checks = list(executor.map(login, range(logins)))
+            elapsed = time.perf_counter() - started
+
+        if any(is_correct is False for is_correct, _ in checks):
+            raise CommandError(f'{name}: 비밀번호 검증 실패')
+        latencies = [latency for is_correct, latency in checks if is_correct]
+        if len(latencies) < 2:
+            raise CommandError(f'{name}: 대기열이 가득 차 측정하지 못했습니다. --concurrency 를 줄이세요.')
+        quantiles = statistics.quantiles(latencies, n=100)
+        decoded = hasher.decode(encoded)
+        used_params = {key: value for key, value in decoded.items() if key not in ('algorithm', 'hash', 'salt')}
+        return {
+            'hasher': name,
+            'params': used_params,
+            'workers': getattr(settings, 'PASSWORD_HASH_WORKERS', 2),
+            'concurrency': concurrency,
+            'logins': logins,
+            'busy': logins - len(latencies),
+            'logins_per_sec': len(latencies) / elapsed,
+            # 풀 대기 시간을 포함한 로그인 한 건의 검증 시간
+            'p50_ms': quantiles[49] * 1000,
+            'p95_ms': quantiles[94] * 1000,
+        }
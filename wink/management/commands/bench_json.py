@@ -0,0 +1,94 @@
+import io
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+from wink.models import SubTask, Task
+from wink.parsers import ORJSONParser
+from wink.renderers import ORJSONRenderer, orjson
+from wink.serializers import TaskSerializer
+
+# (이름, 렌더러, 파서)
+BACKENDS = (
+    ('stdlib', JSONRenderer, JSONParser),
+    ('orjson', ORJSONRenderer, ORJSONParser),
+)
+
+
+def build_feed(tasks, subtasks_per_task):
+    # DB 없이 업무 리스트 응답과 같은 모양의 데이터를 만든다 (하위 업무는 prefetch 결과처럼 붙인다)
+    now = timezone.now()
+    feed = []
+    for number in range(1, tasks + 1):
+        task = Task(
+            id=number, create_user_id=number % 50 + 1, team_id=number % 7 + 1,
+            title=f'벤치마크 업무 {number}', content='업무 리스트 응답 크기를 재기 위한 내용입니다. ' * 3,
+            is_complete=False, created_at=now, modified_at=now,
+            subtask_total=subtasks_per_task, subtask_open=subtasks_per_task,
+        )
+        task._prefetched_objects_cache = {'subtasks': [
+            SubTask(id=number * subtasks_per_task + index, task_id=number, team_id=(number + index) % 7 + 1,
+                    is_complete=index == 0, completed_date=now if index == 0 else None, created_at=now, modified_at=now)
+            for index in range(subtasks_per_task)
+        ]}
+        feed.append(task)
+    return TaskSerializer(feed, many=True).data
+
+
+class Command(BaseCommand):
+    help = '업무 리스트 응답으로 stdlib json 과 orjson 렌더러/파서의 초당 처리 바이트를 비교합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=1000, help='응답에 넣을 업무 수')
+        parser.add_argument('--subtasks-per-task', type=int, default=3, help='업무별 하위 업무 수')
+        parser.add_argument('--iterations', type=int, default=50, help='백엔드별 렌더링/파싱 반복 횟수')
+        parser.add_argument('--json', action='store_true', help='결과를 JSON 으로 출력')
+
+    def handle(self, *args, **options):
+        if options['tasks'] < 1 or options['iterations'] < 1:
+            raise CommandError('--tasks 와 --iterations 는 1 이상이어야 합니다.')
+        if orjson is None:
+            self.stderr.write('orjson 이 설치되어 있지 않아 orjson 결과도 stdlib json 으로 측정됩니다.')
+
+        data = build_feed(options['tasks'], options['subtasks_per_task'])
+        results = [self.bench(name, renderer_class(), parser_class(), data, options['iterations'])
+                   for name, renderer_class, parser_class in BACKENDS]
+
+        report = {'tasks': options['tasks'], 'payload_bytes': results[0]['payload_bytes'], 'results': results}
+        if options['json']:
+            self.stdout.write(json.dumps(report, ensure_ascii=False, indent=2))
+            return
+        self.stdout.write(f"업무 {report['tasks']}개, 응답 {report['payload_bytes']:,} bytes")
+        for result in results:
+            self.stdout.write(
+                f"{result['backend']:<8} render {result['render_mb_per_sec']:>8.1f} MB/s ({result['render_ms']:>7.2f} ms)  "
+                f"parse {result['parse_mb_per_sec']:>8.1f} MB/s ({result['parse_ms']:>7.2f} ms)"
+            )
+
+    def bench(self, name, renderer, parser, data, iterations):
+        body = renderer.render(data, renderer.media_type, {})
+        if json.loads(body) != json.loads(JSONRenderer().render(data)):
+            raise CommandError(f'{name}: stdlib json 과 다른 응답을 만들었습니다.')
+
+        started = time.perf_counter()
+        for _ in range(iterations):
+            renderer.render(data, renderer.media_type, {})
+        render_seconds = (time.perf_counter() - started) / iterations
+
+        started = time.perf_counter()
+        for _ in range(iterations):
+            parser.parse(io.BytesIO(body), parser.media_type, {'encoding': 'utf-8'})
+        parse_seconds = (time.perf_counter() - started) / iterations
+
+        return {
+            'backend': name,
+            'payload_bytes': len(body),
+            'render_ms': render_seconds * 1000,
+            'render_mb_per_sec': len(body) / render_seconds / 1e6,
+            'parse_ms': parse_seconds * 1000,
+            'parse_mb_per_sec': len(body) / parse_seconds / 1e6,
+        }
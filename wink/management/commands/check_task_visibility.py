@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from wink.models import TaskTeamVisibility
+from wink.signals import sync_task_visibility
+
+
+class Command(BaseCommand):
+    help = '팀 업무 가시성 테이블(TaskTeamVisibility)이 업무/하위 업무 테이블과 일치하는지 검사합니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fix', action='store_true', help='불일치한 업무의 가시성 행을 다시 동기화합니다.')
+        parser.add_argument('--show', type=int, default=10, help='출력할 불일치 행 수')
+
+    def handle(self, *args, **options):
+        missing, stale = TaskTeamVisibility.objects.inconsistencies()
+        missing_rows = list(missing)
+        stale_rows = list(stale)
+
+        for label, rows in (('누락', missing_rows), ('잔존', stale_rows)):
+            for team_id, task_id, created_at in rows[:options['show']]:
+                self.stdout.write(f'{label}: team_id={team_id} task_id={task_id} created_at={created_at.isoformat()}')
+
+        if not missing_rows and not stale_rows:
+            self.stdout.write(self.style.SUCCESS('가시성 테이블이 일치합니다.'))
+            return
+
+        summary = f'누락 {len(missing_rows)}건, 잔존 {len(stale_rows)}건'
+        if not options['fix']:
+            raise CommandError(f'가시성 테이블 불일치: {summary}')
+
+        task_ids = {task_id for _, task_id, _ in missing_rows + stale_rows}
+        sync_task_visibility(task_ids)
+        self.stdout.write(self.style.SUCCESS(f'{summary}을 동기화했습니다.'))
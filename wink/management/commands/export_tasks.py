@@ -0,0 +1,35 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from wink.exporter import EXPORT_FORMATS, export_team_tasks
+from wink.models import Team
+
+
+class Command(BaseCommand):
+    help = '팀에게 보이는 업무 전체를 NDJSON 또는 CSV 로 내보냅니다. (업무 내보내기 API 와 같은 스트리밍 방식)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--team', type=int, required=True, help='팀 id')
+        parser.add_argument('--output', choices=sorted(EXPORT_FORMATS), default='ndjson', help='출력 형식')
+        parser.add_argument('--gzip', action='store_true', help='gzip 으로 압축')
+        parser.add_argument('--path', default='-', help="저장할 파일 경로 ('-' 이면 표준 출력)")
+        parser.add_argument('--chunk-size', type=int, default=None, help='한 번에 읽는 건수')
+
+    def handle(self, *args, **options):
+        if not Team.objects.filter(id=options['team']).exists():
+            raise CommandError(f"팀이 존재하지 않습니다: {options['team']}")
+
+        chunks = export_team_tasks(
+            options['team'], output=options['output'], compress=options['gzip'], chunk_size=options['chunk_size'],
+        )
+        if options['path'] == '-':
+            for chunk in chunks:
+                sys.stdout.buffer.write(chunk)
+            sys.stdout.buffer.flush()
+            return
+
+        with open(options['path'], 'wb') as f:
+            for chunk in chunks:
+                f.write(chunk)
+        self.stderr.write(self.style.SUCCESS(f"{options['path']} 에 저장했습니다."))
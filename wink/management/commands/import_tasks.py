@@ -0,0 +1,52 @@
+import json
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from wink.importer import TaskImporter, iter_ndjson
+from wink.models import User
+
+
+class Command(BaseCommand):
+    help = 'JSON 배열 또는 NDJSON 파일의 업무를 일괄 등록합니다. (업무 일괄 등록 API 와 같은 검증/저장 과정)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="업무 파일 경로 ('-' 이면 표준 입력)")
+        parser.add_argument('--user', required=True, help='작성자 이메일')
+        parser.add_argument('--chunk-size', type=int, default=None, help='한 번에 검증/저장하는 건수')
+        parser.add_argument('--show', type=int, default=10, help='출력할 오류 행 수')
+
+    def handle(self, *args, **options):
+        try:
+            create_user = User.objects.get(email=options['user'])
+        except User.DoesNotExist:
+            raise CommandError(f"사용자가 존재하지 않습니다: {options['user']}")
+
+        stream = sys.stdin if options['path'] == '-' else open(options['path'], encoding='utf-8')
+        try:
+            result = TaskImporter(create_user.id, chunk_size=options['chunk_size']).run(self.read_rows(stream))
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        for error in result['errors'][:options['show']]:
+            self.stdout.write(f"{error['row']}행: {json.dumps(error['errors'], ensure_ascii=False)}")
+        message = f"전체 {result['total']}건 중 {result['created']}건 등록, {result['failed']}건 실패"
+        self.stdout.write(self.style.SUCCESS(message) if not result['failed'] else self.style.WARNING(message))
+
+    def read_rows(self, stream):
+        # '[' 로 시작하면 JSON 배열, 아니면 NDJSON 으로 한 줄씩 읽는다
+        head = stream.read(1)
+        while head and head.isspace():
+            head = stream.read(1)
+        if head == '[':
+            try:
+                return json.loads(head + stream.read())
+            except ValueError as exc:
+                raise CommandError(f'JSON 형식이 아닙니다: {exc}')
+        return iter_ndjson(self.prepend(head, stream))
+
+    def prepend(self, head, stream):
+        first = stream.readline()
+        yield head + first
+        yield from stream
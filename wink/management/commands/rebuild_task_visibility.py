@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from wink.models import TaskTeamVisibility
+
+
+class Command(BaseCommand):
+    help = '팀 업무 가시성 테이블(TaskTeamVisibility)을 업무/하위 업무 테이블로부터 다시 만듭니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        count = TaskTeamVisibility.objects.rebuild(batch_size=options['batch_size'])
+        self.stdout.write(self.style.SUCCESS(f'가시성 행 {count}건을 다시 만들었습니다.'))
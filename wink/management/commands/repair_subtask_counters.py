@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from wink.models import Task
+
+
+class Command(BaseCommand):
+    help = '업무의 하위 업무 카운터(subtask_total, subtask_open)를 실제 하위 업무 건수로 다시 맞춥니다.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--check', action='store_true', help='수정하지 않고 불일치만 검사합니다.')
+        parser.add_argument('--show', type=int, default=10, help='출력할 불일치 업무 수')
+
+    def handle(self, *args, **options):
+        mismatches = list(Task.objects.subtask_counter_mismatches().order_by('id').values_list(
+            'id', 'subtask_total', 'actual_subtask_total', 'subtask_open', 'actual_subtask_open',
+        ))
+
+        for task_id, total, actual_total, open_count, actual_open in mismatches[:options['show']]:
+            self.stdout.write(
+                f'불일치: task_id={task_id} total={total}->{actual_total} open={open_count}->{actual_open}'
+            )
+
+        if not mismatches:
+            self.stdout.write(self.style.SUCCESS('하위 업무 카운터가 일치합니다.'))
+            return
+
+        if options['check']:
+            raise CommandError(f'하위 업무 카운터 불일치: {len(mismatches)}건')
+
+        repaired = Task.objects.repair_subtask_counters()
+        self.stdout.write(self.style.SUCCESS(f'업무 {repaired}건의 하위 업무 카운터를 수정했습니다.'))
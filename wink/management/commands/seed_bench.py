@@ -0,0 +1,60 @@
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from wink import seeding
+
+
+class Command(BaseCommand):
+    help = '벤치마크용 팀/사용자/업무/하위 업무를 대량으로 생성합니다. (bulk insert)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--teams', type=int, default=10, help='팀 수')
+        parser.add_argument('--users-per-team', type=int, default=10, help='팀별 사용자 수')
+        parser.add_argument('--tasks-per-user', type=int, default=20, help='사용자별 업무 수')
+        parser.add_argument('--subtasks-per-task', type=int, default=3, help='업무별 하위 업무 수')
+        parser.add_argument('--cross-team-ratio', type=float, default=0.5, help='다른 팀에 배정할 하위 업무 비율')
+        parser.add_argument('--complete-ratio', type=float, default=0.3, help='완료 상태로 만들 하위 업무 비율')
+        parser.add_argument('--batch-size', type=int, default=2000, help='한 트랜잭션에서 만드는 업무 수')
+        parser.add_argument('--seed', type=int, default=0, help='난수 시드 (같은 값이면 같은 분포)')
+        parser.add_argument('--clear', action='store_true', help='기존 벤치마크 데이터를 먼저 지운다')
+        parser.add_argument('--clear-only', action='store_true', help='기존 벤치마크 데이터만 지운다')
+        parser.add_argument('--json', action='store_true', help='결과를 JSON 으로 출력')
+
+    def handle(self, *args, **options):
+        for name in ('teams', 'users_per_team', 'batch_size'):
+            if options[name] <= 0:
+                raise CommandError(f"--{name.replace('_', '-')} 는 1 이상이어야 합니다.")
+
+        result = {}
+        if options['clear'] or options['clear_only']:
+            result['cleared'] = seeding.clear()
+        if not options['clear_only']:
+            seeder = seeding.Seeder(
+                teams=options['teams'],
+                users_per_team=options['users_per_team'],
+                tasks_per_user=options['tasks_per_user'],
+                subtasks_per_task=options['subtasks_per_task'],
+                cross_team_ratio=options['cross_team_ratio'],
+                complete_ratio=options['complete_ratio'],
+                batch_size=options['batch_size'],
+                seed=options['seed'],
+            )
+            progress = None if options['json'] else self.show_progress
+            result['created'] = seeder.run(progress=progress)
+            result['password'] = seeding.PASSWORD
+
+        if options['json']:
+            self.stdout.write(json.dumps(result, indent=2))
+            return
+        if 'cleared' in result:
+            self.stdout.write(f"삭제: 팀 {result['cleared']['teams']}개, 업무 {result['cleared']['tasks']}건")
+        if 'created' in result:
+            created = result['created']
+            self.stdout.write(self.style.SUCCESS(
+                f"생성: 팀 {created['teams']}개, 사용자 {created['users']}명, 업무 {created['tasks']}건, "
+                f"하위 업무 {created['subtasks']}건 (비밀번호: {seeding.PASSWORD})"
+            ))
+
+    def show_progress(self, counts):
+        self.stdout.write(f"업무 {counts['tasks']}건 / 하위 업무 {counts['subtasks']}건 생성")
@@ -0,0 +1,324 @@
+import atexit
+import contextlib
+import fcntl
+import glob
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+
+from django.conf import settings
+
+from wink import authentication, feed_cache, instrumentation
+from wink.db.postgresql_pool.base import pool_stats
+from wink.team_directory import team_directory
+
+logger = logging.getLogger(__name__)
+
+# Prometheus 텍스트 형식(0.0.4)으로 /metrics 응답을 만든다
+# gunicorn 워커가 여러 개면 METRICS_DIR 에 워커 프로세스마다 스냅샷 파일을 주기적으로 쓰고, 응답 시 모두 합친다
+# 종료된 워커의 스냅샷은 응답 시 집계 파일(wink-aggregate.json) 하나로 접어 넣고 지운다
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DESCRIPTIONS = {
+    'wink_http_requests_total': ('counter', '뷰(URL 이름)/메서드/상태 코드별 요청 수'),
+    'wink_http_request_duration_seconds': ('histogram', '뷰별 요청 처리 시간 (샘플링된 요청)'),
+    'wink_http_request_db_duration_seconds': ('histogram', '뷰별 요청당 DB 쿼리 시간 합 (샘플링된 요청)'),
+    'wink_http_request_db_queries': ('histogram', '뷰별 요청당 DB 쿼리 수 (샘플링된 요청)'),
+    'wink_cache_events_total': ('counter', '캐시별 적중/미스 등 이벤트 수'),
+    'wink_cache_hit_ratio': ('gauge', '캐시별 적중률'),
+    'wink_db_pool_events_total': ('counter', 'DB 연결 풀 이벤트 수 (created, reused, discarded, waits, timeouts)'),
+    'wink_db_pool_connections': ('gauge', 'DB 연결 풀의 연결 수 (in_use, idle, max_size). 살아 있는 워커의 합'),
+}
+
+# 히스토그램 이름 -> (instrumentation 지표, 값 단위 변환)
+HISTOGRAMS = {
+    'wink_http_request_duration_seconds': ('request_ms', 1000),
+    'wink_http_request_db_duration_seconds': ('db_ms', 1000),
+    'wink_http_request_db_queries': ('db_queries', 1),
+}
+
+# 적중으로 보는 이벤트
+CACHE_HITS = {'local_hits', 'shared_hits', 'hits'}
+POOL_GAUGES = {'in_use', 'idle', 'max_size'}
+
+
+def collect():
+    # 이 프로세스의 지표. 파일로 저장할 수 있도록 JSON 으로 표현 가능한 목록만 쓴다
+    samples = {'counters': [], 'gauges': [], 'histograms': []}
+
+    for (view_name, method, status_code), value in list(instrumentation.request_counts.items()):
+        samples['counters'].append(
+            ['wink_http_requests_total', {'view': view_name, 'method': method, 'status': str(status_code)}, value]
+        )
+
+    histograms = instrumentation.stats()
+    for name, (metric, divisor) in HISTOGRAMS.items():
+        for view_name, view_histograms in histograms.items():
+            if metric not in view_histograms:
+                continue
+            snapshot = view_histograms[metric]
+            buckets = [[_format_bound(bound, divisor), count] for bound, count in snapshot['buckets'].items()]
+            samples['histograms'].append(
+                [name, {'view': view_name}, {'buckets': buckets, 'count': snapshot['count'], 'sum': snapshot['sum'] / divisor}]
+            )
+
+    caches = {
+        'team_directory': team_directory.stats(),
+        'task_feed': feed_cache.stats(),
+        'auth_user': authentication.stats(),
+    }
+    for cache_name, cache_stats in caches.items():
+        for event, value in cache_stats.items():
+            if event != 'hit_ratio':
+                samples['counters'].append(['wink_cache_events_total', {'cache': cache_name, 'event': event}, value])
+
+    for pool_name, stats in pool_stats().items():
+        for key, value in stats.items():
+            if key in POOL_GAUGES:
+                samples['gauges'].append(['wink_db_pool_connections', {'pool': pool_name, 'state': key}, value])
+            else:
+                samples['counters'].append(['wink_db_pool_events_total', {'pool': pool_name, 'event': key}, value])
+
+    return samples
+
+
+def _format_bound(bound, divisor):
+    if bound == '+Inf':
+        return bound
+    return repr(bound / divisor) if divisor != 1 else str(bound)
+
+
+def metrics_dir():
+    return getattr(settings, 'METRICS_DIR', '')
+
+
+# (pid, 프로세스 시작 시각, 프로세스 id). fork 된 워커에서는 pid 가 달라지므로 다시 만든다
+_process = None
+
+
+def current_process():
+    # max_requests 로 워커를 다시 띄우면 종료된 워커의 pid 가 재사용될 수 있으므로
+    # 파일 이름에 pid 대신 프로세스마다 새로 만드는 id 를 쓴다 (같은 pid 의 이전 워커 파일을 덮어쓰지 않는다)
+    global _process
+    if _process is None or _process[0] != os.getpid():
+        _process = (os.getpid(), time.time(), f'{os.getpid()}-{uuid.uuid4().hex[:12]}')
+    return _process
+
+
+AGGREGATE_FILE = 'wink-aggregate.json'
+
+
+def _snapshot_path(directory, process_id):
+    return os.path.join(directory, f'wink-{process_id}.json')
+
+
+def _write_json(directory, path, data):
+    # 임시 파일에 쓴 뒤 바꿔치기 (읽는 쪽이 쓰다 만 파일을 보지 않는다)
+    handle, temp_path = tempfile.mkstemp(dir=directory, prefix='.wink-', suffix='.tmp')
+    try:
+        with os.fdopen(handle, 'w') as file:
+            json.dump(data, file)
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+
+
+def flush():
+    # 이 프로세스의 지표를 METRICS_DIR/wink-<pid>-<uuid>.json 에 쓴다
+    directory = metrics_dir()
+    if not directory:
+        return
+    os.makedirs(directory, exist_ok=True)
+    pid, started_at, process_id = current_process()
+    _write_json(directory, _snapshot_path(directory, process_id),
+                {'pid': pid, 'started_at': started_at, 'process': process_id, **collect()})
+
+
+_flusher_pid = None
+_flusher_lock = threading.Lock()
+
+
+def _flush_loop(pid, interval):
+    while True:
+        time.sleep(interval)
+        if os.getpid() != pid:
+            return
+        try:
+            flush()
+        except OSError:
+            logger.warning('지표 파일을 쓰지 못했습니다.', exc_info=True)
+
+
+def ensure_flusher(**kwargs):
+    # 워커 프로세스마다 한 번 지표 파일을 주기적으로 쓰는 스레드를 띄운다 (request_started 시그널에서 호출)
+    # fork 된 워커에는 부모의 스레드가 없으므로 pid 로 구분한다
+    global _flusher_pid
+    if not metrics_dir() or _flusher_pid == os.getpid():
+        return
+    with _flusher_lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+        threading.Thread(
+            target=_flush_loop, args=(_flusher_pid, interval), name='wink-metrics-flush', daemon=True,
+        ).start()
+        atexit.register(flush)
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _read_snapshot(path):
+    try:
+        with open(path) as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+@contextlib.contextmanager
+def _locked(directory):
+    # 여러 워커가 동시에 /metrics 에 응답해도 종료된 워커의 스냅샷을 두 번 합치지 않도록 디렉터리에 잠금을 건다
+    handle = os.open(directory, os.O_RDONLY)
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX)
+        yield
+    finally:
+        os.close(handle)
+
+
+def fold_dead_snapshots(directory):
+    # 종료된 워커의 스냅샷은 카운터/히스토그램을 집계 파일에 더한 뒤 지운다
+    # (max_requests 로 워커가 계속 바뀌어도 파일 수가 늘지 않고, 합친 카운터는 줄지 않는다)
+    # 같은 pid 의 스냅샷이 여럿이면(pid 재사용) 가장 늦게 시작한 프로세스만 살아 있을 수 있다
+    # 집계 스냅샷과 살아 있는 워커의 스냅샷 목록을 반환
+    aggregate_path = os.path.join(directory, AGGREGATE_FILE)
+    with _locked(directory):
+        snapshots = []
+        for path in glob.glob(os.path.join(directory, 'wink-*.json')):
+            snapshot = _read_snapshot(path) if path != aggregate_path else None
+            if snapshot is not None:
+                snapshots.append((path, snapshot))
+
+        latest = {}
+        for _, snapshot in snapshots:
+            if snapshot.get('started_at', 0) >= latest.get(snapshot['pid'], 0):
+                latest[snapshot['pid']] = snapshot.get('started_at', 0)
+        live, dead = [], []
+        for path, snapshot in snapshots:
+            is_live = snapshot.get('started_at', 0) == latest[snapshot['pid']] and _pid_alive(snapshot['pid'])
+            (live if is_live else dead).append((path, snapshot))
+
+        aggregate = _read_snapshot(aggregate_path) or {'counters': [], 'gauges': [], 'histograms': []}
+        if dead:
+            counters, _, histograms = merge([aggregate] + [snapshot for _, snapshot in dead])
+            aggregate = {
+                'counters': [[name, dict(labels), value] for (name, labels), value in counters.items()],
+                'gauges': [],
+                'histograms': [
+                    [name, dict(labels), {**histogram, 'buckets': list(histogram['buckets'].items())}]
+                    for (name, labels), histogram in histograms.items()
+                ],
+            }
+            _write_json(directory, aggregate_path, aggregate)
+            for path, _ in dead:
+                os.unlink(path)
+
+    return [aggregate] + [snapshot for _, snapshot in live]
+
+
+def load_all():
+    # 모든 워커의 스냅샷. 카운터/히스토그램은 종료된 워커 것(집계 파일)도 합쳐야 값이 줄지 않고, 게이지는 살아 있는 워커만 센다
+    directory = metrics_dir()
+    if not directory:
+        return [collect()]
+
+    flush()
+    return fold_dead_snapshots(directory)
+
+
+def _key(name, labels):
+    return name, tuple(sorted(labels.items()))
+
+
+def merge(snapshots):
+    counters, gauges, histograms = {}, {}, {}
+    for snapshot in snapshots:
+        for name, labels, value in snapshot['counters']:
+            key = _key(name, labels)
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, value in snapshot['gauges']:
+            key = _key(name, labels)
+            gauges[key] = gauges.get(key, 0) + value
+        for name, labels, histogram in snapshot['histograms']:
+            merged = histograms.setdefault(_key(name, labels), {'buckets': {}, 'count': 0, 'sum': 0.0})
+            for bound, count in histogram['buckets']:
+                merged['buckets'][bound] = merged['buckets'].get(bound, 0) + count
+            merged['count'] += histogram['count']
+            merged['sum'] += histogram['sum']
+
+    # 적중률은 합친 카운터로 계산한다. team_directory 의 db_fallbacks 처럼 조회 건수가 아닌 이벤트는 분모에서 뺀다
+    hits, lookups = {}, {}
+    for (name, labels), value in counters.items():
+        labels = dict(labels)
+        if name != 'wink_cache_events_total' or labels['event'] not in CACHE_HITS | {'misses'}:
+            continue
+        lookups[labels['cache']] = lookups.get(labels['cache'], 0) + value
+        if labels['event'] in CACHE_HITS:
+            hits[labels['cache']] = hits.get(labels['cache'], 0) + value
+    for cache_name, total in lookups.items():
+        gauges[_key('wink_cache_hit_ratio', {'cache': cache_name})] = hits.get(cache_name, 0) / total if total else 0.0
+
+    return counters, gauges, histograms
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(labels, **extra):
+    pairs = list(labels) + list(extra.items())
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in pairs) + '}'
+
+
+def _bound_order(bound):
+    return float('inf') if bound == '+Inf' else float(bound)
+
+
+def render():
+    counters, gauges, histograms = merge(load_all())
+    lines = []
+    for name, (kind, description) in DESCRIPTIONS.items():
+        series = {'counter': counters, 'gauge': gauges, 'histogram': histograms}[kind]
+        keys = sorted(key for key in series if key[0] == name)
+        if not keys:
+            continue
+        lines.append(f'# HELP {name} {description}')
+        lines.append(f'# TYPE {name} {kind}')
+        for key in keys:
+            labels = key[1]
+            if kind != 'histogram':
+                lines.append(f'{name}{_labels(labels)} {series[key]}')
+                continue
+            histogram = series[key]
+            for bound in sorted(histogram['buckets'], key=_bound_order):
+                lines.append(f'{name}_bucket{_labels(labels, le=bound)} {histogram["buckets"][bound]}')
+            lines.append(f'{name}_sum{_labels(labels)} {histogram["sum"]}')
+            lines.append(f'{name}_count{_labels(labels)} {histogram["count"]}')
+    return '\n'.join(lines) + '\n'
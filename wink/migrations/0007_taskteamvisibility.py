@@ -0,0 +1,50 @@
+# Generated by Django 4.2.6 on 2026-10-17 00:35
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def populate_visibility(apps, schema_editor):
+    Task = apps.get_model('wink', 'Task')
+    SubTask = apps.get_model('wink', 'SubTask')
+    TaskTeamVisibility = apps.get_model('wink', 'TaskTeamVisibility')
+
+    task_rows = Task.objects.filter(team__isnull=False).values_list('team_id', 'id', 'created_at')
+    subtask_rows = SubTask.objects.filter(team__isnull=False, task__isnull=False).values_list(
+        'team_id', 'task_id', 'task__created_at'
+    )
+    batch = []
+    for team_id, task_id, created_at in task_rows.union(subtask_rows).iterator(chunk_size=5000):
+        batch.append(TaskTeamVisibility(team_id=team_id, task_id=task_id, created_at=created_at))
+        if len(batch) >= 5000:
+            TaskTeamVisibility.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        TaskTeamVisibility.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wink', '0006_task_subtask'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskTeamVisibility',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField()),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='team_visibilities', to='wink.task')),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_visibilities', to='wink.team')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['team', '-created_at', '-task'], name='wink_visibility_feed_idx')],
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='taskteamvisibility',
+            constraint=models.UniqueConstraint(fields=('team', 'task'), name='wink_visibility_team_task_uniq'),
+        ),
+        migrations.RunPython(populate_visibility, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.6 on 2026-10-17 00:47
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def populate_subtask_counters(apps, schema_editor):
+    Task = apps.get_model('wink', 'Task')
+    SubTask = apps.get_model('wink', 'SubTask')
+
+    def count(**filters):
+        subtasks = SubTask.objects.filter(task=OuterRef('pk'), **filters).order_by().values('task')
+        return Coalesce(Subquery(subtasks.annotate(count=Count('pk')).values('count')), 0)
+
+    Task.objects.update(subtask_total=count(), subtask_open=count(is_complete=False))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('wink', '0007_taskteamvisibility'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='task',
+            name='subtask_open',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='task',
+            name='subtask_total',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(populate_subtask_counters, migrations.RunPython.noop),
+    ]
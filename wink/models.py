@@ -1,7 +1,10 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Case, Count, Exists, F, OuterRef, Prefetch, Q, Subquery, Value, When
+from django.db.models.functions import Coalesce, Now
 from django.contrib.auth.base_user import AbstractBaseUser
 from django.contrib.auth.models import BaseUserManager
 from django.contrib.auth.hashers import make_password
+from django.utils import timezone
 
 
 # objects = models.Manager()
@@ -42,6 +45,73 @@ class User(AbstractBaseUser):
     def __str__(self):
         return self.email
 
+def subtasks_prefetch(lookup):
+    return Prefetch(lookup, queryset=SubTask.objects.select_related('team').order_by('id'))
+
+class TaskQuerySet(models.QuerySet):
+
+    def refresh_completion(self, **extra):
+        # 하위 업무가 있고 모두 완료이면 완료, 아니면 미완료로 UPDATE 한 번에 다시 계산
+        # (하위 업무가 없는 업무는 create_with_subtasks 와 같게 미완료. 이미 완료였던 업무는 완료일자를 유지)
+        # extra 로 하위 업무 카운터 증감 등을 같은 UPDATE에 싣는다
+        subtasks = SubTask.objects.filter(task=OuterRef('pk'))
+        done = Q(Exists(subtasks)) & ~Q(Exists(subtasks.filter(is_complete=False)))
+        return self.update(
+            is_complete=Case(When(done, then=Value(True)), default=Value(False)),
+            completed_date=Case(When(done, then=Coalesce('completed_date', Now())), default=Value(None)),
+            modified_at=Now(),
+            **extra
+        )
+
+    def with_actual_subtask_counts(self):
+        return self.annotate(**{f'actual_{name}': value for name, value in subtask_count_expressions().items()})
+
+    def subtask_counter_mismatches(self):
+        # 비정규화된 하위 업무 카운터가 실제 하위 업무 건수와 다른 업무
+        return self.with_actual_subtask_counts().exclude(
+            subtask_total=F('actual_subtask_total'), subtask_open=F('actual_subtask_open'),
+        )
+
+    def repair_subtask_counters(self):
+        # 카운터가 어긋난 업무만 실제 건수로 다시 계산해 UPDATE 한 번으로 맞춘다
+        mismatched = self.subtask_counter_mismatches().values('pk')
+        return Task.objects.filter(pk__in=mismatched).update(**subtask_count_expressions())
+
+    def create_with_subtasks(self, entries):
+        # 업무 생성 공통 경로: entries 는 (저장 전 Task, 저장 전 SubTask 리스트) 쌍
+        # 하위 업무 카운터/완료 여부를 여기서만 채우고, 업무와 하위 업무를 각각 INSERT 한 번으로 만든다
+        # 가시성 동기화는 호출하는 쪽에서 한다. (업무 리스트, 하위 업무 리스트)를 반환
+        entries = list(entries)
+        now = timezone.now()
+        for task, subtasks in entries:
+            task.subtask_total = len(subtasks)
+            task.subtask_open = sum(1 for subtask in subtasks if not subtask.is_complete)
+            # 완료 여부 규칙은 refresh_completion 과 같다: 하위 업무가 있고 모두 완료일 때만 완료
+            task.is_complete = bool(subtasks) and task.subtask_open == 0
+            task.completed_date = now if task.is_complete else None
+
+        with transaction.atomic(savepoint=False):
+            tasks = self.bulk_create([task for task, _ in entries])
+            for task, subtasks in entries:
+                for subtask in subtasks:
+                    subtask.task = task
+            created = SubTask.objects.bulk_create([subtask for _, subtasks in entries for subtask in subtasks])
+
+        # 응답 직렬화 시 하위 업무를 다시 조회하지 않도록 prefetch 캐시를 채워둔다
+        for task, subtasks in entries:
+            task._prefetched_objects_cache = {'subtasks': subtasks}
+        return tasks, created
+
+
+def subtask_count_expressions():
+    # 업무별 전체/미완료 하위 업무 건수 상관 서브쿼리 (카운터 재계산용)
+    def count(**filters):
+        subtasks = SubTask.objects.filter(task=OuterRef('pk'), **filters).order_by().values('task')
+        return Coalesce(Subquery(subtasks.annotate(count=Count('pk')).values('count')), 0)
+
+    return {'subtask_total': count(), 'subtask_open': count(is_complete=False)}
+
+
 class Task(models.Model):
     id = models.AutoField(primary_key=True)
     create_user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
@@ -52,6 +122,11 @@ class Task(models.Model):
     completed_date = models.DateTimeField(null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
     modified_at = models.DateTimeField(auto_now=True)
+    # 하위 업무 전체/미완료 건수 (비정규화). 하위 업무를 바꾸는 곳에서 F() 증감으로 함께 갱신한다
+    subtask_total = models.PositiveIntegerField(default=0)
+    subtask_open = models.PositiveIntegerField(default=0)
+
+    objects = TaskQuerySet.as_manager()
 
 
 class SubTask(models.Model):
@@ -63,4 +138,102 @@ class SubTask(models.Model):
     modified_at = models.DateTimeField(auto_now=True)
     task = models.ForeignKey(Task, related_name='subtasks', on_delete=models.CASCADE, null=True)
 
-   
+
+class TaskTeamVisibilityManager(models.Manager):
+
+    def feed(self, team_id):
+        # 팀 업무 리스트: (team, created_at desc) 인덱스 range scan 한 번으로 조회
+        return self.filter(team_id=team_id).select_related(
+            'task', 'task__team', 'task__create_user'
+        ).prefetch_related(subtasks_prefetch('task__subtasks'))
+
+    def expected_rows(self):
+        # 업무/하위 업무 테이블로부터 계산한 (team_id, task_id, created_at) 전체 집합
+        task_rows = Task.objects.filter(team__isnull=False).values_list('team_id', 'id', 'created_at')
+        subtask_rows = SubTask.objects.filter(team__isnull=False, task__isnull=False).values_list(
+            'team_id', 'task_id', 'task__created_at'
+        )
+        return task_rows.union(subtask_rows)
+
+    def current_rows(self):
+        return self.values_list('team_id', 'task_id', 'created_at')
+
+    def sync(self, task_ids):
+        # 업무의 현재 팀 구성에 맞게 가시성 행을 추가/삭제한다
+        # (추가된 쌍, 삭제된 쌍, 변경 전후로 업무를 볼 수 있는 팀 id 전체)를 반환
+        task_ids = set(task_ids)
+        if not task_ids:
+            return set(), set(), set()
+
+        with transaction.atomic():
+            created_at = {}
+            expected = set()
+            for task_id, team_id, task_created_at in Task.objects.filter(id__in=task_ids).values_list(
+                'id', 'team_id', 'created_at'
+            ):
+                created_at[task_id] = task_created_at
+                if team_id is not None:
+                    expected.add((team_id, task_id))
+            if created_at:
+                expected.update(SubTask.objects.filter(
+                    task_id__in=created_at, team__isnull=False
+                ).values_list('team_id', 'task_id'))
+
+            existing = set(self.filter(task_id__in=task_ids).values_list('team_id', 'task_id'))
+            stale = existing - expected
+            missing = expected - existing
+
+            if stale:
+                condition = Q()
+                for team_id, task_id in stale:
+                    condition |= Q(team_id=team_id, task_id=task_id)
+                self.filter(condition).delete()
+            if missing:
+                self.bulk_create([
+                    self.model(team_id=team_id, task_id=task_id, created_at=created_at[task_id])
+                    for team_id, task_id in missing
+                ], ignore_conflicts=True)
+
+        return missing, stale, {team_id for team_id, _ in existing | expected}
+
+    def rebuild(self, batch_size=5000):
+        # 가시성 테이블 전체를 업무/하위 업무 테이블로부터 다시 만든다
+        with transaction.atomic():
+            self.all().delete()
+            batch = []
+            count = 0
+            for team_id, task_id, created_at in self.expected_rows().iterator(chunk_size=batch_size):
+                batch.append(self.model(team_id=team_id, task_id=task_id, created_at=created_at))
+                if len(batch) >= batch_size:
+                    self.bulk_create(batch)
+                    count += len(batch)
+                    batch = []
+            if batch:
+                self.bulk_create(batch)
+                count += len(batch)
+        return count
+
+    def inconsistencies(self):
+        # (누락된 행, 남아있는 행) 쿼리셋
+        expected = self.expected_rows()
+        current = self.current_rows()
+        return expected.difference(current), current.difference(expected)
+
+
+class TaskTeamVisibility(models.Model):
+    # 팀별로 볼 수 있는 업무를 미리 계산해 둔 테이블 (업무 팀 + 하위 업무 팀)
+    # 쓰기 시점에 wink.signals 에서 동기화된다
+    id = models.BigAutoField(primary_key=True)
+    team = models.ForeignKey('Team', on_delete=models.CASCADE, related_name='task_visibilities')
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name='team_visibilities')
+    created_at = models.DateTimeField()
+
+    objects = TaskTeamVisibilityManager()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['team', 'task'], name='wink_visibility_team_task_uniq'),
+        ]
+        indexes = [
+            models.Index(fields=['team', '-created_at', '-task'], name='wink_visibility_feed_idx'),
+        ]
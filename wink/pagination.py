@@ -0,0 +1,144 @@
+from base64 import b64decode, b64encode
+from urllib import parse
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetCursorPagination(BasePagination):
+    # (정렬 컬럼, 동률 해소 컬럼) 쌍을 커서로 사용하는 keyset 페이지네이션
+    # OFFSET 없이 "마지막으로 본 위치 이후"만 조회하므로 깊은 페이지도 첫 페이지와 비용이 같다
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    page_size = api_settings.PAGE_SIZE
+    max_page_size = 100
+    ordering = ('-created_at', '-id')
+    invalid_cursor_message = '잘못된 커서입니다.'
+
+    def is_requested(self, request):
+        # 커서 또는 페이지 크기 파라미터가 있을 때만 커서 모드로 응답한다
+        params = request.query_params
+        return self.cursor_query_param in params or self.page_size_query_param in params
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self.page_queryset(queryset, request)
+        return self._set_page(list(queryset), request)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        # async 뷰용. 페이지 조회만 async ORM 으로 한다
+        queryset = self.page_queryset(queryset, request)
+        return self._set_page([row async for row in queryset.aiterator()], request)
+
+    def page_queryset(self, queryset, request):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.model = queryset.model
+
+        self.cursor = self.decode_cursor(request)
+        reverse = self.cursor is not None and self.cursor[2]
+        ordering = self._reverse_ordering(self.ordering) if reverse else self.ordering
+
+        queryset = queryset.order_by(*ordering)
+        if self.cursor is not None:
+            queryset = queryset.filter(self._after(self.cursor[0], self.cursor[1], ordering))
+
+        # 다음 페이지 존재 여부를 알기 위해 한 건 더 가져온다
+        return queryset[:self.page_size + 1]
+
+    def _set_page(self, results, request):
+        has_more = len(results) > self.page_size
+        results = results[:self.page_size]
+
+        if self.cursor is not None and self.cursor[2]:
+            results.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = self.cursor is not None
+
+        self.page = results
+        return self.page
+
+    def get_page_size(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.page_size_query_param],
+                strict=True,
+                cutoff=self.max_page_size
+            )
+        except (KeyError, ValueError):
+            return self.page_size
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+
+        try:
+            querystring = b64decode(encoded.encode('ascii'), validate=True).decode('ascii')
+            tokens = parse.parse_qs(querystring, keep_blank_values=True)
+            position = self._to_python(self.ordering[0], tokens['p'][0])
+            key = self._to_python(self.ordering[1], tokens['k'][0])
+            reverse = bool(int(tokens.get('r', ['0'])[0]))
+        except (TypeError, ValueError, KeyError, UnicodeError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        if position is None or key is None:
+            raise NotFound(self.invalid_cursor_message)
+        return position, key, reverse
+
+    def encode_cursor(self, instance, reverse):
+        tokens = {
+            'p': str(getattr(instance, self.ordering[0].lstrip('-'))),
+            'k': str(getattr(instance, self.ordering[1].lstrip('-'))),
+        }
+        if reverse:
+            tokens['r'] = '1'
+
+        querystring = parse.urlencode(tokens)
+        encoded = b64encode(querystring.encode('ascii')).decode('ascii')
+        return replace_query_param(self.base_url, self.cursor_query_param, encoded)
+
+    def _to_python(self, ordering_field, value):
+        return self.model._meta.get_field(ordering_field.lstrip('-')).to_python(value)
+
+    def _after(self, position, key, ordering):
+        # (position, key) 이후의 행만 남긴다. 첫 컬럼에 범위 조건을 걸어 인덱스 range scan이 되도록 한다
+        position_field, key_field = (field.lstrip('-') for field in ordering)
+        op = 'lt' if ordering[0].startswith('-') else 'gt'
+        return Q(**{f'{position_field}__{op}e': position}) & (
+            Q(**{f'{position_field}__{op}': position}) | Q(**{f'{key_field}__{op}': key})
+        )
+
+    @staticmethod
+    def _reverse_ordering(ordering):
+        return tuple(field[1:] if field.startswith('-') else '-' + field for field in ordering)
+
+
+class TaskFeedPagination(KeysetCursorPagination):
+    # TaskTeamVisibility 행 기준 (created_at, task_id) 내림차순
+    ordering = ('-created_at', '-task_id')
@@ -0,0 +1,30 @@
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import BaseParser, JSONParser
+
+from wink.importer import iter_ndjson
+from wink.renderers import orjson
+
+
+class NDJSONParser(BaseParser):
+    # 본문 전체를 읽지 않고, 요청 스트림에서 한 줄씩 읽어 업무 dict 를 내보내는 generator 를 돌려준다
+    media_type = 'application/x-ndjson'
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if stream is None:
+            return iter(())
+        return iter_ndjson(stream)
+
+
+class ORJSONParser(JSONParser):
+    # orjson 으로 요청 본문을 디코딩한다. orjson 이 없거나 UTF-8 이 아닌 본문이면 JSONParser(stdlib json)로 처리한다
+    # orjson 은 NaN/Infinity 를 허용하지 않으므로 STRICT_JSON 과 같게 동작한다
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if orjson is None or encoding.lower().replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
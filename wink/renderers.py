@@ -0,0 +1,27 @@
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# datetime/UUID 는 orjson 이 직접 처리하고, 그 외 타입(Decimal, 지연 번역 문자열, QuerySet 등)은 DRF 인코더에 맡긴다
+ORJSON_OPTIONS = (orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS) if orjson else 0
+_default = JSONEncoder().default
+
+
+def orjson_dumps(data):
+    body = orjson.dumps(data, default=_default, option=ORJSON_OPTIONS)
+    # JSONRenderer 와 같게, JavaScript 문자열 안에서 줄바꿈이 되는 U+2028/U+2029 는 이스케이프한다
+    if b'\xe2\x80\xa8' in body or b'\xe2\x80\xa9' in body:
+        body = body.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+    return body
+
+
+class ORJSONRenderer(JSONRenderer):
+    # orjson 으로 JSON 을 인코딩한다. orjson 이 없거나 들여쓰기를 요청하면 JSONRenderer(stdlib json)로 렌더링한다
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if orjson is None or data is None or self.get_indent(accepted_media_type or '', renderer_context or {}):
+            return super().render(data, accepted_media_type, renderer_context)
+        return orjson_dumps(data)
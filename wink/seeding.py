@@ -0,0 +1,115 @@
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection, transaction
+from django.utils import timezone
+
+from wink import feed_cache
+from wink.models import SubTask, Task, TaskTeamVisibility, Team, User
+from wink.team_directory import team_directory
+
+# 벤치마크용 데이터는 이름/이메일로 구분해 한 번에 지울 수 있게 한다
+TEAM_NAME = 'bench-team-{index}'
+TEAM_NAME_PREFIX = 'bench-team-'
+USER_EMAIL = 'bench-{team}-{index}@bench.wink'
+USER_EMAIL_SUFFIX = '@bench.wink'
+PASSWORD = 'bench-password'
+
+
+def clear():
+    # 벤치마크용 팀/사용자와 그 사용자가 만든 업무를 지운다
+    with transaction.atomic():
+        team_ids = list(Team.objects.filter(name__startswith=TEAM_NAME_PREFIX).values_list('id', flat=True))
+        tasks = Task.objects.filter(create_user__email__endswith=USER_EMAIL_SUFFIX)
+        # 가시성 행/하위 업무를 먼저 한 번에 지워 업무 삭제 시 CASCADE 수집을 줄인다
+        TaskTeamVisibility.objects.filter(task__in=tasks).delete()
+        # 하위 업무는 삭제 시그널(카운터/가시성 갱신)이 있어 QuerySet.delete() 가 행을 모두 읽어 오므로 DELETE 문으로 지운다
+        # (업무까지 모두 지우므로 갱신할 것이 없다)
+        subtask_ids, params = SubTask.objects.filter(task__in=tasks).values('id').query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute(f'DELETE FROM {SubTask._meta.db_table} WHERE id IN ({subtask_ids})', params)
+        task_count = tasks.count()
+        tasks.delete()
+        User.objects.filter(email__endswith=USER_EMAIL_SUFFIX).delete()
+        Team.objects.filter(id__in=team_ids).delete()
+    team_directory.invalidate()
+    feed_cache.invalidate_teams(team_ids)
+    return {'teams': len(team_ids), 'tasks': task_count}
+
+
+class Seeder:
+    # 팀/사용자/업무/하위 업무를 bulk_create 로 만든다. 하위 업무는 cross_team_ratio 비율로 다른 팀에 배정한다
+    # 시그널을 거치지 않으므로 하위 업무 카운터, 완료 여부, 팀 가시성 행도 여기서 함께 만든다
+    def __init__(self, teams=10, users_per_team=10, tasks_per_user=20, subtasks_per_task=3,
+                 cross_team_ratio=0.5, complete_ratio=0.3, batch_size=2000, seed=0, password=PASSWORD):
+        self.teams = teams
+        self.users_per_team = users_per_team
+        self.tasks_per_user = tasks_per_user
+        self.subtasks_per_task = subtasks_per_task
+        self.cross_team_ratio = cross_team_ratio
+        self.complete_ratio = complete_ratio
+        self.batch_size = batch_size
+        self.random = random.Random(seed)
+        self.password = password
+        self.counts = {'teams': 0, 'users': 0, 'tasks': 0, 'subtasks': 0, 'visibilities': 0}
+
+    def run(self, progress=None):
+        with transaction.atomic():
+            offset = Team.objects.filter(name__startswith=TEAM_NAME_PREFIX).count()
+            teams = Team.objects.bulk_create([
+                Team(name=TEAM_NAME.format(index=offset + index)) for index in range(self.teams)
+            ])
+            self.counts['teams'] = len(teams)
+
+        # 해시는 한 번만 계산해 모든 사용자가 같은 비밀번호를 쓴다 (로그인 벤치마크용)
+        password = make_password(self.password)
+        with transaction.atomic():
+            users = User.objects.bulk_create([
+                User(email=USER_EMAIL.format(team=team.id, index=index), password=password, team=team)
+                for team in teams for index in range(self.users_per_team)
+            ], batch_size=self.batch_size)
+            self.counts['users'] = len(users)
+
+        team_ids = [team.id for team in teams]
+        owners = [user for user in users for _ in range(self.tasks_per_user)]
+        for start in range(0, len(owners), self.batch_size):
+            self.create_tasks(owners[start:start + self.batch_size], team_ids)
+            if progress:
+                progress(dict(self.counts))
+
+        team_directory.invalidate()
+        feed_cache.invalidate_teams(team_ids)
+        return dict(self.counts)
+
+    def create_tasks(self, owners, team_ids):
+        now = timezone.now()
+        plans = [[self.plan_subtask(owner.team_id, team_ids) for _ in range(self.subtasks_per_task)] for owner in owners]
+
+        with transaction.atomic():
+            tasks, subtasks = Task.objects.create_with_subtasks(
+                (
+                    Task(create_user_id=owner.id, team_id=owner.team_id,
+                         title=f'벤치마크 업무 {number}', content='벤치마크용으로 생성된 업무입니다.'),
+                    [SubTask(team_id=team_id, is_complete=is_complete, completed_date=now if is_complete else None)
+                     for team_id, is_complete in planned],
+                )
+                for number, (owner, planned) in enumerate(zip(owners, plans), start=self.counts['tasks'] + 1)
+            )
+
+            pairs = {(task.team_id, task.id): task.created_at for task in tasks}
+            for subtask in subtasks:
+                pairs.setdefault((subtask.team_id, subtask.task.id), subtask.task.created_at)
+            TaskTeamVisibility.objects.bulk_create([
+                TaskTeamVisibility(team_id=team_id, task_id=task_id, created_at=created_at)
+                for (team_id, task_id), created_at in pairs.items()
+            ])
+
+        self.counts['tasks'] += len(tasks)
+        self.counts['subtasks'] += len(subtasks)
+        self.counts['visibilities'] += len(pairs)
+
+    def plan_subtask(self, team_id, team_ids):
+        # (담당 팀 id, 완료 여부)
+        if len(team_ids) > 1 and self.random.random() < self.cross_team_ratio:
+            team_id = self.random.choice([other for other in team_ids if other != team_id])
+        return team_id, self.random.random() < self.complete_ratio
@@ -1,8 +1,70 @@
 from rest_framework import serializers
+from django.db import transaction
+from django.db.models import F
 from .models import Team, User, Task, SubTask
 from django.core.validators import EmailValidator, RegexValidator
 from rest_framework.validators import UniqueValidator
 from django.contrib.auth import password_validation
+from wink.signals import deferred_visibility_sync, sync_task_visibility
+from wink.team_directory import team_directory
+from wink.subtask_diff import load_subtasks_for_update, diff_subtasks, apply_subtask_diff
+
+def collect_team_ids(data):
+    # 요청 데이터(중첩 포함)에 있는 모든 team_id 값을 모은다
+    team_ids = set()
+    if isinstance(data, dict):
+        for key, value in data.items():
+            if key == 'team_id':
+                try:
+                    team_ids.add(int(value))
+                except (TypeError, ValueError):
+                    pass
+            else:
+                team_ids |= collect_team_ids(value)
+    elif isinstance(data, (list, tuple)):
+        for item in data:
+            team_ids |= collect_team_ids(item)
+    return team_ids
+
+class TeamResolver:
+    # 요청 하나에서 필요한 팀을 팀 디렉터리 캐시(없으면 id__in 쿼리 한 번)로 조회해 두고 검증 시 재사용한다
+    def __init__(self, team_ids=()):
+        self._pending = set(team_ids)
+        self._resolved = set()
+        self._teams = {}
+
+    def add(self, team_ids):
+        self._pending |= set(team_ids) - self._resolved
+
+    def get(self, team_id):
+        if team_id not in self._resolved:
+            self._pending.add(team_id)
+            self._resolve()
+        return self._teams.get(team_id)
+
+    def _resolve(self):
+        team_ids = self._pending - self._resolved
+        if team_ids:
+            self._teams.update(team_directory.get_many(team_ids))
+            self._resolved |= team_ids
+        self._pending = set()
+
+class TeamIdValidationMixin:
+    # 중첩 serializer는 최상위 serializer의 context를 공유하므로 팀 조회 결과도 요청 단위로 공유된다
+    team_resolver_context_key = 'team_resolver'
+
+    def get_team_resolver(self):
+        resolver = self.context.get(self.team_resolver_context_key)
+        if resolver is None:
+            resolver = TeamResolver(collect_team_ids(getattr(self.root, 'initial_data', None)))
+            self.context[self.team_resolver_context_key] = resolver
+        return resolver
+
+    def get_team(self, team_id):
+        team = self.get_team_resolver().get(team_id)
+        if team is None:
+            raise serializers.ValidationError("팀이 존재하지 않습니다.")
+        return team
 
 class TeamSerializer(serializers.ModelSerializer):
     name = serializers.CharField(max_length=100, required=True)
@@ -11,7 +73,7 @@ class TeamSerializer(serializers.ModelSerializer):
         model = Team
         fields = '__all__'
 
-class UserSignUpSerializer(serializers.ModelSerializer):
+class UserSignUpSerializer(TeamIdValidationMixin, serializers.ModelSerializer):
     team_id = serializers.IntegerField(required=True)
     email = serializers.EmailField(
         validators=[EmailValidator()],
@@ -33,11 +95,7 @@ class UserSignUpSerializer(serializers.ModelSerializer):
     )
 
     def validate_team_id(self, value):
-        try:
-            team = Team.objects.get(id=value)
-        except Team.DoesNotExist:
-            raise serializers.ValidationError("팀이 존재하지 않습니다.")
-        return team
+        return self.get_team(value)
 
     class Meta:
         model = User
@@ -65,14 +123,11 @@ class UserLoginSerializer(serializers.ModelSerializer):
         model = User
         fields = ['email', 'password']
 
-class SubTaskSerializer(serializers.ModelSerializer):
+class SubTaskSerializer(TeamIdValidationMixin, serializers.ModelSerializer):
     team_id = serializers.IntegerField(required=True)
     
     def validate_team_id(self, value):
-        try:
-            team = Team.objects.get(id=value)
-        except Team.DoesNotExist:
-            raise serializers.ValidationError("팀이 존재하지 않습니다.")
+        self.get_team(value)
         return value
 
     class Meta:
@@ -87,17 +142,14 @@ class TaskSerializer(serializers.ModelSerializer):
         model = Task
         fields = '__all__'
 
-class TaskReqSerializer(serializers.ModelSerializer):
+class TaskReqSerializer(TeamIdValidationMixin, serializers.ModelSerializer):
     subtasks = SubTaskSerializer(many=True)
     team_id = serializers.IntegerField(required=True)
     title = serializers.CharField(max_length=255, required=True)
     content = serializers.CharField(required=True)
 
     def validate_team_id(self, value):
-        try:
-            team = Team.objects.get(id=value)
-        except Team.DoesNotExist:
-            raise serializers.ValidationError("팀이 존재하지 않습니다.")
+        self.get_team(value)
         return value 
     
     def validate_title(self, value):
@@ -112,24 +164,37 @@ class TaskReqSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         subtasks_data = validated_data.pop('subtasks')
-        task = Task.objects.create(**validated_data)
-        for subtask_data in subtasks_data:
-            SubTask.objects.create(task=task, **subtask_data)
+        # 업무/하위 업무 생성과 팀 가시성 동기화를 한 트랜잭션으로 처리
+        with transaction.atomic():
+            (task,), _ = Task.objects.create_with_subtasks([
+                (Task(**validated_data), [SubTask(**subtask_data) for subtask_data in subtasks_data])
+            ])
+            sync_task_visibility([task.id])
         return task
 
     class Meta:
         model = Task
         fields = ['title', 'content', 'team_id', 'subtasks', 'team']
 
-class SubTaskUpdateSerializer(serializers.ModelSerializer):
+class SubTaskCompletionItemSerializer(serializers.Serializer):
+    id = serializers.IntegerField()
+    is_complete = serializers.BooleanField()
+
+class SubTaskBulkCompletionReqSerializer(serializers.Serializer):
+    subtasks = SubTaskCompletionItemSerializer(many=True, allow_empty=False, max_length=500)
+
+    def validate_subtasks(self, value):
+        subtask_ids = [item['id'] for item in value]
+        if len(subtask_ids) != len(set(subtask_ids)):
+            raise serializers.ValidationError("같은 하위 업무가 여러 번 포함되어 있습니다.")
+        return value
+
+class SubTaskUpdateSerializer(TeamIdValidationMixin, serializers.ModelSerializer):
     team_id = serializers.IntegerField(required=True)
     id = serializers.IntegerField()
     
     def validate_team_id(self, value):
-        try:
-            team = Team.objects.get(id=value)
-        except Team.DoesNotExist:
-            raise serializers.ValidationError("팀이 존재하지 않습니다.")
+        self.get_team(value)
         return value
 
     class Meta:
@@ -137,17 +202,14 @@ class SubTaskUpdateSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ('is_complete', 'completed_date', 'created_at', 'modified_at', 'task', 'team')
 
-class TaskUpdateReqSerializer(serializers.ModelSerializer):
+class TaskUpdateReqSerializer(TeamIdValidationMixin, serializers.ModelSerializer):
     subtasks = SubTaskUpdateSerializer(many=True)
     team_id = serializers.IntegerField(required=True)
     title = serializers.CharField(max_length=255, required=True)
     content = serializers.CharField(required=True)
 
     def validate_team_id(self, value):
-        try:
-            team = Team.objects.get(id=value)
-        except Team.DoesNotExist:
-            raise serializers.ValidationError("팀이 존재하지 않습니다.")
+        self.get_team(value)
         return value 
     
     def validate_title(self, value):
@@ -160,31 +222,50 @@ class TaskUpdateReqSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError("내용은 빈 문자열일 수 없습니다.")
         return value
 
+    def validate_subtasks(self, value):
+        # 다른 업무의 하위 업무 id 는 다른 검증 오류와 같은 모양(task_errors)으로 돌려준다
+        # (저장 시 잠금 후 diff_subtasks 에서 한 번 더 확인한다)
+        subtask_ids = {subtask_data['id'] for subtask_data in value if subtask_data.get('id')}
+        if subtask_ids and self.instance is not None:
+            found_ids = SubTask.objects.filter(task=self.instance, id__in=subtask_ids).values_list('id', flat=True)
+            unknown_ids = subtask_ids - set(found_ids)
+            if unknown_ids:
+                raise serializers.ValidationError(f'업무에 속하지 않은 하위 업무입니다: {sorted(unknown_ids)}')
+        return value
+
     def update(self, instance, validated_data):
+        # 업무/하위 업무 수정과 팀 가시성 동기화를 한 트랜잭션으로 처리
+        with transaction.atomic(), deferred_visibility_sync():
+            return self._update(instance, validated_data)
+
+    def _update(self, instance, validated_data):
+        subtasks_data = validated_data.get('subtasks')
+        if subtasks_data:
+            existing_subtasks = load_subtasks_for_update(instance)
+
         # Task 업데이트
         instance.team_id = validated_data.get('team_id', instance.team_id)
         instance.title = validated_data.get('title', instance.title)
         instance.content = validated_data.get('content', instance.content)
-        instance.save()
+        # 완료 여부/카운터는 다른 요청이 UPDATE 로 바꾸므로 요청으로 바뀌는 필드만 저장
+        instance.save(update_fields=['team', 'title', 'content', 'modified_at'])
 
-        # SubTask 업데이트
-        subtasks_data = validated_data.get('subtasks')
+        # SubTask 업데이트: 메모리에서 계산한 변경분을 일괄 반영
         if subtasks_data:
-            subtask_ids_to_keep = [subtask_data.get('id') for subtask_data in subtasks_data if subtask_data.get('id')]
-            # 기존 미완료 서브 업무 중 IDs_to_keep 목록에 없는 것들 삭제
-            SubTask.objects.filter(task=instance, is_complete=False).exclude(id__in=subtask_ids_to_keep).delete()
-
-            for subtask_data in subtasks_data:
-                subtask_id = subtask_data.get('id')
-                if subtask_id:
-                    subtask = SubTask.objects.get(id=subtask_id, task=instance)
-                    # 서브 업무 업데이트 로직 추가
-                    if not subtask.is_complete :
-                        subtask.team_id = subtask_data.get('team_id')
-                        subtask.save()
-                else:
-                    # 새로운 서브 업무 생성 로직 추가
-                    SubTask.objects.create(task=instance, **subtask_data)
+            diff = diff_subtasks(instance, existing_subtasks, subtasks_data)
+            subtasks = apply_subtask_diff(diff)
+            # 생성/삭제되는 하위 업무는 모두 미완료이므로 전체/미완료 카운터를 같은 만큼 증감하고
+            # 같은 UPDATE 에서 완료 여부도 다시 계산한다 (미완료 하위 업무가 추가/모두 삭제되면 바뀐다)
+            if diff.to_create or diff.to_delete:
+                delta = len(diff.to_create) - len(diff.to_delete)
+                Task.objects.filter(pk=instance.pk).refresh_completion(
+                    subtask_total=F('subtask_total') + delta, subtask_open=F('subtask_open') + delta,
+                )
+                instance.refresh_from_db(
+                    fields=['subtask_total', 'subtask_open', 'is_complete', 'completed_date', 'modified_at'],
+                )
+            # 응답 직렬화 시 하위 업무를 다시 조회하지 않도록 prefetch 캐시를 채워둔다
+            instance._prefetched_objects_cache = {'subtasks': subtasks}
 
         return instance
 
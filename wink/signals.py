@@ -0,0 +1,122 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.core.signals import request_started
+from django.db import transaction
+from django.db.models import F, QuerySet
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from wink.models import SubTask, Task, TaskTeamVisibility, Team, User
+from wink.authentication import invalidate_users
+from wink.team_directory import team_directory
+from wink import feed_cache, metrics
+
+# deferred_visibility_sync() 블록 안에서 변경된 업무 id 모음
+_pending_task_ids = ContextVar('wink_pending_visibility_task_ids', default=None)
+
+
+@contextmanager
+def deferred_visibility_sync():
+    # 블록 안의 업무/하위 업무 저장은 표시만 해두고, 블록이 정상 종료될 때 한 번에 동기화한다
+    # 호출하는 쪽에서 transaction.atomic() 안에 두어야 쓰기와 동기화가 같은 트랜잭션으로 묶인다
+    if _pending_task_ids.get() is not None:
+        yield
+        return
+
+    pending = set()
+    token = _pending_task_ids.set(pending)
+    try:
+        yield
+    finally:
+        _pending_task_ids.reset(token)
+    sync_task_visibility(pending)
+
+
+def sync_task_visibility(task_ids):
+    # 가시성 행을 맞추고, 변경 전후로 업무를 볼 수 있던 팀들의 업무 리스트 캐시를 무효화
+    result = TaskTeamVisibility.objects.sync(task_ids)
+    feed_cache.invalidate_teams(result[2])
+    return result
+
+
+def mark_task_visibility_dirty(task_id):
+    if task_id is None:
+        return
+    pending = _pending_task_ids.get()
+    if pending is None:
+        sync_task_visibility([task_id])
+    else:
+        pending.add(task_id)
+
+
+@receiver(post_save, sender=Task)
+def task_saved(sender, instance, raw=False, **kwargs):
+    if not raw:
+        mark_task_visibility_dirty(instance.pk)
+
+
+@receiver(post_save, sender=SubTask)
+def subtask_saved(sender, instance, created=False, raw=False, **kwargs):
+    if raw:
+        return
+    if created and instance.task_id is not None:
+        # 하나씩 생성된 하위 업무도 상위 업무 카운터/완료 여부에 반영 (bulk_create 경로는 호출하는 쪽에서 직접 반영)
+        open_delta = 0 if instance.is_complete else 1
+        Task.objects.filter(pk=instance.task_id).refresh_completion(
+            subtask_total=F('subtask_total') + 1, subtask_open=F('subtask_open') + open_delta,
+        )
+    mark_task_visibility_dirty(instance.task_id)
+
+
+@receiver(post_delete, sender=SubTask)
+def subtask_deleted(sender, instance, origin=None, **kwargs):
+    # admin, shell, QuerySet.delete() 등 API 밖에서 지운 하위 업무도 카운터/완료 여부/가시성에 반영한다
+    # API 경로(deferred_visibility_sync 블록 안)는 같은 트랜잭션에서 직접 반영하므로 건너뛴다
+    if _pending_task_ids.get() is not None or instance.task_id is None:
+        return
+    # 업무 삭제에 따른 CASCADE 삭제라면 업무와 가시성 행도 함께 삭제되므로 건너뛴다
+    if isinstance(origin, Task) or (isinstance(origin, QuerySet) and origin.model is Task):
+        return
+    Task.objects.filter(pk=instance.task_id).refresh_completion(
+        subtask_total=F('subtask_total') - 1,
+        subtask_open=F('subtask_open') - (0 if instance.is_complete else 1),
+    )
+    mark_task_visibility_dirty(instance.task_id)
+
+
+@receiver(pre_delete, sender=Task)
+def task_deleting(sender, instance, **kwargs):
+    # 업무 삭제 시 가시성 행은 CASCADE로 지워지므로, 지워지기 전에 볼 수 있던 팀의 캐시를 무효화
+    feed_cache.invalidate_teams(
+        TaskTeamVisibility.objects.filter(task_id=instance.pk).values_list('team_id', flat=True)
+    )
+
+
+@receiver(post_save, sender=Team)
+@receiver(post_delete, sender=Team)
+def team_changed(sender, instance, raw=False, **kwargs):
+    # 커밋 전에 다른 요청이 이전 값으로 캐시를 채울 수 있으므로 커밋 후에도 한 번 더 비운다
+    team_directory.invalidate()
+    transaction.on_commit(team_directory.invalidate)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, raw=False, **kwargs):
+    # 비활성화/팀 변경이 토큰 검증에 바로 반영되도록 사용자 캐시를 비운다
+    invalidate_users([instance.pk])
+
+
+@receiver(post_save, sender=Team)
+@receiver(pre_delete, sender=Team)
+def team_members_changed(sender, instance, raw=False, **kwargs):
+    # 캐시된 사용자 객체에 팀이 함께 들어 있으므로 팀 변경 시 소속 사용자 캐시도 비운다
+    # (팀 삭제 시 사용자의 team 은 시그널 없이 NULL 이 되므로 삭제 전에 처리)
+    if raw:
+        return
+    invalidate_users(User.objects.filter(team_id=instance.pk).values_list('id', flat=True))
+
+
+# 워커 프로세스마다 첫 요청에서 지표 파일 기록 스레드를 띄운다 (METRICS_DIR 설정 시)
+request_started.connect(metrics.ensure_flusher, dispatch_uid='wink_metrics_flusher')
@@ -0,0 +1,62 @@
+from collections import namedtuple
+
+from django.utils import timezone
+from rest_framework import serializers
+
+from wink.models import SubTask, Task
+
+SubTaskDiff = namedtuple('SubTaskDiff', ['to_create', 'to_update', 'to_delete', 'kept'])
+
+
+def load_subtasks_for_update(task):
+    # 상위 업무 행을 먼저 잠가 같은 업무를 동시에 수정하는 요청을 직렬화하고,
+    # 기존 하위 업무는 한 번의 쿼리로 잠금과 함께 읽는다
+    Task.objects.select_for_update().filter(pk=task.pk).values_list('pk', flat=True).first()
+    return list(SubTask.objects.select_for_update().filter(task=task).order_by('id'))
+
+
+def diff_subtasks(task, existing, subtasks_data):
+    # 요청의 하위 업무 목록과 기존 하위 업무를 메모리에서 비교해 생성/수정/삭제 대상을 계산
+    # - id 없는 항목: 생성
+    # - id 있는 미완료 항목: 팀이 바뀌었으면 수정 (완료된 항목은 수정 불가)
+    # - 요청에 없는 미완료 항목: 삭제 (완료된 항목은 삭제 불가)
+    existing_by_id = {subtask.id: subtask for subtask in existing}
+    keep_ids = {subtask_data['id'] for subtask_data in subtasks_data if subtask_data.get('id')}
+
+    # 요청 검증(TaskUpdateReqSerializer.validate_subtasks) 이후 잠금 전에 하위 업무가 지워진 경우
+    unknown_ids = keep_ids - existing_by_id.keys()
+    if unknown_ids:
+        raise serializers.ValidationError({
+            'subtasks': f'업무에 속하지 않은 하위 업무입니다: {sorted(unknown_ids)}'
+        })
+
+    now = timezone.now()
+    to_create = []
+    to_update = []
+    for subtask_data in subtasks_data:
+        subtask_id = subtask_data.get('id')
+        if not subtask_id:
+            to_create.append(SubTask(task=task, team_id=subtask_data.get('team_id')))
+            continue
+
+        subtask = existing_by_id[subtask_id]
+        team_id = subtask_data.get('team_id', subtask.team_id)
+        if not subtask.is_complete and subtask.team_id != team_id:
+            subtask.team_id = team_id
+            # bulk_update는 auto_now를 적용하지 않으므로 직접 갱신
+            subtask.modified_at = now
+            to_update.append(subtask)
+
+    to_delete = [subtask for subtask in existing if not subtask.is_complete and subtask.id not in keep_ids]
+    kept = [subtask for subtask in existing if subtask.is_complete or subtask.id in keep_ids]
+    return SubTaskDiff(to_create=to_create, to_update=to_update, to_delete=to_delete, kept=kept)
+
+
+def apply_subtask_diff(diff):
+    # DELETE 한 번, UPDATE 한 번, INSERT 한 번으로 반영하고 반영 후의 하위 업무 목록을 반환
+    if diff.to_delete:
+        SubTask.objects.filter(id__in=[subtask.id for subtask in diff.to_delete]).delete()
+    if diff.to_update:
+        SubTask.objects.bulk_update(diff.to_update, fields=['team', 'modified_at'])
+    created = SubTask.objects.bulk_create(diff.to_create) if diff.to_create else []
+    return sorted(diff.kept + created, key=lambda subtask: subtask.id)
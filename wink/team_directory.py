@@ -0,0 +1,137 @@
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError
+from django.utils import timezone
+
+from wink.models import Team
+
+logger = logging.getLogger(__name__)
+
+
+class LocalSnapshot:
+    # 프로세스 내에 값 하나를 ttl 초 동안 보관한다. 다른 프로세스의 변경은 ttl 이 지나야 반영된다
+    # (만료 시각, 값) 튜플을 통째로 바꾸므로 읽기/쓰기에 잠금이 필요 없다
+    def __init__(self, ttl=5):
+        self.ttl = ttl
+        self._entry = None
+
+    def get(self):
+        entry = self._entry
+        if entry is None or entry[0] < time.monotonic():
+            return None
+        return entry[1]
+
+    def set(self, value):
+        self._entry = (time.monotonic() + self.ttl, value)
+
+    def clear(self):
+        self._entry = None
+
+
+class TeamDirectory:
+    # 팀 목록 2단 캐시: 프로세스 내 스냅샷 -> Django 캐시(locmem/Redis) -> DB
+    # Team 저장/삭제 시그널에서 invalidate() 된다. 무효화는 그 요청을 처리한 워커의 locmem 에만 반영되므로
+    # REDIS_URL 이 없으면 TEAM_DIRECTORY_CACHE_TIMEOUT 을 짧게 두어 다른 워커도 곧 새 목록을 읽게 한다
+    cache_key = 'wink:team_directory:v1'
+
+    def __init__(self):
+        self.local = LocalSnapshot(ttl=getattr(settings, 'TEAM_DIRECTORY_LOCAL_TTL', 5))
+        self.counters = {'local_hits': 0, 'shared_hits': 0, 'misses': 0, 'db_fallbacks': 0}
+        # gthread 워커의 여러 스레드가 함께 증가시킨다
+        self._counters_lock = threading.Lock()
+
+    def _count(self, event):
+        with self._counters_lock:
+            self.counters[event] += 1
+
+    def snapshot(self):
+        # {'teams': {id: name}, 'loaded_at': datetime}
+        snapshot = self.local.get()
+        if snapshot is not None:
+            self._count('local_hits')
+            return snapshot
+
+        snapshot = cache.get(self.cache_key)
+        if snapshot is not None:
+            self._count('shared_hits')
+        else:
+            self._count('misses')
+            snapshot = self._load()
+            cache.set(self.cache_key, snapshot, getattr(settings, 'TEAM_DIRECTORY_CACHE_TIMEOUT', 300))
+        self.local.set(snapshot)
+        return snapshot
+
+    async def asnapshot(self):
+        # async 뷰용. 캐시/DB 조회를 await 한다
+        snapshot = self.local.get()
+        if snapshot is not None:
+            self._count('local_hits')
+            return snapshot
+
+        snapshot = await cache.aget(self.cache_key)
+        if snapshot is not None:
+            self._count('shared_hits')
+        else:
+            self._count('misses')
+            snapshot = {
+                'teams': {team_id: name async for team_id, name in Team.objects.order_by('id').values_list('id', 'name')},
+                'loaded_at': timezone.now(),
+            }
+            await cache.aset(self.cache_key, snapshot, getattr(settings, 'TEAM_DIRECTORY_CACHE_TIMEOUT', 300))
+        self.local.set(snapshot)
+        return snapshot
+
+    def all(self):
+        # TeamSerializer(many=True) 와 같은 모양
+        return [{'id': team_id, 'name': name} for team_id, name in self.snapshot()['teams'].items()]
+
+    async def aall(self):
+        return [{'id': team_id, 'name': name} for team_id, name in (await self.asnapshot())['teams'].items()]
+
+    def get_many(self, team_ids):
+        # {id: Team}. 캐시에 없는 id는 방금 생성된 팀일 수 있으므로 DB에서 한 번 더 확인한다
+        teams = self.snapshot()['teams']
+        found = {
+            team_id: Team.from_db(None, ['id', 'name'], (team_id, teams[team_id]))
+            for team_id in team_ids if team_id in teams
+        }
+        unknown_ids = set(team_ids) - found.keys()
+        if unknown_ids:
+            self._count('db_fallbacks')
+            found.update(Team.objects.in_bulk(unknown_ids))
+        return found
+
+    def invalidate(self):
+        self.local.clear()
+        cache.delete(self.cache_key)
+
+    def warm(self):
+        try:
+            self.snapshot()
+        except DatabaseError:
+            logger.warning('팀 디렉터리 캐시를 미리 채우지 못했습니다.', exc_info=True)
+
+    def stats(self):
+        with self._counters_lock:
+            counters = dict(self.counters)
+        lookups = counters['local_hits'] + counters['shared_hits'] + counters['misses']
+        counters['hit_ratio'] = (counters['local_hits'] + counters['shared_hits']) / lookups if lookups else 0.0
+        return counters
+
+    def _load(self):
+        return {
+            'teams': dict(Team.objects.order_by('id').values_list('id', 'name')),
+            'loaded_at': timezone.now(),
+        }
+
+
+team_directory = TeamDirectory()
+
+
+def warm_on_startup():
+    if getattr(settings, 'TEAM_DIRECTORY_WARM_ON_STARTUP', False):
+        team_directory.warm()
@@ -0,0 +1,81 @@
+import json
+from contextlib import contextmanager
+
+from django.db import connections
+
+# 이 테이블을 순차 스캔하면 실패로 본다 (테이블 행 수가 row_threshold 를 넘을 때)
+SEQ_SCAN_TABLES = ('wink_task', 'wink_subtask')
+SEQ_SCAN_ROW_THRESHOLD = 1000
+
+# 실행 계획을 확인할 문장 (INSERT 등은 스캔이 없으므로 제외)
+EXPLAINABLE = ('SELECT', 'UPDATE', 'DELETE', 'WITH')
+# 쿼리 수에 넣지 않는 트랜잭션 제어 문장
+TRANSACTION_CONTROL = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT')
+
+
+class QueryPlanRecorder:
+    # connection.execute_wrapper 로 등록해 실행된 쿼리를 모으고, 나중에 EXPLAIN (FORMAT JSON) 으로 실행 계획을 확인한다
+    def __init__(self, using='default'):
+        self.connection = connections[using]
+        self.statements = []
+
+    def __call__(self, execute, sql, params, many, context):
+        if not sql.lstrip().upper().startswith(TRANSACTION_CONTROL):
+            self.statements.append((sql, params))
+        return execute(sql, params, many, context)
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def plans(self):
+        # [(sql, 실행 계획 JSON)]. 실행하지 않고 계획만 세우므로 UPDATE/DELETE 도 안전하다
+        plans = []
+        with self.connection.cursor() as cursor:
+            for sql, params in self.statements:
+                if not sql.lstrip().upper().startswith(EXPLAINABLE):
+                    continue
+                cursor.execute(f'EXPLAIN (FORMAT JSON) {sql}', params)
+                plan = cursor.fetchone()[0]
+                plans.append((sql, json.loads(plan) if isinstance(plan, str) else plan))
+        return plans
+
+    def table_rows(self, tables):
+        # 통계상 행 수 (pg_class.reltuples). 테스트 데이터 생성 후 ANALYZE 해야 정확하다
+        with self.connection.cursor() as cursor:
+            cursor.execute('SELECT relname, reltuples FROM pg_class WHERE relname = ANY(%s)', [list(tables)])
+            return {name: rows for name, rows in cursor.fetchall()}
+
+    def seq_scans(self, tables=SEQ_SCAN_TABLES, row_threshold=SEQ_SCAN_ROW_THRESHOLD):
+        # [(sql, 테이블, 테이블 행 수)]
+        table_rows = self.table_rows(tables)
+        found = []
+        for sql, plan in self.plans():
+            for node in iter_plan_nodes(plan[0]['Plan']):
+                table = node.get('Relation Name')
+                if node['Node Type'] == 'Seq Scan' and table in tables and table_rows.get(table, 0) > row_threshold:
+                    found.append((sql, table, table_rows[table]))
+        return found
+
+
+def iter_plan_nodes(node):
+    yield node
+    for child in node.get('Plans', []):
+        yield from iter_plan_nodes(child)
+
+
+@contextmanager
+def assert_query_plans(max_queries, tables=SEQ_SCAN_TABLES, row_threshold=SEQ_SCAN_ROW_THRESHOLD, using='default'):
+    # 블록 안의 쿼리 수가 max_queries 이하이고, 큰 테이블을 순차 스캔하는 쿼리가 없는지 확인한다
+    recorder = QueryPlanRecorder(using)
+    with recorder.connection.execute_wrapper(recorder):
+        yield recorder
+
+    problems = []
+    if recorder.count > max_queries:
+        problems.append(f'쿼리 {recorder.count}개 실행 (최대 {max_queries}개)')
+        problems += [f'  {sql}' for sql, _ in recorder.statements]
+    for sql, table, rows in recorder.seq_scans(tables, row_threshold):
+        problems.append(f'{table} 순차 스캔 (약 {rows:.0f}행): {sql}')
+    if problems:
+        raise AssertionError('\n'.join(problems))
@@ -1,8 +1,41 @@
-from django.test import TestCase
-from .models import Task, SubTask, Team, User
-from rest_framework.test import APITestCase
+import csv
+import datetime
+import decimal
+import gzip
+import io
+import json
+import os
+import tempfile
+import threading
+import uuid
+from io import StringIO
+from django.test import TestCase, TransactionTestCase
+from django.db import OperationalError, connection, connections
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from .models import Task, SubTask, Team, User, TaskTeamVisibility
+from .team_directory import LocalSnapshot, team_directory
+from .views import TasksView
+from .async_views import AsyncTasksView, AsyncTeamsView
+from . import feed_cache, instrumentation, metrics, seeding
+from .testing import assert_query_plans
+from .renderers import ORJSONRenderer
+from .parsers import ORJSONParser
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+from .authentication import CachedJWTAuthentication
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.tokens import RefreshToken
+from django.core.cache import cache
+from django.contrib.auth.hashers import make_password
+from django.test import override_settings
+from rest_framework.test import APIRequestFactory, APITestCase, force_authenticate
+from asgiref.sync import async_to_sync, iscoroutinefunction, sync_to_async
 from rest_framework import status
-from django.urls import reverse
+from django.urls import resolve, reverse
 
 class CreateTaskAPITestCase(APITestCase):
     def setUp(self):
@@ -155,6 +188,64 @@ class CreateTaskAPITestCase(APITestCase):
         completed_date_null_count = sum(1 for subtask in response.data['subtasks'] if not subtask['completed_date'])
         self.assertEqual(completed_date_null_count, 2)
 
+    def test_create_task_with_bulk_subtasks(self):
+        data = {
+            'task': {
+                'team_id': self.team.id,
+                'title': 'Task Title',
+                'content': 'Task Content',
+                'subtasks': [{'team_id': self.other_team.id} for _ in range(20)],
+            },
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/v1/api/tasks', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        # 하위 업무는 INSERT 한 번으로 생성되고, 응답을 위해 다시 조회하지 않아야 함
+        subtask_inserts = [q for q in queries if q['sql'].startswith('INSERT INTO "wink_subtask"')]
+        subtask_selects = [q for q in queries if q['sql'].startswith('SELECT') and 'FROM "wink_subtask"' in q['sql']]
+        self.assertEqual(len(subtask_inserts), 1)
+        self.assertEqual(len(subtask_selects), 1)  # 팀 가시성 동기화
+
+        subtask_ids = [subtask['id'] for subtask in response.data['subtasks']]
+        self.assertEqual(len(subtask_ids), 20)
+        self.assertEqual(
+            set(SubTask.objects.filter(task_id=response.data['id']).values_list('id', flat=True)),
+            set(subtask_ids),
+        )
+
+    def test_create_task_validates_teams_in_one_query(self):
+        data = {
+            'task': {
+                'team_id': self.team.id,
+                'title': 'Task Title',
+                'content': 'Task Content',
+                'subtasks': [{'team_id': team.id} for team in [self.team, self.other_team] * 10],
+            },
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/v1/api/tasks', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        team_selects = [q for q in queries if q['sql'].startswith('SELECT') and 'FROM "wink_team"' in q['sql']]
+        self.assertLessEqual(len(team_selects), 1)
+
+    def test_create_task_reports_invalid_subtask_team_per_field(self):
+        data = {
+            'task': {
+                'team_id': self.team.id,
+                'title': 'Task Title',
+                'content': 'Task Content',
+                'subtasks': [{'team_id': self.team.id}, {'team_id': 9999}],
+            },
+        }
+        response = self.client.post('/v1/api/tasks', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        subtask_errors = response.data['task_errors']['subtasks']
+        self.assertEqual(subtask_errors[0], {})
+        self.assertIn('team_id', subtask_errors[1])
+
 class SelectTaskAPITestCase(APITestCase):
     def setUp(self):
         self.team = Team.objects.create(name='단비')
@@ -213,6 +304,17 @@ class SelectTaskAPITestCase(APITestCase):
         self.assertEqual(response.data[1]['title'], 'My Team Task 2')
         self.assertEqual(response.data[2]['title'], 'My Team Task 1')
 
+    def test_select_task_list_without_duplicates(self):
+        # 우리 팀 하위 업무가 여러 개인 다른 팀 업무도 한 번만 조회되어야 함
+        other_team_task = Task.objects.create(team=self.other_team, title='Other Team Task', content='Task Content')
+        SubTask.objects.create(team=self.team, task=other_team_task)
+        SubTask.objects.create(team=self.team, task=other_team_task)
+
+        response = self.client.get('/v1/api/tasks')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(len(response.data[0]['subtasks']), 2)
+
 class UpdateTaskAPITestCase(APITestCase):
     def setUp(self):
         self.team = Team.objects.create(name='단비')
@@ -350,6 +452,49 @@ class UpdateTaskAPITestCase(APITestCase):
         response = self.client.patch(f'/v1/api/tasks/{task_id}')
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
 
+    def test_patch_task_applies_subtask_diff_in_batches(self):
+        task = Task.objects.create(create_user=self.user, team=self.team, title='Task', content='Task Content')
+        subtasks = [SubTask.objects.create(team=self.team, task=task) for _ in range(30)]
+        data = {
+            'task': {
+                'team_id': self.team.id,
+                'title': 'Task',
+                'content': 'Task Content',
+                'subtasks': [{'id': subtask.id, 'team_id': self.other_team.id} for subtask in subtasks[:20]]
+                + [{'team_id': self.other_team.id} for _ in range(5)],
+            },
+        }
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(f'/v1/api/tasks/{task.id}', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # 하위 업무 변경은 DELETE/UPDATE/INSERT 각 한 번씩으로 반영되어야 함
+        statements = [q['sql'] for q in queries]
+        self.assertEqual(len([sql for sql in statements if sql.startswith('DELETE FROM "wink_subtask"')]), 1)
+        self.assertEqual(len([sql for sql in statements if sql.startswith('UPDATE "wink_subtask"')]), 1)
+        self.assertEqual(len([sql for sql in statements if sql.startswith('INSERT INTO "wink_subtask"')]), 1)
+
+        self.assertEqual(len(response.data['subtasks']), 25)
+        self.assertEqual(SubTask.objects.filter(task=task, team=self.other_team).count(), 25)
+
+    def test_patch_task_with_subtask_of_other_task(self):
+        task = Task.objects.create(create_user=self.user, team=self.team, title='Task', content='Task Content')
+        other_task = Task.objects.create(create_user=self.user, team=self.team, title='Other', content='Other Content')
+        other_subtask = SubTask.objects.create(team=self.team, task=other_task)
+        data = {
+            'task': {
+                'team_id': self.team.id,
+                'title': 'Task',
+                'content': 'Task Content',
+                'subtasks': [{'id': other_subtask.id, 'team_id': self.other_team.id}],
+            },
+        }
+        response = self.client.patch(f'/v1/api/tasks/{task.id}', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('subtasks', response.data['task_errors'])
+        other_subtask.refresh_from_db()
+        self.assertEqual(other_subtask.team_id, self.team.id)
+
 class DeleteTaskAPITestCase(APITestCase):
     def setUp(self):
         self.team = Team.objects.create(name='단비')
@@ -393,3 +538,1483 @@ class DeleteTaskAPITestCase(APITestCase):
 
 
 
+class TaskCursorPaginationAPITestCase(APITestCase):
+    def setUp(self):
+        self.team = Team.objects.create(name='단비')
+        self.user = User.objects.create_user(email='testuser', password='testpassword', team=self.team)
+        self.client.force_authenticate(user=self.user)
+        for i in range(5):
+            Task.objects.create(team=self.team, title=f'Task {i}', content='Task Content')
+
+    def test_walk_pages_with_cursor(self):
+        response = self.client.get('/v1/api/tasks', {'page_size': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNone(response.data['previous'])
+
+        titles = [task['title'] for task in response.data['results']]
+        next_link = response.data['next']
+        while next_link:
+            response = self.client.get(next_link)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            titles += [task['title'] for task in response.data['results']]
+            next_link = response.data['next']
+
+        # 최근 것부터 중복/누락 없이 조회되어야 함
+        self.assertEqual(titles, ['Task 4', 'Task 3', 'Task 2', 'Task 1', 'Task 0'])
+
+        # 마지막 페이지에서 이전 페이지로 돌아가기
+        response = self.client.get(response.data['previous'])
+        self.assertEqual([task['title'] for task in response.data['results']], ['Task 2', 'Task 1'])
+
+    def test_without_cursor_params_returns_list(self):
+        response = self.client.get('/v1/api/tasks')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 5)
+
+    def test_invalid_cursor(self):
+        response = self.client.get('/v1/api/tasks', {'cursor': 'invalid'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+class TaskListQueryCountTestCase(APITestCase):
+    def setUp(self):
+        self.team = Team.objects.create(name='단비')
+        self.other_team = Team.objects.create(name='다래')
+        self.user = User.objects.create_user(email='testuser', password='testpassword', team=self.team)
+        self.client.force_authenticate(user=self.user)
+
+    def create_tasks(self, count):
+        for i in range(count):
+            task = Task.objects.create(create_user=self.user, team=self.team, title=f'Task {i}', content='Task Content')
+            SubTask.objects.create(team=self.team, task=task)
+            SubTask.objects.create(team=self.other_team, task=task)
+
+    def test_task_list_query_count_is_constant(self):
+        # ETag 검증값 + 업무 + 서브 업무(prefetch) 3개 쿼리로 고정되어야 함
+        self.create_tasks(2)
+        with self.assertNumQueries(3):
+            response = self.client.get('/v1/api/tasks')
+        self.assertEqual(len(response.data), 2)
+
+        self.create_tasks(10)
+        with self.assertNumQueries(3):
+            response = self.client.get('/v1/api/tasks')
+        self.assertEqual(len(response.data), 12)
+
+    def test_paginated_task_list_query_count_is_constant(self):
+        self.create_tasks(12)
+        with self.assertNumQueries(3):
+            response = self.client.get('/v1/api/tasks', {'page_size': 5})
+        with self.assertNumQueries(3):
+            self.client.get(response.data['next'])
+
+class TaskTeamVisibilityTestCase(APITestCase):
+    def setUp(self):
+        self.team = Team.objects.create(name='단비')
+        self.other_team = Team.objects.create(name='다래')
+        self.third_team = Team.objects.create(name='머루')
+        self.user = User.objects.create_user(email='testuser', password='testpassword', team=self.team)
+        self.client.force_authenticate(user=self.user)
+
+    def visible_pairs(self, task_id):
+        return set(TaskTeamVisibility.objects.filter(task_id=task_id).values_list('team_id', flat=True))
+
+    def test_visibility_follows_task_writes(self):
+        data = {
+            'task': {
+                'team_id': self.team.id,
+                'title': 'Task Title',
+                'content': 'Task Content',
+                'subtasks': [{'team_id': self.other_team.id}],
+            },
+        }
+        response = self.client.post('/v1/api/tasks', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        task_id = response.data['id']
+        subtask_id = response.data['subtasks'][0]['id']
+        self.assertEqual(self.visible_pairs(task_id), {self.team.id, self.other_team.id})
+
+        # 하위 업무 팀 변경
+        data['task']['subtasks'] = [{'id': subtask_id, 'team_id': self.third_team.id}]
+        response = self.client.patch(f'/v1/api/tasks/{task_id}', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.visible_pairs(task_id), {self.team.id, self.third_team.id})
+
+        # 하위 업무 삭제
+        response = self.client.delete(f'/v1/api/subtasks/{subtask_id}')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertEqual(self.visible_pairs(task_id), {self.team.id})
+
+        # 업무 삭제
+        self.client.delete(f'/v1/api/tasks/{task_id}')
+        self.assertEqual(self.visible_pairs(task_id), set())
+
+    def test_subtask_delete_outside_api(self):
+        # admin/shell 의 QuerySet.delete() 도 가시성/카운터/완료 여부에 반영되어야 함
+        task = Task.objects.create(team=self.team, title='Task', content='Task Content')
+        done = SubTask.objects.create(team=self.team, task=task, is_complete=True)
+        SubTask.objects.create(team=self.other_team, task=task)
+        SubTask.objects.create(team=self.third_team, task=task)
+        self.assertEqual(self.visible_pairs(task.id), {self.team.id, self.other_team.id, self.third_team.id})
+
+        SubTask.objects.filter(task=task).exclude(id=done.id).delete()
+        self.assertEqual(self.visible_pairs(task.id), {self.team.id})
+        task.refresh_from_db()
+        self.assertEqual((task.subtask_total, task.subtask_open, task.is_complete), (1, 0, True))
+        self.assertFalse(Task.objects.subtask_counter_mismatches().exists())
+        call_command('check_task_visibility', stdout=StringIO())
+
+    def test_check_and_rebuild_commands(self):
+        task = Task.objects.create(team=self.team, title='Task', content='Task Content')
+        SubTask.objects.create(team=self.other_team, task=task)
+        call_command('check_task_visibility', stdout=StringIO())
+
+        TaskTeamVisibility.objects.filter(task=task, team=self.other_team).delete()
+        with self.assertRaises(CommandError):
+            call_command('check_task_visibility', stdout=StringIO())
+
+        call_command('rebuild_task_visibility', stdout=StringIO())
+        self.assertEqual(self.visible_pairs(task.id), {self.team.id, self.other_team.id})
+        call_command('check_task_visibility', stdout=StringIO())
+
+class TeamDirectoryTestCase(APITestCase):
+    def setUp(self):
+        self.team = Team.objects.create(name='단비')
+        self.user = User.objects.create_user(email='testuser', password='testpassword', team=self.team)
+        self.client.force_authenticate(user=self.user)
+
+    def test_team_list_reads_through_cache(self):
+        response = self.client.get('/v1/api/teams/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn({'id': self.team.id, 'name': '단비'}, response.data)
+
+        # 두 번째 조회부터는 DB를 읽지 않아야 함
+        with self.assertNumQueries(0):
+            self.client.get('/v1/api/teams/')
+
+    def test_team_save_invalidates_cache(self):
+        self.client.get('/v1/api/teams/')
+        team = Team.objects.create(name='다래')
+        response = self.client.get('/v1/api/teams/')
+        self.assertIn({'id': team.id, 'name': '다래'}, response.data)
+
+        team.name = '머루'
+        team.save()
+        response = self.client.get('/v1/api/teams/')
+        self.assertIn({'id': team.id, 'name': '머루'}, response.data)
+
+        team.delete()
+        response = self.client.get('/v1/api/teams/')
+        self.assertNotIn(team.id, [item['id'] for item in response.data])
+
+    def test_stats(self):
+        team_directory.invalidate()
+        before = team_directory.stats()
+        team_directory.get_many([self.team.id])
+        team_directory.get_many([self.team.id])
+        after = team_directory.stats()
+        self.assertEqual(after['misses'] - before['misses'], 1)
+        self.assertEqual(after['local_hits'] - before['local_hits'], 1)
+
+    def test_counters_from_threads(self):
+        team_directory.snapshot()
+        before = team_directory.stats()['local_hits']
+
+        def lookups():
+            for _ in range(500):
+                team_directory.snapshot()
+
+        threads = [threading.Thread(target=lookups) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(team_directory.stats()['local_hits'] - before, 4000)
+
+    def test_local_snapshot_expires(self):
+        local = LocalSnapshot(ttl=60)
+        self.assertIsNone(local.get())
+        local.set({'teams': {}})
+        self.assertEqual(local.get(), {'teams': {}})
+
+        # ttl 이 지나면 다시 읽어야 함 (다른 워커의 변경이 반영되는 시점)
+        local.ttl = -1
+        local.set({'teams': {}})
+        self.assertIsNone(local.get())
+
+class ConditionalGetTestCase(APITestCase):
+    def setUp(self):
+        self.team = Team.objects.create(name='단비')
+        self.user = User.objects.create_user(email='testuser', password='testpassword', team=self.team)
+        self.client.force_authenticate(user=self.user)
+        self.task = Task.objects.create(create_user=self.user, team=self.team, title='Task', content='Task Content')
+        SubTask.objects.create(team=self.team, task=self.task)
+
+    def test_task_list_etag(self):
+        response = self.client.get('/v1/api/tasks')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        response = self.client.get('/v1/api/tasks', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(response.content, b'')
+
+        # 페이지 파라미터가 다르면 다른 ETag
+        response = self.client.get('/v1/api/tasks', {'page_size': 1}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # 하위 업무 삭제 후에는 새로 내려줘야 함
+        SubTask.objects.filter(task=self.task).delete()
+        response = self.client.get('/v1/api/tasks', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_task_list_etag_counts_subtasks(self):
+        # 최신이 아닌 하위 업무가 카운터를 거치지 않고 지워져도 ETag 가 바뀌어야 함
+        older = self.task.subtasks.get()
+        SubTask.objects.create(team=self.team, task=self.task)
+        etag = self.client.get('/v1/api/tasks')['ETag']
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM wink_subtask WHERE id = %s', [older.id])
+        response = self.client.get('/v1/api/tasks', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data[0]['subtasks']), 1)
+
+    def test_page_etag_reads_only_the_page(self):
+        for i in range(4):
+            Task.objects.create(create_user=self.user, team=self.team, title=f'Task {i}', content='Task Content')
+        first = self.client.get('/v1/api/tasks', {'page_size': 2})
+        next_url = first.data['next']
+
+        # 검증값은 요청한 페이지(다음 페이지 확인용 한 건 포함)의 행만 읽는다
+        with CaptureQueriesContext(connection) as queries:
+            page = self.client.get(next_url)
+        self.assertIn('LIMIT 3', queries[0]['sql'])
+        self.assertNotIn('SUM(', queries[0]['sql'])
+        response = self.client.get(next_url, HTTP_IF_NONE_MATCH=page['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # 앞 페이지에 새 업무가 생겨도 keyset 페이지의 본문은 같으므로 304, 페이지 안의 업무가 바뀌면 200
+        Task.objects.create(create_user=self.user, team=self.team, title='Task 4', content='Task Content')
+        response = self.client.get(next_url, HTTP_IF_NONE_MATCH=page['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        Task.objects.filter(id=page.data['results'][0]['id']).update(title='수정', modified_at=timezone.now())
+        response = self.client.get(next_url, HTTP_IF_NONE_MATCH=page['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'][0]['title'], '수정')
+
+    def test_team_list_etag(self):
+        response = self.client.get('/v1/api/teams/')
+        etag = response['ETag']
+
+        response = self.client.get('/v1/api/teams/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        Team.objects.create(name='다래')
+        response = self.client.get('/v1/api/teams/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+# 응답 캐시는 공유 캐시(REDIS_URL)가 있을 때만 기본으로 켜지므로 테스트에서 직접 켠다
+@override_settings(TASK_FEED_CACHE_TIMEOUT=60)
+class TaskFeedCacheTestCase(APITestCase):
+    def setUp(self):
+        self.team = Team.objects.create(name='단비')
+        self.other_team = Team.objects.create(name='다래')
+        self.user = User.objects.create_user(email='testuser', password='testpassword', team=self.team)
+        self.other_user = User.objects.create_user(email='testuser2', password='testpassword', team=self.other_team)
+        self.client.force_authenticate(user=self.user)
+
+    def create_task(self, title):
+        data = {
+            'task': {
+                'team_id': self.team.id,
+                'title': title,
+                'content': 'Task Content',
+                'subtasks': [{'team_id': self.other_team.id}],
+            },
+        }
+        return self.client.post('/v1/api/tasks', data, format='json').data
+
+    def test_cached_feed_skips_rendering_queries(self):
+        self.create_task('Task 1')
+        response = self.client.get('/v1/api/tasks')
+        self.assertEqual(response['Content-Type'], 'application/json')
+
+        # 캐시 적중 시 검증값은 팀 세대 번호로 만들므로 쿼리가 없어야 함
+        with self.assertNumQueries(0):
+            cached = self.client.get('/v1/api/tasks')
+        self.assertEqual(cached.content, response.content)
+
+        # 세대 번호 기반 ETag: 304 는 쿼리 없이, 쓰기 후에는 새 ETag
+        with self.assertNumQueries(0):
+            response = self.client.get('/v1/api/tasks', HTTP_IF_NONE_MATCH=cached['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.create_task('Task 2')
+        response = self.client.get('/v1/api/tasks', HTTP_IF_NONE_MATCH=cached['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 2)
+
+    def test_writes_invalidate_subtask_teams(self):
+        task = self.create_task('Task 1')
+        self.client.force_authenticate(user=self.other_user)
+        self.client.get('/v1/api/tasks')
+
+        # 다른 팀이 하위 업무를 가진 업무를 수정하면 그 팀의 캐시도 무효화되어야 함
+        self.client.force_authenticate(user=self.user)
+        data = {'task': {'title': 'Task 1 수정', 'content': 'Task Content', 'team_id': self.team.id}}
+        self.client.patch(f'/v1/api/tasks/{task["id"]}', data, format='json')
+
+        self.client.force_authenticate(user=self.other_user)
+        response = self.client.get('/v1/api/tasks')
+        self.assertEqual([item['title'] for item in response.data], ['Task 1 수정'])
+
+        # 업무 삭제
+        self.client.force_authenticate(user=self.user)
+        self.client.delete(f'/v1/api/tasks/{task["id"]}')
+        self.client.force_authenticate(user=self.other_user)
+        response = self.client.get('/v1/api/tasks')
+        self.assertEqual(response.data, [])
+
+    @override_settings(ALLOWED_HOSTS=['testserver', 'a.wink.test', 'b.wink.test'])
+    def test_variant_includes_host_and_media_type(self):
+        for number in range(3):
+            self.create_task(f'Task {number}')
+
+        # next/previous 는 요청 호스트로 만든 절대 URL 이므로 호스트별로 따로 캐시되어야 함
+        response = self.client.get('/v1/api/tasks', {'page_size': 1}, HTTP_HOST='a.wink.test')
+        self.assertTrue(response.data['next'].startswith('http://a.wink.test/'))
+        response = self.client.get('/v1/api/tasks', {'page_size': 1}, HTTP_HOST='b.wink.test')
+        self.assertTrue(response.data['next'].startswith('http://b.wink.test/'))
+
+        # 들여쓰기를 요청하면 들여쓴 본문
+        compact = self.client.get('/v1/api/tasks')
+        indented = self.client.get('/v1/api/tasks', HTTP_ACCEPT='application/json; indent=2')
+        self.assertNotEqual(indented.content, compact.content)
+        self.assertIn(b'\n  ', indented.content)
+        self.assertEqual(json.loads(indented.content), json.loads(compact.content))
+
+    @override_settings(TASK_FEED_CACHE_WAIT=0.5)
+    def test_concurrent_rebuild_waits_for_lock(self):
+        variant = ('cursor', 10, True)
+        key = feed_cache.response_key(self.team.id, variant)
+        builds = []
+
+        # 다른 요청이 응답을 만드는 중이면 직접 만들지 않고 기다렸다가 캐시를 읽는다
+        cache.add(f'{key}:lock', 1)
+        timer = threading.Timer(0.1, cache.set, (key, b'[]'))
+        timer.start()
+        self.assertEqual(feed_cache.get_or_build(self.team.id, variant, lambda: builds.append(1) or b'x'), b'[]')
+        timer.join()
+        self.assertEqual(builds, [])
+
+        # 기다려도 캐시가 채워지지 않으면 직접 만든다
+        cache.delete(key)
+        self.assertEqual(feed_cache.get_or_build(self.team.id, variant, lambda: builds.append(1) or b'x'), b'x')
+        self.assertEqual(builds, [1])
+        cache.delete(f'{key}:lock')
+
+class SubTaskCompletionAPITestCase(APITestCase):
+    def setUp(self):
+        self.team = Team.objects.create(name='단비')
+        self.other_team = Team.objects.create(name='다래')
+        self.user = User.objects.create_user(email='testuser', password='testpassword', team=self.team)
+        self.client.force_authenticate(user=self.user)
+        self.task = Task.objects.create(create_user=self.user, team=self.team, title='Task', content='Task Content')
+        self.subtask1 = SubTask.objects.create(team=self.team, task=self.task)
+        self.subtask2 = SubTask.objects.create(team=self.team, task=self.task)
+
+    def test_complete_all_subtasks_completes_task(self):
+        response = self.client.patch(f'/v1/api/subtasks/{self.subtask1.id}', {'is_complete': True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.task.refresh_from_db()
+        self.assertFalse(self.task.is_complete)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(f'/v1/api/subtasks/{self.subtask2.id}', {'is_complete': True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # 조회, 상위 업무 잠금, 하위 업무 UPDATE, 상위 업무 UPDATE (응답 캐시를 쓰지 않으면 무효화 대상 팀은 조회하지 않는다)
+        statements = [q['sql'] for q in queries if 'SAVEPOINT' not in q['sql']]
+        self.assertEqual(len(statements), 4)
+        self.task.refresh_from_db()
+        self.assertTrue(self.task.is_complete)
+        self.assertIsNotNone(self.task.completed_date)
+
+        # 다시 미완료로 바꾸면 상위 업무도 미완료
+        response = self.client.patch(f'/v1/api/subtasks/{self.subtask2.id}', {'is_complete': False}, format='json')
+        self.subtask2.refresh_from_db()
+        self.task.refresh_from_db()
+        self.assertFalse(self.subtask2.is_complete)
+        self.assertIsNone(self.subtask2.completed_date)
+        self.assertFalse(self.task.is_complete)
+        self.assertIsNone(self.task.completed_date)
+
+    def test_complete_subtask_moved_to_other_team(self):
+        from .completion import set_subtask_completion
+
+        # 권한 확인 후 잠금 전에 다른 팀으로 바뀐 하위 업무는 변경하지 않는다
+        subtask = SubTask.objects.only('id', 'team_id', 'task_id').get(id=self.subtask1.id)
+        SubTask.objects.filter(id=subtask.id).update(team=self.other_team)
+        self.assertEqual(set_subtask_completion(subtask, True, self.team.id), 0)
+        self.subtask1.refresh_from_db()
+        self.assertFalse(self.subtask1.is_complete)
+        self.assertEqual(set_subtask_completion(subtask, True, self.other_team.id), 1)
+        self.subtask1.refresh_from_db()
+        self.assertTrue(self.subtask1.is_complete)
+
+    def test_complete_subtask_of_other_team(self):
+        subtask = SubTask.objects.create(team=self.other_team, task=self.task)
+        response = self.client.patch(f'/v1/api/subtasks/{subtask.id}', {'is_complete': True}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_complete_subtask_without_field(self):
+        response = self.client.patch(f'/v1/api/subtasks/{self.subtask1.id}', {}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        response = self.client.patch(f'/v1/api/subtasks/{self.subtask1.id}', {'is_complete': 'maybe'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ConcurrentSubTaskCompletionTestCase(TransactionTestCase):
+    def test_concurrent_completion_completes_task(self):
+        from .completion import set_subtask_completion
+
+        team = Team.objects.create(name='단비')
+        task = Task.objects.create(team=team, title='Task', content='Task Content')
+        subtasks = [SubTask.objects.create(team=team, task=task) for _ in range(4)]
+        barrier = threading.Barrier(len(subtasks))
+        errors = []
+
+        def complete(subtask):
+            try:
+                barrier.wait()
+                set_subtask_completion(subtask, True, team.id)
+            except Exception as exc:  # pragma: no cover
+                errors.append(exc)
+            finally:
+                connections.close_all()
+
+        threads = [threading.Thread(target=complete, args=(subtask,)) for subtask in subtasks]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # 마지막 두 건이 동시에 완료되어도 상위 업무는 완료 상태여야 함
+        self.assertEqual(errors, [])
+        task.refresh_from_db()
+        self.assertTrue(task.is_complete)
+
+
+class SubTaskCounterTestCase(APITestCase):
+    def setUp(self):
+        self.team = Team.objects.create(name='단비')
+        self.other_team = Team.objects.create(name='다래')
+        self.user = User.objects.create_user(email='testuser', password='testpassword', team=self.team)
+        self.client.force_authenticate(user=self.user)
+
+    def create_task(self, subtask_count):
+        data = {
+            'task': {
+                'team_id': self.team.id,
+                'title': 'Task',
+                'content': 'Task Content',
+                'subtasks': [{'team_id': self.team.id} for _ in range(subtask_count)],
+            },
+        }
+        response = self.client.post('/v1/api/tasks', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        return Task.objects.get(id=response.data['id']), response
+
+    def assertCounters(self, task, total, open_count):
+        task.refresh_from_db()
+        self.assertEqual((task.subtask_total, task.subtask_open), (total, open_count))
+        self.assertFalse(Task.objects.subtask_counter_mismatches().exists())
+
+    def test_create_with_subtasks_sets_counters(self):
+        # API/일괄 등록/시드 데이터가 함께 쓰는 생성 경로: 카운터와 완료 여부를 하위 업무로부터 채운다
+        now = timezone.now()
+        (open_task, done_task, empty_task), subtasks = Task.objects.create_with_subtasks([
+            (Task(team=self.team, title='a', content='a'),
+             [SubTask(team=self.team), SubTask(team=self.other_team, is_complete=True, completed_date=now)]),
+            (Task(team=self.team, title='b', content='b'), [SubTask(team=self.team, is_complete=True, completed_date=now)]),
+            (Task(team=self.team, title='c', content='c'), []),
+        ])
+        self.assertEqual(len(subtasks), 3)
+        self.assertEqual([subtask.id for subtask in open_task.subtasks.all()], [subtask.id for subtask in subtasks[:2]])
+        self.assertCounters(open_task, 2, 1)
+        self.assertCounters(done_task, 1, 0)
+        self.assertCounters(empty_task, 0, 0)
+        self.assertEqual((open_task.is_complete, done_task.is_complete, empty_task.is_complete), (False, True, False))
+        self.assertIsNotNone(done_task.completed_date)
+
+    def test_counters_follow_subtask_changes(self):
+        task, response = self.create_task(3)
+        self.assertEqual((response.data['subtask_total'], response.data['subtask_open']), (3, 3))
+        subtasks = list(task.subtasks.order_by('id'))
+
+        # 완료 처리는 상태가 바뀔 때만 미완료 카운터를 줄인다
+        self.client.patch(f'/v1/api/subtasks/{subtasks[0].id}', {'is_complete': True}, format='json')
+        self.client.patch(f'/v1/api/subtasks/{subtasks[0].id}', {'is_complete': True}, format='json')
+        self.assertCounters(task, 3, 2)
+
+        response = self.client.delete(f'/v1/api/subtasks/{subtasks[1].id}')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertCounters(task, 2, 1)
+
+        # 완료된 하위 업무는 삭제되지 않으므로 카운터도 그대로
+        response = self.client.delete(f'/v1/api/subtasks/{subtasks[0].id}')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertCounters(task, 2, 1)
+
+        # 수정: 남은 미완료 하위 업무는 빠지고(삭제) 새 하위 업무 2건 추가
+        data = {
+            'task': {
+                'team_id': self.team.id,
+                'title': 'Task',
+                'content': 'Task Content',
+                'subtasks': [{'team_id': self.other_team.id}, {'team_id': self.other_team.id}],
+            },
+        }
+        response = self.client.patch(f'/v1/api/tasks/{task.id}', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['subtask_total'], response.data['subtask_open']), (3, 2))
+        self.assertCounters(task, 3, 2)
+
+        self.client.patch(f'/v1/api/subtasks/{subtasks[0].id}', {'is_complete': False}, format='json')
+        self.assertCounters(task, 3, 3)
+
+    def test_completion_follows_subtask_deletes_and_adds(self):
+        task, _ = self.create_task(2)
+        done, remaining = task.subtasks.order_by('id')
+        self.client.patch(f'/v1/api/subtasks/{done.id}', {'is_complete': True}, format='json')
+
+        # 마지막 미완료 하위 업무를 지우면 상위 업무는 완료
+        response = self.client.delete(f'/v1/api/subtasks/{remaining.id}')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertCounters(task, 1, 0)
+        self.assertTrue(task.is_complete)
+        self.assertIsNotNone(task.completed_date)
+
+        # 미완료 하위 업무를 추가하면 다시 미완료
+        data = {'task': {
+            'team_id': self.team.id, 'title': 'Task', 'content': 'Task Content',
+            'subtasks': [{'id': done.id, 'team_id': self.team.id}, {'team_id': self.team.id}],
+        }}
+        response = self.client.patch(f'/v1/api/tasks/{task.id}', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertFalse(response.data['is_complete'])
+        self.assertCounters(task, 2, 1)
+        self.assertFalse(task.is_complete)
+        self.assertIsNone(task.completed_date)
+
+    def test_task_without_subtasks_is_incomplete(self):
+        # 생성 경로와 재계산 경로가 같은 규칙: 하위 업무가 없는 업무는 미완료
+        task, response = self.create_task(0)
+        self.assertFalse(response.data['is_complete'])
+        self.assertCounters(task, 0, 0)
+        self.assertFalse(task.is_complete)
+
+        task, _ = self.create_task(1)
+        response = self.client.delete(f'/v1/api/subtasks/{task.subtasks.get().id}')
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertCounters(task, 0, 0)
+        self.assertFalse(task.is_complete)
+        self.assertIsNone(task.completed_date)
+
+        # 완료된 하위 업무만 남아 있던 업무도, 그 하위 업무가 지워지면 미완료
+        task, _ = self.create_task(1)
+        subtask = task.subtasks.get()
+        self.client.patch(f'/v1/api/subtasks/{subtask.id}', {'is_complete': True}, format='json')
+        task.refresh_from_db()
+        self.assertTrue(task.is_complete)
+        SubTask.objects.filter(id=subtask.id).delete()
+        self.assertCounters(task, 0, 0)
+        self.assertFalse(task.is_complete)
+        self.assertIsNone(task.completed_date)
+
+    def test_repair_subtask_counters_command(self):
+        task, _ = self.create_task(2)
+        Task.objects.filter(id=task.id).update(subtask_total=5, subtask_open=0)
+
+        with self.assertRaises(CommandError):
+            call_command('repair_subtask_counters', '--check', stdout=StringIO())
+
+        call_command('repair_subtask_counters', stdout=StringIO())
+        self.assertCounters(task, 2, 2)
+        call_command('repair_subtask_counters', '--check', stdout=StringIO())
+
+
+class SubTaskBulkCompletionAPITestCase(APITestCase):
+    def setUp(self):
+        self.team = Team.objects.create(name='단비')
+        self.other_team = Team.objects.create(name='다래')
+        self.user = User.objects.create_user(email='testuser', password='testpassword', team=self.team)
+        self.client.force_authenticate(user=self.user)
+        self.task1 = Task.objects.create(create_user=self.user, team=self.team, title='Task 1', content='Content')
+        self.task2 = Task.objects.create(create_user=self.user, team=self.team, title='Task 2', content='Content')
+        self.subtasks1 = [SubTask.objects.create(team=self.team, task=self.task1) for _ in range(3)]
+        self.subtasks2 = [SubTask.objects.create(team=self.team, task=self.task2) for _ in range(2)]
+        self.other_subtask = SubTask.objects.create(team=self.other_team, task=self.task2)
+
+    def test_bulk_completion(self):
+        items = [{'id': subtask.id, 'is_complete': True} for subtask in self.subtasks1 + self.subtasks2[:1]]
+        items += [
+            {'id': self.subtasks2[1].id, 'is_complete': False},
+            {'id': self.other_subtask.id, 'is_complete': True},
+            {'id': 99999, 'is_complete': True},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch('/v1/api/subtasks', {'subtasks': items}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # 권한 확인, 상위 업무 잠금, 상태별 UPDATE 2번, 상위 업무 UPDATE (응답 캐시를 쓰지 않으면 무효화 대상 팀은 조회하지 않는다)
+        statements = [q['sql'] for q in queries if 'SAVEPOINT' not in q['sql']]
+        self.assertEqual(len(statements), 5)
+
+        results = response.data['results']
+        self.assertEqual([result['id'] for result in results], [item['id'] for item in items])
+        self.assertEqual(
+            [result['status'] for result in results],
+            ['updated'] * 5 + ['forbidden', 'not_found'],
+        )
+
+        self.task1.refresh_from_db()
+        self.task2.refresh_from_db()
+        self.assertTrue(self.task1.is_complete)
+        self.assertIsNotNone(self.task1.completed_date)
+        self.assertEqual((self.task1.subtask_total, self.task1.subtask_open), (3, 0))
+        self.assertFalse(self.task2.is_complete)
+        self.assertEqual((self.task2.subtask_total, self.task2.subtask_open), (3, 2))
+        self.assertFalse(SubTask.objects.get(id=self.other_subtask.id).is_complete)
+
+    def test_bulk_completion_reports_rows_changed_before_lock(self):
+        moved, deleted = self.subtasks1[0], self.subtasks1[1]
+        changed = []
+
+        def change_before_lock(execute, sql, params, many, context):
+            # 권한 확인 SELECT 후 상위 업무 잠금 직전에 다른 요청이 팀을 바꾸고 삭제한 것처럼 만든다
+            if 'FOR UPDATE' in sql and not changed:
+                changed.append(1)
+                SubTask.objects.filter(id=moved.id).update(team=self.other_team)
+                SubTask.objects.filter(id=deleted.id).delete()
+            return execute(sql, params, many, context)
+
+        items = [{'id': subtask.id, 'is_complete': True} for subtask in self.subtasks1]
+        with connection.execute_wrapper(change_before_lock):
+            response = self.client.patch('/v1/api/subtasks', {'subtasks': items}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([result['status'] for result in response.data['results']], ['forbidden', 'not_found', 'updated'])
+        self.assertFalse(SubTask.objects.get(id=moved.id).is_complete)
+        self.task1.refresh_from_db()
+        self.assertEqual((self.task1.subtask_total, self.task1.subtask_open), (2, 1))
+
+    def test_bulk_completion_validation(self):
+        response = self.client.patch('/v1/api/subtasks', {'subtasks': []}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        subtask_id = self.subtasks1[0].id
+        items = [{'id': subtask_id, 'is_complete': True}, {'id': subtask_id, 'is_complete': False}]
+        response = self.client.patch('/v1/api/subtasks', {'subtasks': items}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(SubTask.objects.get(id=subtask_id).is_complete)
+
+
+class TaskImportAPITestCase(APITestCase):
+    def setUp(self):
+        self.team = Team.objects.create(name='단비')
+        self.other_team = Team.objects.create(name='다래')
+        self.user = User.objects.create_user(email='testuser', password='testpassword', team=self.team)
+        self.client.force_authenticate(user=self.user)
+
+    def task_row(self, title, team_id=None, subtask_team_ids=()):
+        return {
+            'team_id': team_id or self.team.id,
+            'title': title,
+            'content': 'Task Content',
+            'subtasks': [{'team_id': subtask_team_id} for subtask_team_id in subtask_team_ids],
+        }
+
+    @override_settings(TASK_IMPORT_CHUNK_SIZE=2)
+    def test_import_json_array_reports_row_errors(self):
+        rows = [
+            self.task_row('Task 1', subtask_team_ids=[self.team.id, self.other_team.id]),
+            self.task_row('', subtask_team_ids=[self.team.id]),
+            self.task_row('Task 3', subtask_team_ids=[99999]),
+            self.task_row('Task 4', team_id=self.other_team.id, subtask_team_ids=[self.team.id]),
+            self.task_row('Task 5'),
+        ]
+        response = self.client.post('/v1/api/tasks/import', {'tasks': rows}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['total'], response.data['created'], response.data['failed']), (5, 3, 2))
+        self.assertEqual([error['row'] for error in response.data['errors']], [2, 3])
+        self.assertIn('title', response.data['errors'][0]['errors'])
+        self.assertIn('subtasks', response.data['errors'][1]['errors'])
+
+        task = Task.objects.get(title='Task 1')
+        self.assertEqual(task.create_user_id, self.user.id)
+        self.assertEqual((task.subtask_total, task.subtask_open), (2, 2))
+        self.assertEqual(Task.objects.filter(title__startswith='Task').count(), 3)
+        self.assertFalse(Task.objects.subtask_counter_mismatches().exists())
+        self.assertEqual(TaskTeamVisibility.objects.inconsistencies()[0].count(), 0)
+
+        # 다른 팀 업무도 하위 업무를 맡은 우리 팀 리스트에 보여야 함
+        response = self.client.get('/v1/api/tasks')
+        self.assertEqual({item['title'] for item in response.data}, {'Task 1', 'Task 4', 'Task 5'})
+
+    def test_import_ndjson_stream(self):
+        lines = [
+            json.dumps(self.task_row('Task 1', subtask_team_ids=[self.team.id])),
+            '{not json',
+            '',
+            json.dumps(self.task_row('Task 2', subtask_team_ids=[self.other_team.id])),
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                '/v1/api/tasks/import', '\n'.join(lines), content_type='application/x-ndjson'
+            )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['total'], response.data['created'], response.data['failed']), (3, 2, 1))
+        self.assertEqual(response.data['errors'][0]['row'], 2)
+
+        # 업무/하위 업무는 chunk 마다 INSERT 한 번씩
+        statements = [q['sql'] for q in queries]
+        self.assertEqual(len([sql for sql in statements if sql.startswith('INSERT INTO "wink_task"')]), 1)
+        self.assertEqual(len([sql for sql in statements if sql.startswith('INSERT INTO "wink_subtask"')]), 1)
+
+    def test_import_requires_task_list(self):
+        response = self.client.post('/v1/api/tasks/import', {'task': {}}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_import_tasks_command(self):
+        rows = [self.task_row(f'Task {i}', subtask_team_ids=[self.other_team.id]) for i in range(3)]
+        with tempfile.NamedTemporaryFile('w', suffix='.ndjson', delete=False) as f:
+            f.write('\n'.join(json.dumps(row) for row in rows) + '\n')
+        self.addCleanup(os.unlink, f.name)
+
+        out = StringIO()
+        call_command('import_tasks', f.name, '--user', self.user.email, '--chunk-size', '2', stdout=out)
+        self.assertIn('3건 등록', out.getvalue())
+        self.assertEqual(Task.objects.filter(create_user=self.user).count(), 3)
+
+        with self.assertRaises(CommandError):
+            call_command('import_tasks', f.name, '--user', 'nobody', stdout=StringIO())
+
+
+class TaskExportAPITestCase(APITestCase):
+    def setUp(self):
+        self.team = Team.objects.create(name='단비')
+        self.other_team = Team.objects.create(name='다래')
+        self.user = User.objects.create_user(email='testuser', password='testpassword', team=self.team)
+        self.client.force_authenticate(user=self.user)
+        for i in range(5):
+            task = Task.objects.create(create_user=self.user, team=self.team, title=f'Task {i}', content='내용')
+            SubTask.objects.create(team=self.other_team, task=task)
+        other_task = Task.objects.create(team=self.other_team, title='Other Task', content='내용')
+        SubTask.objects.create(team=self.team, task=other_task)
+        Task.objects.create(team=self.other_team, title='Hidden Task', content='내용')
+
+    def read(self, response):
+        return b''.join(response.streaming_content)
+
+    @override_settings(TASK_EXPORT_CHUNK_SIZE=2)
+    def test_export_ndjson(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/v1/api/tasks/export')
+            body = self.read(response)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/x-ndjson')
+        self.assertIn('attachment;', response['Content-Disposition'])
+
+        rows = [json.loads(line) for line in body.decode('utf-8').splitlines()]
+        self.assertEqual([row['title'] for row in rows], ['Other Task'] + [f'Task {i}' for i in range(4, -1, -1)])
+        self.assertEqual(len(rows[1]['subtasks']), 1)
+
+        # 하위 업무는 chunk(2건)마다 한 번씩 prefetch
+        subtask_queries = [q for q in queries if q['sql'].startswith('SELECT') and 'FROM "wink_subtask"' in q['sql']]
+        self.assertEqual(len(subtask_queries), 3)
+
+    def test_export_csv_gzip(self):
+        response = self.client.get('/v1/api/tasks/export', {'output': 'csv', 'compress': 'gzip'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/gzip')
+        self.assertTrue(response['Content-Disposition'].endswith('.csv.gz"'))
+
+        rows = list(csv.DictReader(io.StringIO(gzip.decompress(self.read(response)).decode('utf-8'))))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[0]['title'], 'Other Task')
+        self.assertEqual(json.loads(rows[0]['subtasks'])[0]['team'], self.team.id)
+
+    def test_export_invalid_output(self):
+        response = self.client.get('/v1/api/tasks/export', {'output': 'xml'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    @override_settings(TASK_EXPORT_CHUNK_SIZE=2)
+    async def test_export_streams_under_asgi(self):
+        # asgi 요청이면 async iterator 로 chunk 마다 내려보낸다 (sync iterator 는 전체를 모은 뒤 보낸다)
+        token = await sync_to_async(lambda: str(RefreshToken.for_user(self.user).access_token))()
+        response = await self.async_client.get('/v1/api/tasks/export', headers={'Authorization': f'Bearer {token}'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 3)
+        rows = [json.loads(line) for line in b''.join(chunks).decode('utf-8').splitlines()]
+        self.assertEqual([row['title'] for row in rows], ['Other Task'] + [f'Task {i}' for i in range(4, -1, -1)])
+
+    def test_export_tasks_command(self):
+        with tempfile.NamedTemporaryFile(suffix='.ndjson.gz', delete=False) as f:
+            path = f.name
+        self.addCleanup(os.unlink, path)
+
+        call_command('export_tasks', '--team', str(self.team.id), '--gzip', '--path', path, stderr=StringIO())
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            self.assertEqual(len(f.readlines()), 6)
+
+
+class StatelessJWTAuthenticationTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        self.team = Team.objects.create(name='단비')
+        self.other_team = Team.objects.create(name='다래')
+        self.user = User.objects.create_user(email='testuser@example.com', password='testpassword', team=self.team)
+        Task.objects.create(create_user=self.user, team=self.team, title='Task', content='Task Content')
+
+    def login(self):
+        response = self.client.post(
+            '/v1/api/login', {'email': 'testuser@example.com', 'password': 'testpassword'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access_token']}")
+        return response.data['access_token']
+
+    def test_token_claims_skip_user_lookup(self):
+        self.login()
+        self.client.get('/v1/api/teams/')
+
+        # 사용자 상태가 캐시되어 있으면 인증에 쿼리가 필요 없음
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/v1/api/teams/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([q['sql'] for q in queries if 'wink_user' in q['sql']], [])
+
+        # 클레임으로 만든 사용자로 업무 생성/수정
+        data = {'task': {'team_id': self.team.id, 'title': 'New', 'content': 'Content', 'subtasks': []}}
+        response = self.client.post('/v1/api/tasks', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['create_user'], self.user.id)
+        response = self.client.patch(f"/v1/api/tasks/{response.data['id']}", data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_deactivated_user_is_rejected(self):
+        self.login()
+        self.assertEqual(self.client.get('/v1/api/teams/').status_code, status.HTTP_200_OK)
+
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.client.get('/v1/api/teams/').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_team_change_requires_new_token(self):
+        self.login()
+        self.user.team = self.other_team
+        self.user.save()
+        self.assertEqual(self.client.get('/v1/api/tasks').status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.login()
+        self.assertEqual(self.client.get('/v1/api/tasks').status_code, status.HTTP_200_OK)
+
+    def test_token_without_claims_falls_back_to_user_lookup(self):
+        token = RefreshToken.for_user(self.user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+        response = self.client.get('/v1/api/tasks')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data), 1)
+
+
+auth_cache_events = []
+
+
+def record_auth_cache_event(event, user_id):
+    auth_cache_events.append((event, user_id))
+
+
+class CachedJWTAuthenticationTestCase(APITestCase):
+    def setUp(self):
+        cache.clear()
+        auth_cache_events.clear()
+        self.team = Team.objects.create(name='단비')
+        self.user = User.objects.create_user(email='testuser@example.com', password='testpassword', team=self.team)
+        self.auth = CachedJWTAuthentication()
+        self.token = self.auth.get_validated_token(str(RefreshToken.for_user(self.user).access_token))
+
+    @override_settings(AUTH_CACHE_METRICS_HOOK='wink.tests.record_auth_cache_event')
+    def test_user_and_team_are_cached(self):
+        self.assertEqual(self.auth.get_user(self.token).id, self.user.id)
+        with self.assertNumQueries(0):
+            user = self.auth.get_user(self.token)
+            self.assertEqual(user.team.name, '단비')
+        self.assertEqual(auth_cache_events, [('miss', self.user.id), ('hit', self.user.id)])
+
+    def test_team_and_user_changes_invalidate(self):
+        self.auth.get_user(self.token)
+
+        self.team.name = '다래'
+        self.team.save()
+        self.assertEqual(self.auth.get_user(self.token).team.name, '다래')
+
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.auth.get_user(self.token)
+
+    def test_team_delete_invalidates_members(self):
+        self.auth.get_user(self.token)
+        self.team.delete()
+        self.assertIsNone(self.auth.get_user(self.token).team)
+
+
+class PasswordHashingTestCase(APITestCase):
+    def setUp(self):
+        self.team = Team.objects.create(name='단비')
+
+    def login(self, email, password):
+        return self.client.post('/v1/api/login', {'email': email, 'password': password}, format='json')
+
+    def test_signup_hashes_password_once(self):
+        data = {'email': 'new@example.com', 'password': 'Str0ngPassw0rd!', 'team_id': self.team.id}
+        response = self.client.post('/v1/api/signup', data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        user = User.objects.get(id=response.data['user_id'])
+        self.assertTrue(user.password.startswith('scrypt$'))
+        self.assertTrue(user.check_password('Str0ngPassw0rd!'))
+        self.assertEqual(self.login('new@example.com', 'Str0ngPassw0rd!').status_code, status.HTTP_200_OK)
+        self.assertEqual(self.login('new@example.com', 'wrong-password').status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.login('nobody@example.com', 'Str0ngPassw0rd!').status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_login_rehashes_outdated_hash(self):
+        user = User.objects.create(
+            email='old@example.com', password=make_password('Str0ngPassw0rd!', hasher='pbkdf2_sha256'), team=self.team
+        )
+        self.assertEqual(self.login('old@example.com', 'Str0ngPassw0rd!').status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('scrypt$16384$'))
+
+        # 비용 파라미터가 바뀌면 다음 로그인에서 다시 해시
+        params = {'scrypt': {'work_factor': 2 ** 12, 'block_size': 8, 'parallelism': 1}}
+        with override_settings(PASSWORD_HASHER_PARAMS=params):
+            self.assertEqual(self.login('old@example.com', 'Str0ngPassw0rd!').status_code, status.HTTP_200_OK)
+        user.refresh_from_db()
+        self.assertTrue(user.password.startswith('scrypt$4096$'))
+
+    @override_settings(PASSWORD_HASH_WORKERS=1, PASSWORD_HASH_QUEUE_SIZE=0, PASSWORD_HASH_QUEUE_TIMEOUT=0)
+    def test_hashing_pool_is_bounded(self):
+        from .hashers import HashingBusy, run_hashing
+
+        started = threading.Event()
+        release = threading.Event()
+
+        def block():
+            started.set()
+            release.wait(5)
+
+        worker = threading.Thread(target=run_hashing, args=(block,))
+        worker.start()
+        started.wait(5)
+        try:
+            with self.assertRaises(HashingBusy):
+                run_hashing(make_password, 'password')
+            response = self.login('nobody@example.com', 'password')
+            self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        finally:
+            release.set()
+            worker.join()
+
+
+class ConnectionPoolTestCase(TestCase):
+    def make_wrapper(self):
+        from .db.postgresql_pool.base import DatabaseWrapper as PooledDatabaseWrapper
+
+        settings_dict = {**connection.settings_dict, 'POOL': {'MAX_SIZE': 1, 'TIMEOUT': 0.1}}
+        wrapper = PooledDatabaseWrapper(settings_dict, alias='pool_test')
+        self.addCleanup(wrapper.close)
+        return wrapper
+
+    def test_connections_are_reused_and_bounded(self):
+        from .db.postgresql_pool.base import close_pools
+
+        self.addCleanup(close_pools, connection.settings_dict['NAME'])
+        first = self.make_wrapper()
+        with first.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        raw_connection = first.connection
+        first.close()
+
+        second = self.make_wrapper()
+        second.ensure_connection()
+        self.assertIs(second.connection, raw_connection)
+        stats = second.pool.stats()
+        self.assertEqual((stats['created'], stats['reused'], stats['in_use']), (1, 1, 1))
+
+        # 최대 1개이므로 사용 중인 동안 다른 연결 요청은 TIMEOUT 후 실패
+        with self.assertRaises(OperationalError):
+            self.make_wrapper().ensure_connection()
+        self.assertEqual(second.pool.stats()['timeouts'], 1)
+
+    def test_idle_connection_is_checked_before_reuse(self):
+        from .db.postgresql_pool.base import DatabaseWrapper as PooledDatabaseWrapper, close_pools
+
+        self.addCleanup(close_pools, connection.settings_dict['NAME'])
+        settings_dict = {**connection.settings_dict, 'POOL': {'MAX_SIZE': 1, 'TIMEOUT': 0.1, 'HEALTH_CHECK_IDLE': 0}}
+        first = PooledDatabaseWrapper(settings_dict, alias='pool_health_test')
+        with first.cursor() as cursor:
+            cursor.execute('SELECT pg_backend_pid()')
+            backend_pid = cursor.fetchone()[0]
+        raw_connection = first.connection
+        first.close()
+
+        # 풀에서 쉬는 동안 서버가 연결을 끊으면, 꺼낼 때 SELECT 1 로 걸러내고 새로 접속한다
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT pg_terminate_backend(%s)', [backend_pid])
+        second = PooledDatabaseWrapper(settings_dict, alias='pool_health_test')
+        self.addCleanup(second.close)
+        with second.cursor() as cursor:
+            cursor.execute('SELECT 1')
+        self.assertIsNot(second.connection, raw_connection)
+        stats = second.pool.stats()
+        self.assertEqual((stats['health_checks'], stats['discarded'], stats['created']), (1, 1, 2))
+
+class AsyncReadViewsTestCase(APITestCase):
+    def setUp(self):
+        self.team = Team.objects.create(name='단비')
+        self.other_team = Team.objects.create(name='다래')
+        self.user = User.objects.create_user(email='testuser', password='testpassword', team=self.team)
+        self.factory = APIRequestFactory()
+        for i in range(3):
+            task = Task.objects.create(create_user=self.user, team=self.team, title=f'Task {i}', content='Task Content')
+            SubTask.objects.create(team=self.team, task=task)
+            SubTask.objects.create(team=self.other_team, task=task)
+
+    def call(self, view, path, data=None, **extra):
+        request = self.factory.get(path, data, **extra)
+        force_authenticate(request, user=self.user)
+        view = view.as_view()
+        response = async_to_sync(view)(request) if iscoroutinefunction(view) else view(request)
+        return response.render() if hasattr(response, 'render') else response
+
+    def test_views_are_async(self):
+        self.assertTrue(iscoroutinefunction(AsyncTasksView.as_view()))
+        self.assertTrue(iscoroutinefunction(AsyncTeamsView.as_view()))
+
+    def test_task_list_matches_sync_view(self):
+        for params in (None, {'page_size': 2}):
+            expected = self.call(TasksView, '/v1/api/tasks', params)
+            response = self.call(AsyncTasksView, '/v1/api/tasks', params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(json.loads(response.content), json.loads(expected.content))
+            self.assertEqual(response['ETag'], expected['ETag'])
+
+        # 커서로 다음 페이지
+        response = self.call(AsyncTasksView, json.loads(response.content)['next'])
+        self.assertEqual([task['title'] for task in json.loads(response.content)['results']], ['Task 0'])
+
+    @override_settings(TASK_FEED_CACHE_TIMEOUT=0)
+    def test_task_list_query_count(self):
+        # ETag 검증값 + 업무 + 하위 업무 3개 쿼리 (동기 뷰와 같음)
+        with self.assertNumQueries(3):
+            response = self.call(AsyncTasksView, '/v1/api/tasks')
+        self.assertEqual(len(json.loads(response.content)), 3)
+        self.assertEqual(len(json.loads(response.content)[0]['subtasks']), 2)
+
+    def test_conditional_get(self):
+        response = self.call(AsyncTasksView, '/v1/api/tasks')
+        self.assertTrue(response.has_header('Last-Modified'))
+        response = self.call(AsyncTasksView, '/v1/api/tasks', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        response = self.call(AsyncTeamsView, '/v1/api/teams/')
+        self.assertEqual(json.loads(response.content), [{'id': self.team.id, 'name': '단비'}, {'id': self.other_team.id, 'name': '다래'}])
+        response = self.call(AsyncTeamsView, '/v1/api/teams/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @override_settings(TASK_FEED_CACHE_TIMEOUT=60)
+    def test_cached_feed(self):
+        response = self.call(AsyncTasksView, '/v1/api/tasks')
+        # 캐시 적중 시 검증값은 팀 세대 번호로 만들므로 쿼리가 없어야 함
+        with self.assertNumQueries(0):
+            cached = self.call(AsyncTasksView, '/v1/api/tasks')
+        self.assertEqual(cached.content, response.content)
+
+    def test_write_runs_sync_handler(self):
+        request = self.factory.post('/v1/api/teams/', {'name': '머루'}, format='json')
+        force_authenticate(request, user=self.user)
+        response = async_to_sync(AsyncTeamsView.as_view())(request)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(Team.objects.filter(name='머루').exists())
+
+    def test_requires_authentication(self):
+        response = async_to_sync(AsyncTasksView.as_view())(self.factory.get('/v1/api/tasks'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+class RequestMetricsTestCase(APITestCase):
+    def setUp(self):
+        self.team = Team.objects.create(name='단비')
+        self.user = User.objects.create_user(email='testuser', password='testpassword', team=self.team)
+        self.client.force_authenticate(user=self.user)
+        task = Task.objects.create(create_user=self.user, team=self.team, title='Task', content='Task Content')
+        SubTask.objects.create(team=self.team, task=task)
+        instrumentation.reset()
+        self.addCleanup(instrumentation.reset)
+
+    @override_settings(TASK_FEED_CACHE_TIMEOUT=0)
+    def test_server_timing_and_histograms(self):
+        response = self.client.get('/v1/api/tasks')
+        timing = response['Server-Timing']
+        # ETag 검증값 + 업무 + 하위 업무
+        self.assertIn('db;dur=', timing)
+        self.assertIn('desc="3 queries"', timing)
+        self.assertIn('serialize;dur=', timing)
+        self.assertIn('render;dur=', timing)
+
+        self.client.get('/v1/api/tasks')
+        stats = instrumentation.stats()['task-list']
+        self.assertEqual(stats['request_ms']['count'], 2)
+        self.assertEqual(stats['db_queries']['buckets'][3], 2)
+        self.assertEqual(stats['db_queries']['buckets'][2], 0)
+
+    @override_settings(REQUEST_METRICS_SLOW_QUERIES=2)
+    def test_slow_request_is_logged(self):
+        with self.assertLogs('wink.requests', level='WARNING') as logs:
+            self.client.get('/v1/api/tasks')
+        entry = json.loads(logs.records[0].getMessage())
+        self.assertEqual((entry['view'], entry['status'], entry['slow']), ('task-list', 200, True))
+        self.assertEqual(entry['db_queries'], 3)
+
+    @override_settings(REQUEST_METRICS_SAMPLE_RATE=0)
+    def test_unsampled_request(self):
+        response = self.client.get('/v1/api/teams/')
+        self.assertNotIn('db;', response['Server-Timing'])
+        self.assertEqual(instrumentation.stats(), {})
+
+        # 샘플링되지 않아도 느린 요청은 남긴다
+        with override_settings(REQUEST_METRICS_SLOW_MS=-1), self.assertLogs('wink.requests', level='WARNING'):
+            self.client.get('/v1/api/teams/')
+
+    @override_settings(TASK_FEED_CACHE_TIMEOUT=0)
+    def test_async_middleware(self):
+        # asgi 체인에서는 코루틴으로 동작하고, sync_to_async 로 실행된 ORM 쿼리도 측정한다
+        view = AsyncTasksView.as_view()
+
+        async def get_response(request):
+            request.resolver_match = resolve('/v1/api/tasks')
+            response = await view(request)
+            return await sync_to_async(response.render)()
+
+        middleware = instrumentation.RequestMetricsMiddleware(get_response)
+        self.assertTrue(iscoroutinefunction(middleware))
+        self.assertFalse(iscoroutinefunction(instrumentation.RequestMetricsMiddleware(lambda request: None)))
+
+        request = APIRequestFactory().get('/v1/api/tasks')
+        force_authenticate(request, user=self.user)
+        response = async_to_sync(middleware)(request)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('desc="3 queries"', response['Server-Timing'])
+        self.assertIn('serialize;dur=', response['Server-Timing'])
+        stats = instrumentation.stats()['task-list']
+        self.assertEqual(stats['db_queries']['buckets'][3], 1)
+
+    def test_histogram_buckets(self):
+        histogram = instrumentation.Histogram((1, 10))
+        for value in (0.5, 1, 5, 50):
+            histogram.observe(value)
+        self.assertEqual(histogram.snapshot(), {'buckets': {1: 2, 10: 3, '+Inf': 4}, 'count': 4, 'sum': 56.5})
+
+class MetricsEndpointTestCase(APITestCase):
+    def setUp(self):
+        self.team = Team.objects.create(name='단비')
+        self.user = User.objects.create_user(email='testuser', password='testpassword', team=self.team)
+        instrumentation.reset()
+        self.addCleanup(instrumentation.reset)
+
+    def test_exposition_format(self):
+        self.client.force_authenticate(user=self.user)
+        self.client.get('/v1/api/tasks')
+        self.client.force_authenticate(user=None)
+
+        response = self.client.get('/metrics')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        lines = response.content.decode().splitlines()
+        self.assertIn('# TYPE wink_http_requests_total counter', lines)
+        self.assertIn('wink_http_requests_total{method="GET",status="200",view="task-list"} 1', lines)
+        self.assertIn('wink_http_request_db_queries_bucket{view="task-list",le="+Inf"} 1', lines)
+        self.assertIn('wink_http_request_duration_seconds_count{view="task-list"} 1', lines)
+        self.assertTrue(any(line.startswith('wink_cache_hit_ratio{cache="team_directory"}') for line in lines))
+
+    @override_settings(METRICS_TOKEN='secret')
+    def test_token(self):
+        self.assertEqual(self.client.get('/metrics').status_code, status.HTTP_403_FORBIDDEN)
+        response = self.client.get('/metrics', HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_merges_worker_snapshots(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(lambda: [os.unlink(os.path.join(directory, name)) for name in os.listdir(directory)] and os.rmdir(directory))
+        instrumentation.count_request('task-list', 'GET', 200)
+        instrumentation.observe('db_queries', 'task-list', 3)
+
+        # 종료된 다른 워커의 스냅샷: 카운터/히스토그램은 합치고 게이지는 뺀다
+        dead_pid = 2 ** 22 + 1
+        dead_histogram = instrumentation.Histogram(instrumentation.QUERY_COUNT_BUCKETS)
+        dead_histogram.observe(4)
+        dead_histogram.observe(5)
+        histogram = dead_histogram.snapshot()
+        with open(os.path.join(directory, f'wink-{dead_pid}-dead.json'), 'w') as file:
+            json.dump({
+                'pid': dead_pid,
+                'started_at': 1.0,
+                'process': f'{dead_pid}-dead',
+                'counters': [['wink_http_requests_total', {'view': 'task-list', 'method': 'GET', 'status': '200'}, 4]],
+                'gauges': [['wink_db_pool_connections', {'pool': 'default:x', 'state': 'in_use'}, 2]],
+                'histograms': [['wink_http_request_db_queries', {'view': 'task-list'}, {
+                    'buckets': [[str(bound), count] for bound, count in histogram['buckets'].items()],
+                    'count': histogram['count'],
+                    'sum': histogram['sum'],
+                }]],
+            }, file)
+
+        with override_settings(METRICS_DIR=directory):
+            text = metrics.render()
+        self.assertTrue(os.path.exists(os.path.join(directory, f'wink-{metrics.current_process()[2]}.json')))
+        lines = text.splitlines()
+        self.assertIn('wink_http_requests_total{method="GET",status="200",view="task-list"} 5', lines)
+        self.assertIn('wink_http_request_db_queries_bucket{view="task-list",le="3"} 1', lines)
+        self.assertIn('wink_http_request_db_queries_bucket{view="task-list",le="5"} 3', lines)
+        self.assertIn('wink_http_request_db_queries_count{view="task-list"} 3', lines)
+        self.assertIn('wink_http_request_db_queries_sum{view="task-list"} 12.0', lines)
+        self.assertNotIn('pool="default:x"', text)
+        # 종료된 워커의 파일은 집계 파일로 접혀 지워진다
+        self.assertFalse(os.path.exists(os.path.join(directory, f'wink-{dead_pid}-dead.json')))
+        self.assertTrue(os.path.exists(os.path.join(directory, metrics.AGGREGATE_FILE)))
+
+    def test_folds_dead_workers_into_aggregate(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(lambda: [os.unlink(os.path.join(directory, name)) for name in os.listdir(directory)] and os.rmdir(directory))
+        instrumentation.count_request('task-list', 'GET', 200)
+
+        # max_requests 로 워커가 계속 바뀌어도 파일 수는 (집계 파일 + 살아 있는 워커) 로 유지되고 카운터는 줄지 않는다
+        totals = []
+        for index in range(3):
+            dead_pid = 2 ** 22 + 1 + index
+            with open(os.path.join(directory, f'wink-{dead_pid}-dead.json'), 'w') as file:
+                json.dump({
+                    'pid': dead_pid,
+                    'started_at': 1.0,
+                    'process': f'{dead_pid}-dead',
+                    'counters': [['wink_http_requests_total', {'view': 'task-list', 'method': 'GET', 'status': '200'}, 10]],
+                    'gauges': [],
+                    'histograms': [],
+                }, file)
+            with override_settings(METRICS_DIR=directory):
+                counters, _, _ = metrics.merge(metrics.load_all())
+            totals.append(counters[metrics._key(
+                'wink_http_requests_total', {'view': 'task-list', 'method': 'GET', 'status': '200'}
+            )])
+            self.assertEqual(
+                sorted(os.listdir(directory)),
+                sorted([metrics.AGGREGATE_FILE, f'wink-{metrics.current_process()[2]}.json']),
+            )
+        self.assertEqual(totals, [11, 21, 31])
+
+    def test_reused_pid_keeps_previous_worker_counters(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(lambda: [os.unlink(os.path.join(directory, name)) for name in os.listdir(directory)] and os.rmdir(directory))
+        instrumentation.count_request('task-list', 'GET', 200)
+
+        # 같은 pid 로 먼저 떠 있다가 종료된 워커의 스냅샷: 새 워커가 덮어쓰지 않고, 카운터는 합치고 게이지는 뺀다
+        pid = os.getpid()
+        with open(os.path.join(directory, f'wink-{pid}-previous.json'), 'w') as file:
+            json.dump({
+                'pid': pid,
+                'started_at': 1.0,
+                'process': f'{pid}-previous',
+                'counters': [['wink_http_requests_total', {'view': 'task-list', 'method': 'GET', 'status': '200'}, 7]],
+                'gauges': [['wink_db_pool_connections', {'pool': 'default:x', 'state': 'in_use'}, 2]],
+                'histograms': [],
+            }, file)
+
+        with override_settings(METRICS_DIR=directory):
+            text = metrics.render()
+            text_again = metrics.render()
+        self.assertEqual(
+            sorted(os.listdir(directory)),
+            sorted([metrics.AGGREGATE_FILE, f'wink-{metrics.current_process()[2]}.json']),
+        )
+        self.assertIn('wink_http_requests_total{method="GET",status="200",view="task-list"} 8', text.splitlines())
+        self.assertIn('wink_http_requests_total{method="GET",status="200",view="task-list"} 8', text_again.splitlines())
+        self.assertNotIn('pool="default:x"', text)
+
+class BenchmarkSeedTestCase(APITestCase):
+    def test_seed_and_clear(self):
+        counts = seeding.Seeder(teams=3, users_per_team=2, tasks_per_user=3, subtasks_per_task=2, batch_size=4).run()
+        self.assertEqual(counts['teams'], 3)
+        self.assertEqual(counts['users'], 6)
+        self.assertEqual(counts['tasks'], 18)
+        self.assertEqual(counts['subtasks'], 36)
+
+        # bulk insert 로 만들어도 카운터/완료 여부/가시성 행이 시그널로 만든 것과 같아야 함
+        self.assertFalse(Task.objects.subtask_counter_mismatches().exists())
+        missing, stale = TaskTeamVisibility.objects.inconsistencies()
+        self.assertFalse(missing.exists())
+        self.assertFalse(stale.exists())
+        for task in Task.objects.all():
+            self.assertEqual(task.is_complete, task.subtask_open == 0)
+
+        # 같은 비밀번호로 로그인 가능
+        email = User.objects.order_by('id').first().email
+        response = self.client.post('/v1/api/login', {'email': email, 'password': seeding.PASSWORD}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        self.assertEqual(seeding.clear(), {'teams': 3, 'tasks': 18})
+        self.assertFalse(Task.objects.exists())
+        self.assertFalse(User.objects.exists())
+
+    def test_bench_endpoints_reports_every_scenario(self):
+        call_command('seed_bench', teams=2, users_per_team=1, tasks_per_user=2, json=True, stdout=StringIO())
+        tasks_before = Task.objects.count()
+
+        out = StringIO()
+        call_command('bench_endpoints', requests=3, warmup=1, json=True, stdout=out)
+        report = json.loads(out.getvalue())
+        results = {result['scenario']: result for result in report['results']}
+        self.assertEqual(list(results), ['task-list', 'task-list-page', 'task-create', 'task-patch', 'subtask-patch', 'subtask-delete', 'login'])
+        for result in results.values():
+            self.assertEqual(result['errors'], 0, result)
+            self.assertEqual(result['requests'], 3)
+            self.assertGreater(result['queries_per_request'], 0)
+            self.assertLessEqual(result['p50_ms'], result['p99_ms'])
+
+        # 측정 중 만든 업무는 지워진다
+        self.assertEqual(Task.objects.count(), tasks_before)
+
+class QueryPlanRegressionTestCase(APITestCase):
+    # 큰 데이터에서 API 별 쿼리 수 상한과 wink_task/wink_subtask 순차 스캔 여부를 확인한다
+    # 플래너 설정(random_page_cost 등)은 운영과 같은 DATABASES['default']['OPTIONS'] 를 그대로 쓴다
+    @classmethod
+    def setUpTestData(cls):
+        seeding.Seeder(teams=100, users_per_team=5, tasks_per_user=40, subtasks_per_task=3).run()
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE wink_team, wink_user, wink_task, wink_subtask, wink_taskteamvisibility')
+
+    def setUp(self):
+        # 팀 디렉터리 스냅샷이 만료되어 다시 읽는 쿼리가 측정에 섞이지 않도록 미리 채운다
+        team_directory.invalidate()
+        team_directory.warm()
+        self.user = User.objects.filter(email__endswith=seeding.USER_EMAIL_SUFFIX).order_by('id').first()
+        self.other_team_id = Team.objects.exclude(id=self.user.team_id).values_list('id', flat=True).first()
+        self.client.force_authenticate(user=self.user)
+
+    def create_task(self):
+        data = {'task': {
+            'team_id': self.user.team_id, 'title': 'Task', 'content': 'Task Content',
+            'subtasks': [{'team_id': self.user.team_id}, {'team_id': self.other_team_id}],
+        }}
+        return self.client.post('/v1/api/tasks', data, format='json').data
+
+    def check(self, budget, method, path, data=None, expected=status.HTTP_200_OK):
+        with assert_query_plans(budget) as recorder:
+            response = getattr(self.client, method)(path, data, format='json')
+            if response.streaming:
+                b''.join(response.streaming_content)
+        self.assertEqual(response.status_code, expected, getattr(response, 'data', None))
+        return response
+
+    @override_settings(TASK_FEED_CACHE_TIMEOUT=0)
+    def test_task_list(self):
+        self.check(3, 'get', '/v1/api/tasks')
+        self.check(3, 'get', '/v1/api/tasks?page_size=20')
+        self.check(3, 'get', '/v1/api/tasks/export')
+
+    def test_task_writes(self):
+        data = {'task': {
+            'team_id': self.user.team_id, 'title': 'Task', 'content': 'Task Content',
+            'subtasks': [{'team_id': self.user.team_id}, {'team_id': self.other_team_id}],
+        }}
+        task = self.check(6, 'post', '/v1/api/tasks', data, status.HTTP_201_CREATED).data
+        self.check(6, 'post', '/v1/api/tasks/import', [data['task'], data['task']])
+        update = {'task': {'team_id': self.user.team_id, 'title': 'Task 수정', 'content': 'Task Content'}}
+        self.check(6, 'patch', f"/v1/api/tasks/{task['id']}", update)
+        self.check(6, 'delete', f"/v1/api/tasks/{task['id']}", expected=status.HTTP_204_NO_CONTENT)
+
+    def test_subtask_writes(self):
+        task = self.create_task()
+        own, other = task['subtasks']
+        self.check(5, 'patch', f"/v1/api/subtasks/{own['id']}", {'is_complete': True})
+        self.check(5, 'patch', '/v1/api/subtasks', {'subtasks': [{'id': own['id'], 'is_complete': False}]})
+        self.check(9, 'delete', f"/v1/api/subtasks/{other['id']}", expected=status.HTTP_204_NO_CONTENT)
+
+    def test_teams_and_accounts(self):
+        self.check(1, 'get', '/v1/api/teams/')
+        self.check(2, 'post', '/v1/api/teams/', {'name': '머루'}, status.HTTP_201_CREATED)
+        self.client.force_authenticate(user=None)
+        self.check(2, 'post', '/v1/api/signup', {'email': 'new@wink.test', 'password': 'testpassword', 'team_id': self.user.team_id}, status.HTTP_201_CREATED)
+        self.check(1, 'post', '/v1/api/login', {'email': self.user.email, 'password': seeding.PASSWORD})
+
+
+class ORJSONRendererTestCase(APITestCase):
+    def setUp(self):
+        self.team = Team.objects.create(name='단비')
+        self.user = User.objects.create(email='test@wink.test', password='testpassword', team=self.team)
+        self.client.force_authenticate(user=self.user)
+
+    def test_render_matches_stdlib(self):
+        data = {
+            'id': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'price': decimal.Decimal('10.50'),
+            'title': '줄\u2028바꿈',
+            'when': datetime.datetime(2023, 10, 1, 12, 30, tzinfo=datetime.timezone.utc),
+            'day': datetime.date(2023, 10, 1),
+            'items': [1, None, True],
+        }
+        body = ORJSONRenderer().render(data)
+        self.assertEqual(body, JSONRenderer().render(data))
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+        # 들여쓰기를 요청하면 JSONRenderer 로 렌더링
+        indented = ORJSONRenderer().render(data, 'application/json; indent=2', {})
+        self.assertEqual(indented, JSONRenderer().render(data, 'application/json; indent=2', {}))
+
+    def test_parse(self):
+        body = '{"task": {"title": "업무", "subtasks": [{"team_id": 1}]}}'.encode()
+        self.assertEqual(ORJSONParser().parse(io.BytesIO(body), parser_context={'encoding': 'utf-8'}),
+                         JSONParser().parse(io.BytesIO(body), parser_context={'encoding': 'utf-8'}))
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{"task": '), parser_context={})
+        with self.assertRaises(ParseError):
+            ORJSONParser().parse(io.BytesIO(b'{"value": NaN}'), parser_context={})
+
+        # UTF-8 이 아닌 본문은 JSONParser 로 처리
+        latin = '{"title": "caf\u00e9"}'.encode('latin-1')
+        self.assertEqual(ORJSONParser().parse(io.BytesIO(latin), parser_context={'encoding': 'latin-1'}), {'title': 'café'})
+
+    @override_settings(TASK_FEED_CACHE_TIMEOUT=0)
+    def test_api_round_trip(self):
+        data = {'task': {
+            'team_id': self.team.id, 'title': 'Task', 'content': 'Task Content',
+            'subtasks': [{'team_id': self.team.id}],
+        }}
+        response = self.client.post('/v1/api/tasks', json.dumps(data), content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+
+        response = self.client.get('/v1/api/tasks')
+        self.assertEqual(response.content, JSONRenderer().render(response.data))
+        self.assertEqual(response.json()[0]['subtasks'][0]['team'], self.team.id)
+
+        response = self.client.post('/v1/api/tasks', b'{"task": ', content_type='application/json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bench_json(self):
+        out = StringIO()
+        call_command('bench_json', tasks=20, iterations=2, json=True, stdout=out)
+        report = json.loads(out.getvalue())
+        self.assertEqual([result['backend'] for result in report['results']], ['stdlib', 'orjson'])
+        self.assertEqual(report['results'][0]['payload_bytes'], report['results'][1]['payload_bytes'])
@@ -1,9 +1,16 @@
+from django.conf import settings
 from django.urls import path
-from .views import TasksView, TaskView, SubTaskView, TeamsView, SignUpView, LoginView
+from .views import TasksView, TaskImportView, TaskExportView, TaskView, SubTaskView, SubTasksView, TeamsView, SignUpView, LoginView
+
+if settings.ASYNC_READ_VIEWS:
+    from .async_views import AsyncTasksView as TasksView, AsyncTeamsView as TeamsView
 
 urlpatterns = [
     path('tasks', TasksView.as_view(), name='task-list'),
+    path('tasks/import', TaskImportView.as_view(), name='task-import'),
+    path('tasks/export', TaskExportView.as_view(), name='task-export'),
     path('tasks/<int:task_id>', TaskView.as_view(), name='task-detail'),
+    path('subtasks', SubTasksView.as_view(), name='subtask-bulk'),
     path('subtasks/<int:subtask_id>', SubTaskView.as_view(), name='subtask-detail'),
     path('teams/', TeamsView.as_view(), name='teams'),
     path('signup', SignUpView.as_view(), name='signup'),
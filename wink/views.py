@@ -1,35 +1,80 @@
-from django.db.models import Q
-from wink.models import Task, SubTask, Team, User
+from wink.models import Task, SubTask, User, TaskTeamVisibility
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework import status
+from rest_framework import status, serializers
 from rest_framework.permissions import AllowAny
-from django.contrib.auth import authenticate
-from wink.serializers import TaskSerializer, TaskReqSerializer, SubTaskSerializer, TeamSerializer, UserSignUpSerializer, UserLoginSerializer, TaskUpdateReqSerializer, SubTaskUpdateSerializer
-from django.contrib.auth.hashers import make_password
-from rest_framework_simplejwt.tokens import RefreshToken
+from wink.serializers import TaskSerializer, TaskReqSerializer, SubTaskSerializer, TeamSerializer, UserSignUpSerializer, UserLoginSerializer, TaskUpdateReqSerializer, SubTaskUpdateSerializer, SubTaskBulkCompletionReqSerializer
+from wink.hashers import HashingBusy, authenticate_user, hash_password
+from wink.authentication import WinkRefreshToken
 from drf_yasg.utils import swagger_auto_schema
 from drf_yasg import openapi
 from django.shortcuts import get_object_or_404
+from wink.pagination import TaskFeedPagination
+from wink.team_directory import team_directory
+from wink import feed_cache
+from wink.conditional import task_feed_etag, task_feed_last_modified, team_list_etag, team_list_last_modified
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
+from django.db import transaction
+from wink.signals import deferred_visibility_sync, mark_task_visibility_dirty
+from wink.completion import delete_open_subtask, set_subtask_completion, set_subtasks_completion
+from wink.importer import TaskImporter
+from wink.exporter import EXPORT_FORMATS, aiter_chunks, export_team_tasks
+from django.http import StreamingHttpResponse
+from django.core.handlers.asgi import ASGIRequest
+from django.utils import timezone
+from wink.parsers import NDJSONParser
+from wink.instrumentation import span
+from wink import metrics
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.crypto import constant_time_compare
+from rest_framework.settings import api_settings
 
 class TasksView(APIView):
+    pagination_class = TaskFeedPagination
 
     @swagger_auto_schema(
         operation_id='업무 리스트 조회', 
+        manual_parameters=[
+            openapi.Parameter('cursor', openapi.IN_QUERY, description='다음/이전 페이지 커서', type=openapi.TYPE_STRING),
+            openapi.Parameter('page_size', openapi.IN_QUERY, description='페이지 크기 (커서 모드)', type=openapi.TYPE_INTEGER),
+        ],
         responses={200: TaskSerializer(many=True)}
     )
+    @method_decorator(condition(etag_func=task_feed_etag, last_modified_func=task_feed_last_modified))
     def get(self, request):
-        user_team = request.user.team
-        team_tasks = Task.objects.filter(team=user_team).distinct()
+        team_id = request.user.team_id
+        paginator = self.pagination_class()
+        paginated = paginator.is_requested(request)
 
-        other_tasks = Task.objects.exclude(team=user_team).filter(
-            Q(subtasks__team=user_team)
-        ).distinct()
-        
-        unique_tasks = (team_tasks | other_tasks).distinct().order_by('-created_at')
+        if not feed_cache.is_enabled() or request.accepted_renderer.format != 'json':
+            return Response(self.get_feed_data(request, team_id, paginator, paginated), status=status.HTTP_200_OK)
+
+        # 같은 팀 구성원에게는 같은 응답이므로 (팀, 요청 URL, 미디어 타입) 단위로 렌더링된 JSON을 캐시
+        variant = feed_cache.request_variant(request, paginated)
+        body = feed_cache.get_or_build(team_id, variant, lambda: request.accepted_renderer.render(
+            self.get_feed_data(request, team_id, paginator, paginated),
+            request.accepted_media_type,
+            self.get_renderer_context(),
+        ))
+        return feed_cache.CachedResponse(body, status=status.HTTP_200_OK)
+
+    def get_feed_data(self, request, team_id, paginator, paginated):
+        # 팀 가시성 테이블에서 (team, created_at desc) 순으로 조회
+        feed = TaskTeamVisibility.objects.feed(team_id)
 
-        tasks_serializer = TaskSerializer(unique_tasks, many=True)
-        return Response(tasks_serializer.data, status=status.HTTP_200_OK)
+        # cursor/page_size 파라미터가 있으면 (created_at, task_id) 기준 keyset 페이지네이션
+        if paginated:
+            page = paginator.paginate_queryset(feed, request, view=self)
+            with span('serialize'):
+                tasks_serializer = TaskSerializer([visibility.task for visibility in page], many=True)
+                return paginator.get_paginated_response(tasks_serializer.data).data
+
+        unique_tasks = [visibility.task for visibility in feed.order_by('-created_at', '-task_id')]
+        with span('serialize'):
+            tasks_serializer = TaskSerializer(unique_tasks, many=True)
+            return tasks_serializer.data
 
     @swagger_auto_schema(
         operation_id='업무 생성', 
@@ -37,14 +82,14 @@ class TasksView(APIView):
         responses={200: TaskSerializer}
     )
     def post(self, request):
-        create_user = request.user
         task_serializer = TaskReqSerializer(data=request.data['task'])
         
         task_valid = task_serializer.is_valid()
 
         if task_valid:
             # Task 저장
-            task = task_serializer.save(create_user=create_user)
+            # request.user 는 토큰 클레임으로 만든 객체일 수 있으므로 id 만 사용
+            task = task_serializer.save(create_user_id=request.user.id)
             task_serializer = TaskSerializer(task)
             return Response(task_serializer.data, status=status.HTTP_201_CREATED)
         
@@ -52,6 +97,63 @@ class TasksView(APIView):
         return Response({'task_errors': task_errors}, status=status.HTTP_400_BAD_REQUEST)
 
 
+class TaskImportView(APIView):
+    # JSON 배열({"tasks": [...]} 또는 [...]) 또는 NDJSON(application/x-ndjson, 한 줄에 업무 하나)
+    parser_classes = [NDJSONParser, *api_settings.DEFAULT_PARSER_CLASSES]
+
+    @swagger_auto_schema(
+        operation_id='업무 일괄 등록',
+        request_body=TaskReqSerializer(many=True),
+        responses={200: openapi.Response('등록 결과 (total, created, failed, errors: [{row, errors}])')}
+    )
+    def post(self, request):
+        rows = request.data
+        if isinstance(rows, dict):
+            rows = rows.get('tasks')
+        if rows is None or isinstance(rows, (dict, str)):
+            return Response({'error': '업무 목록(JSON 배열 또는 NDJSON)이 필요합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # 검증/저장은 chunk 단위로 진행하고, 잘못된 행은 건너뛰고 행별 오류로 돌려준다
+        result = TaskImporter(create_user_id=request.user.id).run(rows)
+        return Response(result, status=status.HTTP_200_OK)
+
+
+class TaskExportView(APIView):
+
+    @swagger_auto_schema(
+        operation_id='업무 내보내기',
+        manual_parameters=[
+            openapi.Parameter('output', openapi.IN_QUERY, description='ndjson(기본) 또는 csv', type=openapi.TYPE_STRING),
+            openapi.Parameter('compress', openapi.IN_QUERY, description='gzip 이면 gzip 으로 압축', type=openapi.TYPE_STRING),
+        ],
+        responses={200: openapi.Response('우리 팀에게 보이는 업무 전체 (스트리밍)')}
+    )
+    def get(self, request):
+        # 쿼리 파라미터 format 은 DRF 렌더러 선택에 쓰이므로 output 을 사용
+        output = request.query_params.get('output', 'ndjson')
+        compress = request.query_params.get('compress')
+        if output not in EXPORT_FORMATS:
+            return Response({'error': 'output은 ndjson 또는 csv 여야 합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+        if compress not in (None, 'gzip'):
+            return Response({'error': 'compress는 gzip 만 지원합니다.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        team_id = request.user.team_id
+        content_type, extension = EXPORT_FORMATS[output]
+        filename = f'tasks-team-{team_id}-{timezone.now():%Y%m%d}.{extension}'
+        if compress:
+            content_type = 'application/gzip'
+            filename += '.gz'
+
+        # 전체 리스트를 메모리에 만들지 않고 chunk 단위로 읽고 쓰며 내려보낸다
+        chunks = export_team_tasks(team_id, output=output, compress=bool(compress))
+        if isinstance(request._request, ASGIRequest):
+            # asgi 에서는 async iterator 를 넘겨야 응답 전체를 모으지 않고 스트리밍한다
+            chunks = aiter_chunks(chunks)
+        response = StreamingHttpResponse(chunks, content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        return response
+
+
 class TaskView(APIView):
     @swagger_auto_schema(
         operation_id='업무 수정', 
@@ -60,10 +162,9 @@ class TaskView(APIView):
     )
     def patch(self, request, task_id):
         task = get_object_or_404(Task, id=task_id)
-        create_user = request.user
 
         # 권한 체크
-        if task.create_user != create_user:
+        if task.create_user_id != request.user.id:
             return Response({'error': '업무 작성자만 수정할 수 있습니다.'}, status=status.HTTP_403_FORBIDDEN)
 
         # 수정할 데이터 가져오기
@@ -72,7 +173,11 @@ class TaskView(APIView):
         task_valid = task_serializer.is_valid()
 
         if task_valid:
-            updated_task = task_serializer.save()
+            try:
+                updated_task = task_serializer.save()
+            except serializers.ValidationError as exc:
+                # 검증 후 잠금 전에 하위 업무가 다른 업무로 옮겨진 경우
+                return Response({'task_errors': exc.detail}, status=status.HTTP_400_BAD_REQUEST)
             return Response(TaskSerializer(updated_task).data, status=status.HTTP_200_OK)
             
         task_errors = task_serializer.errors if not task_valid else None
@@ -83,15 +188,31 @@ class TaskView(APIView):
     )
     def delete(self, request, task_id):
         task = get_object_or_404(Task, id=task_id)
-        create_user = request.user
 
-        if task.create_user != create_user:
+        if task.create_user_id != request.user.id:
             return Response({'error': '업무 작성자만 수정할 수 있습니다.'}, status=status.HTTP_403_FORBIDDEN)
         task.delete()
 
         return Response({'message': '업무 삭제 성공'}, status=status.HTTP_204_NO_CONTENT)
         
 
+class SubTasksView(APIView):
+
+    @swagger_auto_schema(
+        operation_id='서브 업무 일괄 완료 처리',
+        request_body=SubTaskBulkCompletionReqSerializer,
+        responses={200: openapi.Response('항목별 처리 결과 (status: updated / forbidden / not_found)')}
+    )
+    def patch(self, request):
+        serializer = SubTaskBulkCompletionReqSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        # 권한 확인과 완료 처리, 상위 업무 완료 여부 재계산을 한 트랜잭션으로 처리
+        results = set_subtasks_completion(request.user.team_id, serializer.validated_data['subtasks'])
+        return Response({'results': results}, status=status.HTTP_200_OK)
+
+
 class SubTaskView(APIView):
 
     @swagger_auto_schema(
@@ -99,29 +220,18 @@ class SubTaskView(APIView):
         responses={200: SubTaskSerializer}
     )
     def patch(self, request, subtask_id):
-        subtask = get_object_or_404(SubTask, id=subtask_id)
+        subtask = get_object_or_404(SubTask.objects.only('id', 'team_id', 'task_id'), id=subtask_id)
         is_complete = request.data.get('is_complete')
-        subtask_team = subtask.team
-        current_user_team = request.user.team
         
         if is_complete is not None:
-            if current_user_team == subtask_team:
-                subtask.is_complete = is_complete
-                subtask.completed_date = timezone.now()
-                subtask.save()
-
-                # 상위 Task의 SubTask 체크
-                task = subtask.task
-                all_subtasks_completed = task.subtask.filter(is_complete=False).count() == 0
-                
-                if all_subtasks_completed:
-                    task.is_complete = True
-                    task.completed_date = timezone.now()
-                    task.save()
-                else:
-                    task.is_complete = False
-                    task.completed_date = None
-                    task.save()
+            if subtask.team_id is not None and request.user.team_id == subtask.team_id:
+                is_complete = serializers.BooleanField().run_validation(is_complete)
+
+                # 하위 업무 완료 처리와 상위 Task 완료 여부 재계산을 한 트랜잭션으로 처리
+                if not set_subtask_completion(subtask, is_complete, request.user.team_id):
+                    # 확인 후 잠금 전에 삭제되었으면 404, 다른 팀으로 바뀌었으면 403
+                    get_object_or_404(SubTask.objects.only('id'), id=subtask_id)
+                    return Response({'error': '하위 업무에 속한 팀만 완료 상태를 변경할 수 있습니다.'}, status=status.HTTP_403_FORBIDDEN)
 
                 return Response({'message': 'SubTask 완료 상태 업데이트 완료'}, status=status.HTTP_200_OK)
             else:
@@ -133,15 +243,21 @@ class SubTaskView(APIView):
         operation_id='서브 업무 삭제', 
     )
     def delete(self, request, subtask_id):
-        subtask = get_object_or_404(SubTask, id=subtask_id)
-        task = get_object_or_404(Task, id=subtask.task)
+        subtask = get_object_or_404(SubTask.objects.select_related('task'), id=subtask_id)
+        task = subtask.task
         current_user = request.user
         
-        if current_user == task.create_user:
+        if task is not None and current_user.id == task.create_user_id:
             if subtask.is_complete:
                 return Response({'error': '완료된 SubTask는 삭제할 수 없습니다.'}, status=status.HTTP_400_BAD_REQUEST)
             else:
-                subtask.delete()
+                # 삭제와 팀 가시성 동기화를 한 트랜잭션으로 처리
+                with transaction.atomic(), deferred_visibility_sync():
+                    # 상위 업무를 잠근 뒤 미완료인 경우에만 삭제하고 카운터/완료 여부를 함께 갱신
+                    deleted = delete_open_subtask(subtask)
+                    mark_task_visibility_dirty(task.id)
+                if not deleted:
+                    return Response({'error': '완료된 SubTask는 삭제할 수 없습니다.'}, status=status.HTTP_400_BAD_REQUEST)
                 return Response({'message': 'SubTask 삭제 성공'}, status=status.HTTP_204_NO_CONTENT)
         else:
             return Response({'error': '상위 업무의 작성자만 하위 업무를 삭제할 수 있습니다.'}, status=status.HTTP_403_FORBIDDEN)
@@ -151,10 +267,10 @@ class TeamsView(APIView):
     @swagger_auto_schema(
         operation_id='팀 리스트 조회', 
     )
+    @method_decorator(condition(etag_func=team_list_etag, last_modified_func=team_list_last_modified))
     def get(self, request):
-        teams = Team.objects.all()
-        teams_serializer = TeamSerializer(teams, many=True)
-        return Response(teams_serializer.data, status=status.HTTP_200_OK)
+        # 팀 목록은 거의 바뀌지 않으므로 팀 디렉터리 캐시에서 읽는다
+        return Response(team_directory.all(), status=status.HTTP_200_OK)
 
     @swagger_auto_schema(
         operation_id='팀 생성', 
@@ -167,8 +283,16 @@ class TeamsView(APIView):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+def busy_response():
+    response = Response({'error': '요청이 많아 처리할 수 없습니다. 잠시 후 다시 시도하세요.'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+    response['Retry-After'] = '1'
+    return response
+
+
 class SignUpView(APIView):
     permission_classes = [AllowAny]
+    # 만료/무효화된 토큰 헤더가 남아 있어도 가입/로그인할 수 있도록 인증을 거치지 않는다
+    authentication_classes = []
 
     @swagger_auto_schema(
         operation_id='회원 가입',
@@ -187,9 +311,13 @@ class SignUpView(APIView):
         serializer = UserSignUpSerializer(data=request.data)
         if serializer.is_valid():
             email = serializer.validated_data['email']
-            password = make_password(serializer.validated_data['password'])
             team = serializer.validated_data['team_id']
-            user = User.objects.create_user(email=email, password=password, team=team)
+            # 비밀번호는 여기서 한 번만 해시한다 (create_user 에 해시를 넘기면 해시의 해시가 저장됨)
+            try:
+                password = hash_password(serializer.validated_data['password'])
+            except HashingBusy:
+                return busy_response()
+            user = User.objects.create(email=email, password=password, team=team)
 
             return Response({'user_id': user.id}, status=status.HTTP_201_CREATED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
@@ -197,6 +325,8 @@ class SignUpView(APIView):
 
 class LoginView(APIView):
     permission_classes = [AllowAny]
+    # 만료/무효화된 토큰 헤더가 남아 있어도 가입/로그인할 수 있도록 인증을 거치지 않는다
+    authentication_classes = []
 
     @swagger_auto_schema(
         operation_id='로그인',
@@ -230,12 +360,16 @@ class LoginView(APIView):
             email = serializer.validated_data['email']
             password = serializer.validated_data['password']
 
-            # 인증
-            user = authenticate(request, username=email, password=password)
+            # 인증 (해시 계산은 제한된 스레드 풀에서, 해셔 설정이 바뀌었으면 다시 해시해 저장)
+            try:
+                user = authenticate_user(email, password)
+            except HashingBusy:
+                return busy_response()
 
             # 인증 성공
             if user is not None:
-                refresh = RefreshToken.for_user(user)
+                # 팀 id/활성 여부를 클레임으로 넣어 이후 요청에서 사용자 조회를 생략한다
+                refresh = WinkRefreshToken.for_user(user)
                 access_token = str(refresh.access_token)
                 refresh_token = str(refresh)
                 return Response({'access_token': access_token, 'refresh_token': refresh_token}, status=status.HTTP_200_OK)
@@ -243,3 +377,16 @@ class LoginView(APIView):
             else:
                 return Response({'error': '인증 실패'}, status=status.HTTP_401_UNAUTHORIZED)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+
+class MetricsView(APIView):
+    # Prometheus 수집용 지표 (텍스트 형식). METRICS_TOKEN 이 설정되어 있으면 Authorization: Bearer <토큰> 필요
+    authentication_classes = []
+    permission_classes = [AllowAny]
+    swagger_schema = None
+
+    def get(self, request):
+        token = settings.METRICS_TOKEN
+        if token and not constant_time_compare(request.headers.get('Authorization', ''), f'Bearer {token}'):
+            return Response({'error': '지표를 조회할 권한이 없습니다.'}, status=status.HTTP_403_FORBIDDEN)
+        return HttpResponse(metrics.render(), content_type=metrics.CONTENT_TYPE)